@@ -1,18 +1,6 @@
-from .summarizer import summarize
-from .claim_extractor import extract_claims
-from .searcher import search_web
-from .fact_checker import assess_claim
-from .scoring import trust_weight, aggregate_truth_score, star_rating_from_quality
-from .transcript import fetch_transcript_youtube
-
-__all__ = (
-    "summarize",
-    "extract_claims",
-    "search_web",
-    "assess_claim",
-    "trust_weight",
-    "aggregate_truth_score",
-    "star_rating_from_quality",
-    "fetch_transcript_youtube",
-)
-
+def __getattr__(name):
+    # Top-level shortcuts to the service functions, resolved lazily (see app/services/__init__.py)
+    from . import services
+    if name in services.__all__:
+        return getattr(services, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
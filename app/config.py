@@ -1,16 +1,119 @@
-import os
+import threading
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
-    OPENAI_API_KEY: str = os.environ.get("OPENAI_API_KEY", "")
-    YT_API_KEY: str = os.environ.get("YT_API_KEY", "")
+    OPENAI_API_KEY: str = ""
+    YT_API_KEY: str = ""
     MAX_CLAIMS: int = 10
     MAX_SOURCES_PER_CLAIM: int = 5
+    PIPELINE_CONCURRENCY: int = 8
+    LLM_MODEL: str = "gpt-3.5-turbo"
+    LLM_MAX_TOKENS: int = 1000
+    LLM_TIMEOUT: float = 60.0
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE: float = 0.5
+    LLM_BACKOFF_MAX: float = 8.0
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE: int = 10
+    # Extra OpenAI-compatible backends and per-task routes, as JSON (see llm_router)
+    LLM_BACKENDS: str = ""
+    LLM_ROUTES: str = ""
+    LLM_ROUTE_POLICY: str = "ordered"
+    LLM_EWMA_ALPHA: float = 0.2
+    LLM_LATENCY_WINDOW: int = 200
+    LLM_BACKEND_COOLDOWN: float = 30.0
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY: float = 0.25
+    LLM_HEDGE_WORKERS: int = 32
+    LLM_HEDGE_BUDGET: float = 0.05  # share of eligible calls that may be hedged
+    DATA_DIR: str = "data"
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL: float = 7 * 24 * 3600.0
+    LLM_CACHE_MEMORY_ITEMS: int = 512
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    SEARCH_CACHE_TTL: float = 6 * 3600.0
+    SEARCH_CACHE_SIZE: int = 2048
+    ASSESS_BATCH_SIZE: int = 6
+    ASSESS_BATCH_TOKENS: int = 3000
+    ASSESS_MAX_WAIT: float = 0.5  # longest a ready claim waits for its assess batch to fill
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_MAX: int = 100
+    CHUNK_TOKENS: int = 3000
+    CHUNK_CONCURRENCY: int = 8
+    BATCH_WINDOW: int = 16
+    BATCH_MAX_DOCUMENTS: int = 1000
+    BATCH_MAX_CLAIMS: int = 10_000  # settled unique claims kept for dedup within one batch
+    TRANSCRIPT_CACHE_TTL: float = 24 * 3600.0
+    OPENAI_RPM: int = 500
+    OPENAI_TPM: int = 200_000
+    OPENAI_CONCURRENCY: int = 16
+    TAVILY_RPM: int = 100
+    TAVILY_CONCURRENCY: int = 8
+    YOUTUBE_QUOTA_PER_DAY: int = 10_000
+    YOUTUBE_CONCURRENCY: int = 4
+    PROVIDER_MAX_WAIT: float = 30.0  # longest a call queues on a provider's limits; 0 waits as long as it takes
+    METRICS_ENABLED: bool = True
+    NEAR_DUP_THRESHOLD: float = 0.8
+    EVIDENCE_TOKEN_BUDGET: int = 600
+    EVIDENCE_DUP_THRESHOLD: float = 0.8
+    SEGMENT_MIN_TOKENS: int = 300
+    COMBINED_ANALYSIS: bool = True
+    CLAIM_STORE_ENABLED: bool = True
+    CLAIM_STORE_MAX_AGE: float = 7 * 24 * 3600.0
+    CLAIM_STORE_MATCH_THRESHOLD: float = 0.9  # 1.0 reuses exact matches only
+    TLDW_ENABLED: bool = True
+    TLDW_WINDOW_SECONDS: float = 300.0
+    TLDW_MAX_WINDOWS: int = 24
+    PDF_MAX_BYTES: int = 50 * 1024 * 1024
+    PDF_MAX_PAGES: int = 1000
+    PDF_WORKERS: int = 2
+    PDF_PAGES_PER_TASK: int = 8
+    # Admission control for /analyze/* (cost units: see services/admission.estimate_cost)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CAPACITY: float = 64.0
+    ADMISSION_QUEUE_MAX: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 10.0
+    ADMISSION_CLIENT_RPM: int = 60
+    ADMISSION_CLIENT_BURST: int = 10
+    ADMISSION_TOKENS_PER_CLAIM: int = 100
+    ADMISSION_YOUTUBE_TOKENS: int = 4000
+    ADMISSION_PDF_TEXT_RATIO: float = 0.1
+    ADMISSION_UNKNOWN_LENGTH: int = 1_000_000  # bytes assumed for a body sent without Content-Length
+    ADMISSION_API_KEYS: str = ""  # comma-separated keys that get their own rate limit bucket
+    TRUST_TABLE_PATH: str = ""
+    TRUST_DEFAULT_WEIGHT: float = 0.5
+    TRUST_RELOAD_INTERVAL: float = 5.0
+    BOOTSTRAP_SAMPLES: int = 1000
+    BOOTSTRAP_SEED: int = 0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
-settings = Settings()
+_settings = None
+_lock = threading.Lock()
 
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
 
+class _LazySettings:
+    # Reads the environment / .env on first attribute access rather than at import,
+    # so keys exported after import (e.g. from Streamlit secrets) are still seen.
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
 
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
 
+    def __delattr__(self, name):
+        delattr(get_settings(), name)
+
+    def __repr__(self):
+        return repr(get_settings())
+
+settings = _LazySettings()
@@ -1,17 +1,49 @@
-from fastapi import FastAPI
-from .routers import youtube, text, web
-
-app = FastAPI(title="TruthLens API", version="0.1.0")
-
-@app.get("/")
-def root():
-    return {"name": "TruthLens", "ok": True}
-
-@app.get("/health")
-def health():
-    return {"status": "ok"}
-
-# Routers
-app.include_router(text.router)
-app.include_router(youtube.router)
-app.include_router(web.router)
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .routers import youtube, text, web, jobs, batch, pdf
+from .services.jobs import get_queue
+from .services import trust, tracing
+from .services.admission import AdmissionMiddleware
+from .utils.rate_limit import Throttled
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    trust.get_index()  # compile the domain trust table once, before the first request
+    # Background analysis workers (see app/services/jobs.py)
+    get_queue().start()
+    yield
+    get_queue().stop()
+
+app = FastAPI(title="TruthLens API", version="0.1.0", lifespan=lifespan)
+# Per-client rate limits, a global cost budget and a bounded wait queue in front of /analyze/*
+app.add_middleware(AdmissionMiddleware)
+
+@app.exception_handler(Throttled)
+async def throttled(request: Request, exc: Throttled):
+    # An upstream provider's limits are saturated for longer than PROVIDER_MAX_WAIT
+    return JSONResponse({"detail": str(exc)}, status_code=503,
+                        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))})
+
+# async so they run on the event loop, never behind analysis work in the threadpool
+@app.get("/")
+async def root():
+    return {"name": "TruthLens", "ok": True}
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text format: stage/provider latency histograms, token and cache counters
+    return PlainTextResponse(tracing.render(), media_type="text/plain; version=0.0.4")
+
+# Routers
+app.include_router(text.router)
+app.include_router(youtube.router)
+app.include_router(web.router)
+app.include_router(jobs.router)
+app.include_router(batch.router)
+app.include_router(pdf.router)
@@ -1,17 +1,10 @@
-from .summarizer import summarize
-from .claim_extractor import extract_claims
-from .searcher import search_web
-from .fact_checker import assess_claim
-from .scoring import trust_weight, aggregate_truth_score, star_rating_from_quality
-from .transcript import fetch_transcript_youtube
+from .schemas import Claim, SourceEvidence, ClaimAssessment, AnalysisResult, ClaimVerdict, ClaimVerdictBatch
 
 __all__ = (
-    "summarize",
-    "extract_claims",
-    "search_web",
-    "assess_claim",
-    "trust_weight",
-    "aggregate_truth_score",
-    "star_rating_from_quality",
-    "fetch_transcript_youtube",
+    "Claim",
+    "SourceEvidence",
+    "ClaimAssessment",
+    "AnalysisResult",
+    "ClaimVerdict",
+    "ClaimVerdictBatch",
 )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from typing import List, Optional
 
 class Claim(BaseModel):
@@ -19,6 +19,11 @@ class ClaimAssessment(BaseModel):
     contradiction_score: float  # 0-1
     sources: List[SourceEvidence]
     rationale: str
+    score: Optional[float] = None  # 0-100
+    confidence_interval: Optional[List[float]] = None  # [low, high], 95%
+    duplicate_of: Optional[int] = None  # index of the near-duplicate claim whose verdict this shares
+    verified_at: Optional[float] = None  # unix time of the stored verdict, when reused from the claim store
+    timestamp: Optional[float] = None  # seconds into the video where the claim is made (YouTube only)
 
 class AnalysisResult(BaseModel):
     tldr: List[str]
@@ -31,3 +36,24 @@ class AnalysisResult(BaseModel):
     sources: List[SourceEvidence]
     markdown_report: str
     json_report: dict
+
+class ClaimVerdict(BaseModel):
+    id: str
+    support_score: float = Field(ge=0, le=1)
+    contradiction_score: float = Field(ge=0, le=1)
+    rationale: str = ""
+
+class ClaimVerdictBatch(BaseModel):
+    assessments: List[ClaimVerdict]
+
+class Summary(BaseModel):
+    tldr: List[str] = []
+    executive_summary: str = ""
+    deep_dive: List[str] = []
+
+class DocumentAnalysis(Summary):
+    # Combined summary + claim extraction, returned by one structured LLM call
+    claims: List[Claim] = []
+
+class WindowSummary(BaseModel):
+    bullets: List[str] = []
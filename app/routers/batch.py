@@ -0,0 +1,40 @@
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from ..config import settings
+from ..services import pipeline, report
+
+router = APIRouter(prefix="/analyze", tags=["batch"])
+
+class BatchDoc(BaseModel):
+    id: Optional[str] = None
+    content: str
+
+class BatchIn(BaseModel):
+    documents: List[BatchDoc]
+    cache: Literal["use", "refresh", "bypass"] = "use"
+
+@router.post("/batch")
+def analyze_batch(body: BatchIn):
+    if not body.documents:
+        raise HTTPException(status_code=400, detail="No documents provided.")
+    if len(body.documents) > settings.BATCH_MAX_DOCUMENTS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_DOCUMENTS} documents per batch.")
+    contents = [(d.content or "").strip() for d in body.documents]
+    empty = [i for i, c in enumerate(contents) if not c]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"No content provided for documents {empty[:20]}.")
+    ids = [d.id if d.id is not None else str(i) for i, d in enumerate(body.documents)]
+
+    # One NDJSON line per finished document (in completion order), then a "done" summary
+    def lines():
+        try:
+            for event in report.batch_events(pipeline.iter_batch(contents, k=8, cache=body.cache)):
+                if event["event"] == "document":
+                    event["id"] = ids[event["index"]]
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
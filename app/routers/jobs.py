@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, ValidationError
+from typing import Literal
+from ..services import jobs
+from .text import TextIn
+from .web import WebIn
+from .youtube import YTIn
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+PAYLOADS = {"text": TextIn, "web": WebIn, "youtube": YTIn}
+
+class JobIn(BaseModel):
+    kind: Literal["text", "web", "youtube"]
+    payload: dict
+    priority: int = 0
+
+def _public(job: dict) -> dict:
+    out = {k: job.get(k) for k in ("id", "kind", "priority", "status", "created", "started", "finished", "error")}
+    if job.get("status") == "done":
+        out["result"] = job.get("result")
+    return out
+
+@router.post("", status_code=202)
+def submit_job(body: JobIn):
+    try:
+        payload = PAYLOADS[body.kind](**body.payload).model_dump(mode="json")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    if body.kind != "youtube" and not (payload.get("content") or payload.get("extracted_text") or "").strip():
+        raise HTTPException(status_code=400, detail="No content provided.")
+    try:
+        job = jobs.get_queue().submit(body.kind, payload, priority=body.priority)
+    except jobs.QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return _public(job)
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get_queue().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return _public(job)
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = jobs.get_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return _public(job)
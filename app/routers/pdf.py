@@ -0,0 +1,41 @@
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from typing import Literal
+from ..services import pdf, pipeline, report
+from .text import ndjson_stream
+
+router = APIRouter(prefix="/analyze", tags=["pdf"])
+
+# The body is read straight off the request stream (see pdf.receive_upload), so
+# options come in the query string: POST /analyze/pdf?cache=refresh&timings=true
+
+async def _upload(request: Request) -> tuple:
+    try:
+        path = await pdf.receive_upload(request)
+    except pdf.PdfError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    try:
+        return path, await pdf.page_count(path)
+    except pdf.PdfError as e:
+        os.remove(path)
+        raise HTTPException(status_code=e.status, detail=e.detail)
+
+@router.post("/pdf")
+async def analyze_pdf(request: Request, cache: Literal["use", "refresh", "bypass"] = "use", timings: bool = False):
+    path, pages = await _upload(request)
+    try:
+        run = await run_in_threadpool(pipeline.run_analysis, "", k=8, cache=cache, pages=pdf.iter_pages(path, pages))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        os.remove(path)
+    return report.build_result(run, timings=timings)
+
+@router.post("/pdf/stream")
+async def analyze_pdf_stream(request: Request, cache: Literal["use", "refresh", "bypass"] = "use",
+                             timings: bool = False):
+    path, pages = await _upload(request)
+    return ndjson_stream("", cache=cache, timings=timings, pages=pdf.iter_pages(path, pages),
+                         background=BackgroundTask(os.remove, path))
@@ -1,16 +1,26 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
-from .text import analyze_text, TextIn
+from typing import Literal
+from .text import analyze_text, ndjson_stream, TextIn
 
 router = APIRouter(prefix="/analyze", tags=["web"])
 
 class WebIn(BaseModel):
     url: HttpUrl
     extracted_text: str
+    cache: Literal["use", "refresh", "bypass"] = "use"
+    timings: bool = False
 
 @router.post("/web")
 def analyze_web(body: WebIn):
     txt = (body.extracted_text or "").strip()
     if not txt:
         raise HTTPException(status_code=400, detail="Provide extracted text you have rights to use.")
-    return analyze_text(TextIn(content=txt))
+    return analyze_text(TextIn(content=txt, cache=body.cache, timings=body.timings))
+
+@router.post("/web/stream")
+def analyze_web_stream(body: WebIn):
+    txt = (body.extracted_text or "").strip()
+    if not txt:
+        raise HTTPException(status_code=400, detail="Provide extracted text you have rights to use.")
+    return ndjson_stream(txt, cache=body.cache, timings=body.timings)
@@ -1,17 +1,28 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, HttpUrl
-from ..services import transcript
-from .text import analyze_text, TextIn
+from typing import Literal
+from ..services import transcript, tracing
+from .text import analyze, ndjson_stream
 
 router = APIRouter(prefix="/analyze", tags=["youtube"])
 
 class YTIn(BaseModel):
     url: HttpUrl
+    cache: Literal["use", "refresh", "bypass"] = "use"
+    timings: bool = False
 
 @router.post("/youtube")
 def analyze_youtube(body: YTIn):
-    text, timed = transcript.fetch_transcript_youtube(str(body.url))
+    tracing.start_trace()  # picked up by the pipeline, so the transcript fetch shows in the timings
+    text, video = transcript.fetch_transcript_youtube(str(body.url), cache=body.cache)
     if not text:
         raise HTTPException(status_code=404, detail="No public transcript found. Paste text instead.")
-    return analyze_text(TextIn(content=text))
+    return analyze(text, cache=body.cache, timings=body.timings, timed=video["segments"])
 
+@router.post("/youtube/stream")
+def analyze_youtube_stream(body: YTIn):
+    tracing.start_trace()
+    text, video = transcript.fetch_transcript_youtube(str(body.url), cache=body.cache)
+    if not text:
+        raise HTTPException(status_code=404, detail="No public transcript found. Paste text instead.")
+    return ndjson_stream(text, cache=body.cache, timings=body.timings, timed=video["segments"])
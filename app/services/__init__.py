@@ -1,9 +1,17 @@
-from .summarizer import summarize
-from .claim_extractor import extract_claims
-from .searcher import search_web
-from .fact_checker import assess_claim
-from .scoring import trust_weight, aggregate_truth_score, star_rating_from_quality
-from .transcript import fetch_transcript_youtube
+import importlib
+
+# Public name -> submodule. Submodules (and the provider SDKs behind them) are
+# only imported when one of these names is first used.
+_EXPORTS = {
+    "summarize": "summarizer",
+    "extract_claims": "claim_extractor",
+    "search_web": "searcher",
+    "assess_claim": "fact_checker",
+    "trust_weight": "scoring",
+    "aggregate_truth_score": "scoring",
+    "star_rating_from_quality": "scoring",
+    "fetch_transcript_youtube": "transcript",
+}
 
 __all__ = (
     "summarize",
@@ -16,3 +24,12 @@ __all__ = (
     "fetch_transcript_youtube",
 )
 
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,199 @@
+import asyncio
+import hmac
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from ..config import settings
+from ..utils.rate_limit import TokenBucket
+from ..utils.tokens import CHARS_PER_TOKEN
+
+_MAX_CLIENTS = 10000
+
+class Shed(Exception):
+    def __init__(self, status: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+def estimate_cost(path: str, content_length: int) -> float:
+    # Relative cost units: 1 per request, 1 per 1000 input tokens and 0.5 per
+    # expected claim (about one per ADMISSION_TOKENS_PER_CLAIM tokens, at most
+    # MAX_CLAIMS per chunk). YouTube bodies only hold a URL, so they are costed as
+    # a typical transcript; most of a PDF's bytes are layout, fonts and images.
+    tokens = content_length / CHARS_PER_TOKEN
+    if path.startswith("/analyze/youtube"):
+        tokens = max(tokens, settings.ADMISSION_YOUTUBE_TOKENS)
+    elif path.startswith("/analyze/pdf"):
+        tokens *= settings.ADMISSION_PDF_TEXT_RATIO
+    chunks = max(1, math.ceil(tokens / settings.CHUNK_TOKENS))
+    claims = min(settings.MAX_CLAIMS * chunks, 1 + tokens / settings.ADMISSION_TOKENS_PER_CLAIM)
+    return 1.0 + tokens / 1000 + 0.5 * claims
+
+class AdmissionController:
+    # Per-client token buckets in front of a global budget of in-flight cost.
+    # Requests that don't fit wait in a bounded FIFO queue until capacity frees up
+    # or their deadline passes; anything over a limit is shed straight away with a
+    # Retry-After hint instead of slowing everyone else down.
+    def __init__(self, capacity: float, queue_max: int, queue_timeout: float, client_rpm: int = 0,
+                 client_burst: int = None):
+        self.capacity = capacity
+        self.queue_max = queue_max
+        self.queue_timeout = queue_timeout
+        self.client_rpm = client_rpm
+        self.client_burst = client_burst or client_rpm
+        self.in_flight = 0.0
+        self.admitted = 0
+        self.shed = {"rate_limited": 0, "queue_full": 0, "timeout": 0}
+        self.avg_seconds = None
+        self._waiters = deque()  # [cost, future, loop]
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check_rate(self, client: str) -> float:
+        # None if the client may proceed, otherwise seconds until it may retry
+        if not self.client_rpm:
+            return None
+        with self._lock:
+            bucket = self._clients.get(client)
+            if bucket is None:
+                bucket = self._clients[client] = TokenBucket(self.client_rpm, 60.0, capacity=self.client_burst)
+                if len(self._clients) > _MAX_CLIENTS:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(client)
+        if bucket.allow():
+            return None
+        with self._lock:
+            self.shed["rate_limited"] += 1
+        return bucket.wait_time()
+
+    def _retry_after(self, cost: float) -> float:
+        # Rough time for the work ahead of this request to drain
+        queued = sum(w[0] for w in self._waiters)
+        return (self.avg_seconds or 1.0) * (self.in_flight + queued + cost) / self.capacity
+
+    async def acquire(self, cost: float) -> float:
+        cost = min(cost, self.capacity)  # an oversized request can still run alone
+        with self._lock:
+            if not self._waiters and self.in_flight + cost <= self.capacity:
+                self.in_flight += cost
+                self.admitted += 1
+                return cost
+            if len(self._waiters) >= self.queue_max:
+                self.shed["queue_full"] += 1
+                raise Shed(503, "Server is at capacity, try again later.", self._retry_after(cost))
+            loop = asyncio.get_running_loop()
+            waiter = [cost, loop.create_future(), loop]
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    self.shed["timeout"] += 1
+                    raise Shed(503, "Timed out waiting for capacity, try again later.", self._retry_after(cost))
+            # granted just as the deadline passed: the slot is ours
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release(cost)
+            raise
+        return cost
+
+    def release(self, cost: float, seconds: float = None):
+        with self._lock:
+            self.in_flight = max(0.0, self.in_flight - cost)
+            if seconds is not None:
+                self.avg_seconds = seconds if self.avg_seconds is None else 0.2 * seconds + 0.8 * self.avg_seconds
+            # FIFO: the head waits for room rather than being overtaken by smaller requests
+            while self._waiters and self.in_flight + self._waiters[0][0] <= self.capacity:
+                cost, future, loop = self._waiters.popleft()
+                self.in_flight += cost
+                self.admitted += 1
+                loop.call_soon_threadsafe(_grant, future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight_cost": self.in_flight, "capacity": self.capacity, "queue_depth": len(self._waiters),
+                    "admitted": self.admitted, "shed": dict(self.shed)}
+
+def _grant(future):
+    if not future.done():
+        future.set_result(True)
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(settings.ADMISSION_CAPACITY, settings.ADMISSION_QUEUE_MAX,
+                                                  settings.ADMISSION_QUEUE_TIMEOUT, settings.ADMISSION_CLIENT_RPM,
+                                                  settings.ADMISSION_CLIENT_BURST)
+    return _controller
+
+def reset():
+    global _controller
+    with _controller_lock:
+        _controller = None
+
+def _api_key(headers: dict) -> str:
+    # A key from X-API-Key or "Authorization: Bearer", if it is one of ADMISSION_API_KEYS
+    key = headers.get(b"x-api-key") or headers.get(b"authorization", b"").removeprefix(b"Bearer ")
+    key = key.decode("latin-1").strip()
+    if key and any(hmac.compare_digest(key, k.strip()) for k in settings.ADMISSION_API_KEYS.split(",") if k.strip()):
+        return key
+    return None
+
+def client_id(scope: dict, headers: dict) -> str:
+    # Unknown keys are ignored: anyone could send a fresh one per request to get a fresh bucket
+    key = _api_key(headers)
+    if key:
+        return "key:" + key
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+class AdmissionMiddleware:
+    # Pure ASGI so streamed responses hold their slot until the last byte is sent
+    def __init__(self, app, prefixes: tuple = ("/analyze",)):
+        self.app = app
+        self.prefixes = prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED or not scope["path"].startswith(self.prefixes):
+            return await self.app(scope, receive, send)
+        controller = get_controller()
+        headers = dict(scope["headers"])
+        retry_after = controller.check_rate(client_id(scope, headers))
+        if retry_after is not None:
+            return await _reject(send, 429, "Rate limit exceeded.", retry_after)
+        # A chunked upload doesn't say how big it is; assume a large one rather than a free one
+        try:
+            length = int(headers[b"content-length"])
+        except (KeyError, ValueError):
+            length = settings.ADMISSION_UNKNOWN_LENGTH
+        try:
+            cost = await controller.acquire(estimate_cost(scope["path"], length))
+        except Shed as e:
+            return await _reject(send, e.status, e.detail, e.retry_after)
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(cost, time.monotonic() - start)
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode())]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,102 @@
+from itertools import chain
+from pydantic import ValidationError
+from ..models.schemas import DocumentAnalysis
+from .llm import llm_complete
+from .chunker import split_chunks, iter_chunks, needs_chunking, map_chunks, map_stream
+from . import summarizer, claim_extractor
+
+ANALYSIS_PROMPT = """You are an analyst and fact-check triager.
+Given CONTENT below, produce:
+1) TL;DR: 5–8 bullets.
+2) Executive Summary (300–600 words).
+3) Deep Dive: structure, arguments, rhetorical techniques; 5–10 bullets.
+4) Claims: up to {k} checkable factual claims, each with the sentence it comes from
+   as snippet and 1–3 web search queries that would verify it as proposed_queries.
+
+Respond with JSON only, matching this schema:
+{schema}
+
+CONTENT:
+{content}"""
+
+CHUNK_PROMPT = """You are an analyst and fact-check triager reading part {part} of {total} of a longer document.
+Given CONTENT below, produce:
+1) TL;DR: 3–5 bullets.
+2) Executive Summary (100–200 words).
+3) Deep Dive: structure, arguments, rhetorical techniques; 3–5 bullets.
+4) Claims: up to {k} checkable factual claims, each with the sentence it comes from
+   as snippet and 1–3 web search queries that would verify it as proposed_queries.
+
+Respond with JSON only, matching this schema:
+{schema}
+
+CONTENT:
+{content}"""
+
+# Pages still being extracted: how many parts there will be isn't known yet
+STREAM_PROMPT = """You are an analyst and fact-check triager reading part {part} of a longer document.
+Given CONTENT below, produce:
+1) TL;DR: 3–5 bullets.
+2) Executive Summary (100–200 words).
+3) Deep Dive: structure, arguments, rhetorical techniques; 3–5 bullets.
+4) Claims: up to {k} checkable factual claims, each with the sentence it comes from
+   as snippet and 1–3 web search queries that would verify it as proposed_queries.
+
+Respond with JSON only, matching this schema:
+{schema}
+
+CONTENT:
+{content}"""
+
+def _complete(prompt: str, **fields):
+    raw = llm_complete(prompt.format(schema=summarizer.schema(DocumentAnalysis), **fields),
+                       response_format=summarizer.JSON_FORMAT, task="analysis")
+    try:
+        return DocumentAnalysis.model_validate_json(raw or "")
+    except (ValidationError, ValueError):
+        return None
+
+def _claims(parsed: DocumentAnalysis, k: int) -> list:
+    return [c.model_dump() for c in parsed.claims if c.text.strip()][:k]
+
+def _chunk(part: int, total: int, content: str, k: int) -> tuple:
+    # total=None when the number of parts isn't known yet (see analyze_pages)
+    if total is None:
+        parsed = _complete(STREAM_PROMPT, part=part, k=k, content=content)
+    else:
+        parsed = _complete(CHUNK_PROMPT, part=part, total=total, k=k, content=content)
+    if parsed is None:
+        # reply didn't validate: this chunk alone goes through the separate prompts
+        summary = (summarizer.complete(summarizer.SEGMENT_PROMPT, content=content) if total is None else
+                   summarizer.complete(summarizer.CHUNK_PROMPT, part=part, total=total, content=content))
+        return summary, claim_extractor.extract_claims(content, k=k)
+    return parsed.model_dump_json(exclude={"claims"}), _claims(parsed, k)
+
+def analyze(content: str, k: int = 8) -> dict:
+    # Summary sections and claims from one structured call, so the document is sent
+    # to the LLM once instead of twice. Long inputs are mapped per chunk (one call
+    # each) and only the partial summaries are reduced. A reply that doesn't match
+    # the schema falls back to the separate summarize/extract prompts.
+    if not needs_chunking(content):
+        parsed = _complete(ANALYSIS_PROMPT, k=k, content=content)
+        if parsed is None:
+            return {"raw": summarizer.summarize(content)["raw"], "claims": claim_extractor.extract_claims(content, k=k)}
+        return {"raw": parsed.model_dump_json(exclude={"claims"}), "claims": _claims(parsed, k)}
+
+    chunks = split_chunks(content)
+    parts = map_chunks(lambda job: _chunk(job[0], len(chunks), job[1], k), list(enumerate(chunks, 1)))
+    return {"raw": summarizer.reduce_partials([p for p, _ in parts]),
+            "claims": claim_extractor.merge_claims([c for _, c in parts], k), "chunks": len(chunks)}
+
+def analyze_pages(pages, k: int = 8) -> dict:
+    # analyze() for text that arrives page by page (PDF extraction): each chunk goes
+    # to the LLM as soon as enough pages for it are in, not after the last page.
+    chunks = iter_chunks(pages)
+    first, second = next(chunks, None), next(chunks, None)
+    if first is None:
+        raise ValueError("No text could be extracted.")
+    if second is None:
+        return analyze(first, k=k)
+    parts = map_stream(lambda job: _chunk(job[0], None, job[1], k), enumerate(chain([first, second], chunks), 1))
+    return {"raw": summarizer.reduce_partials([p for p, _ in parts]),
+            "claims": claim_extractor.merge_claims([c for _, c in parts], k), "chunks": len(parts)}
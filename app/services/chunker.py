@@ -0,0 +1,111 @@
+import contextvars
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ..config import settings
+from ..utils.tokens import estimate_tokens, CHARS_PER_TOKEN
+
+# Lines that start a new caption cue, e.g. "[01:02:03]", "12:34 ", "(1:02:03)"
+_TIMESTAMP = re.compile(r"^\s*[\[(]?\d{1,2}:\d{2}(?::\d{2})?[\])]?\s", re.MULTILINE)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _split_on(pattern, text: str) -> list:
+    starts = [m.start() for m in pattern.finditer(text)]
+    if not starts or starts == [0]:
+        return [text]
+    bounds = ([0] if starts[0] else []) + starts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:]) if text[a:b].strip()]
+
+def _blocks(text: str, max_tokens: int) -> list:
+    # Paragraphs first, then timestamp cues, then sentences, then a hard cut
+    out = []
+    for para in re.split(r"\n\s*\n", text):
+        if not para.strip():
+            continue
+        if estimate_tokens(para) <= max_tokens:
+            out.append(para.strip())
+            continue
+        for cue in _split_on(_TIMESTAMP, para):
+            if estimate_tokens(cue) <= max_tokens:
+                out.append(cue.strip())
+                continue
+            for sent in _SENTENCE.split(cue):
+                step = max_tokens * CHARS_PER_TOKEN
+                out.extend(sent[i:i + step].strip() for i in range(0, len(sent), step) if sent[i:i + step].strip())
+    return out
+
+def iter_chunks(texts, max_tokens: int = None):
+    # Packs the blocks of each text in turn (e.g. pages still being extracted) and
+    # yields every chunk as soon as it is full
+    max_tokens = max_tokens or settings.CHUNK_TOKENS
+    current, used = [], 0
+    for text in texts:
+        for block in _blocks(text or "", max_tokens):
+            cost = estimate_tokens(block) + 1
+            if current and used + cost > max_tokens:
+                yield "\n\n".join(current)
+                current, used = [], 0
+            current.append(block)
+            used += cost
+    if current:
+        yield "\n\n".join(current)
+
+def split_chunks(text: str, max_tokens: int = None) -> list:
+    return list(iter_chunks([text], max_tokens))
+
+def needs_chunking(text: str, max_tokens: int = None) -> bool:
+    return estimate_tokens(text) > (max_tokens or settings.CHUNK_TOKENS)
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=settings.CHUNK_CONCURRENCY, thread_name_prefix="truthlens-chunk")
+    return _pool
+
+def map_chunks(fn, items: list) -> list:
+    # Run fn over items on the shared chunk pool, results in input order. The
+    # caller's context (token usage, cache mode) is carried into each task.
+    futures = [_get_pool().submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [f.result() for f in futures]
+
+def map_stream(fn, items) -> list:
+    # map_chunks over an iterator that is still being produced: each item is
+    # submitted as it arrives, but never more than CHUNK_CONCURRENCY unfinished at
+    # once, so a slow LLM paces the producer instead of items piling up in memory.
+    futures, running = [], set()
+    for item in items:
+        while len(running) >= settings.CHUNK_CONCURRENCY:
+            _, running = wait(running, return_when=FIRST_COMPLETED)
+        f = _get_pool().submit(contextvars.copy_context().run, fn, item)
+        futures.append(f)
+        running.add(f)
+    return [f.result() for f in futures]
+
+def split_segments(text: str, min_tokens: int = None, max_tokens: int = None) -> list:
+    # Content-defined segments for incremental re-analysis. A segment ends after a
+    # paragraph whose own hash hits a fixed pattern (once min_tokens is reached) or
+    # when it would pass max_tokens, so boundaries depend only on nearby content and
+    # an edit changes the segment it lands in (occasionally a neighbour), not every
+    # segment after it.
+    min_tokens = settings.SEGMENT_MIN_TOKENS if min_tokens is None else min_tokens
+    max_tokens = max_tokens or settings.CHUNK_TOKENS
+    segments, current, used = [], [], 0
+    for block in _blocks(text or "", max_tokens):
+        cost = estimate_tokens(block) + 1
+        if current and used + cost > max_tokens:
+            segments.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(block)
+        used += cost
+        if used >= min_tokens and zlib.crc32(block.encode("utf-8")) % 4 == 0:
+            segments.append("\n\n".join(current))
+            current, used = [], 0
+    if current:
+        segments.append("\n\n".join(current))
+    return segments
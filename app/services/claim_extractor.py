@@ -1,7 +1,29 @@
+from itertools import zip_longest
+from ..utils.text import normalize_text
 from .llm import llm_complete
+from .chunker import split_chunks, needs_chunking, map_chunks
 
-def extract_claims(text: str, k: int = 8) -> list:
+def _extract(text: str, k: int) -> list:
     prompt = f"Extract up to {k} factual claims from the following text:\n\n{text}"
-    response = llm_complete(prompt)
+    response = llm_complete(prompt, task="extract")
     return [{"text": "Sample claim", "snippet": "Sample text", "proposed_queries": ["sample search"]}]
 
+def dedupe_claims(claims: list) -> list:
+    seen, out = set(), []
+    for c in claims:
+        key = normalize_text(c.get("text", ""))
+        if key and key not in seen:
+            seen.add(key)
+            out.append(c)
+    return out
+
+def extract_claims(text: str, k: int = 8) -> list:
+    if not needs_chunking(text):
+        return _extract(text, k)
+
+    return merge_claims(map_chunks(lambda chunk: _extract(chunk, k), split_chunks(text)), k)
+
+def merge_claims(per_chunk: list, k: int) -> list:
+    # interleave so the top-k is spread across the whole document, not just its start
+    merged = [c for row in zip_longest(*per_chunk) for c in row if c is not None]
+    return dedupe_claims(merged)[:k]
@@ -0,0 +1,94 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from ..config import settings
+from ..utils.minhash import shingles, near_duplicate
+
+def claim_key(text: str) -> str:
+    # Order-insensitive content words, the same normal form near-duplicate grouping uses
+    return " ".join(sorted(shingles(text)))
+
+class ClaimStore:
+    # Verified claims across documents and days: one row per normalized claim with
+    # its last assessment (verdict, sources, rationale) and when it was made. Reworded
+    # claims with the same content words share a key. An FTS5 index proposes
+    # candidates that differ a little more; they are only reused if they pass the
+    # strict near-duplicate check (every differing word filler) at threshold, since a
+    # wrong match hands one claim another's verdict.
+    def __init__(self, path: str, max_age: float, threshold: float = 0.9, candidates: int = 10):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_age = max_age
+        self.threshold = threshold
+        self.candidates = candidates
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS claims (
+            id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, text TEXT NOT NULL,
+            item TEXT NOT NULL, updated REAL NOT NULL)""")
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS claims_fts USING fts5(key)")
+        self._conn.commit()
+
+    def _find(self, key: str, since: float) -> tuple:
+        row = self._conn.execute("SELECT item, updated FROM claims WHERE key = ? AND updated >= ?",
+                                 (key, since)).fetchone()
+        if row is not None or not key or self.threshold >= 1.0:
+            return row
+        tokens = frozenset(key.split())
+        match = " OR ".join(f'"{t}"' for t in key.split())
+        rows = self._conn.execute(
+            """SELECT c.key, c.item, c.updated FROM claims_fts JOIN claims c ON c.id = claims_fts.rowid
+               WHERE claims_fts MATCH ? AND c.updated >= ? ORDER BY claims_fts.rank LIMIT ?""",
+            (match, since, self.candidates)).fetchall()
+        for other, item, updated in rows:
+            if near_duplicate(tokens, frozenset(other.split()), self.threshold):
+                return item, updated
+        return None
+
+    def lookup(self, texts: list) -> list:
+        # Fresh stored assessment (with "verified_at") for each text, or None
+        since = time.time() - self.max_age
+        out = []
+        with self._lock:
+            for text in texts:
+                row = self._find(claim_key(text), since)
+                out.append(dict(json.loads(row[0]), verified_at=row[1]) if row else None)
+        return out
+
+    def put(self, entries: list):
+        # entries: (claim text, assessment item) pairs, stored in one transaction
+        now = time.time()
+        with self._lock:
+            for text, item in entries:
+                key = claim_key(text)
+                if not key:
+                    continue
+                data = json.dumps(dict(item, duplicate_of=None, verified_at=None))
+                row = self._conn.execute("SELECT id FROM claims WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    rowid = self._conn.execute("INSERT INTO claims (key, text, item, updated) VALUES (?, ?, ?, ?)",
+                                               (key, text, data, now)).lastrowid
+                    self._conn.execute("INSERT INTO claims_fts (rowid, key) VALUES (?, ?)", (rowid, key))
+                else:
+                    self._conn.execute("UPDATE claims SET text = ?, item = ?, updated = ? WHERE id = ?",
+                                       (text, data, now, row[0]))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"claims": self._conn.execute("SELECT COUNT(*) FROM claims").fetchone()[0]}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> ClaimStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ClaimStore(os.path.join(settings.DATA_DIR, "claims.sqlite3"), settings.CLAIM_STORE_MAX_AGE,
+                                    threshold=settings.CLAIM_STORE_MATCH_THRESHOLD)
+    return _store
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from itertools import zip_longest
+from ..config import settings
+from ..utils.text import normalize_text
+from . import chunker, claim_extractor
+
+def segment_hash(segment: str) -> str:
+    return hashlib.sha256(" ".join(segment.split()).encode("utf-8")).hexdigest()
+
+class DocumentStore:
+    # Per document_id: the claims extracted from each segment (by content hash) and
+    # the assessments those claims got, so an edited resubmission only redoes the
+    # segments that changed.
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS segments (
+            document_id TEXT NOT NULL, seg_hash TEXT NOT NULL, data TEXT NOT NULL, updated REAL NOT NULL,
+            PRIMARY KEY (document_id, seg_hash))""")
+        self._conn.commit()
+
+    def get(self, document_id: str) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT seg_hash, data FROM segments WHERE document_id = ?",
+                                      (document_id,)).fetchall()
+        return {h: json.loads(data) for h, data in rows}
+
+    def replace(self, document_id: str, segments: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM segments WHERE document_id = ?", (document_id,))
+            self._conn.executemany("INSERT INTO segments VALUES (?, ?, ?, ?)",
+                                   [(document_id, h, json.dumps(data), now) for h, data in segments.items()])
+            self._conn.commit()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> DocumentStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DocumentStore(os.path.join(settings.DATA_DIR, "documents.sqlite3"))
+    return _store
+
+def extract_incremental(content: str, k: int, document_id: str, reuse: bool = True) -> dict:
+    # Claims per content-defined segment; segments seen in the previous run of this
+    # document reuse their claims, and each reused claim carries its old assessment
+    # under "cached". Returns the top-k claims (interleaved across segments, like the
+    # chunked extractor) plus every segment's claims for save().
+    segments = chunker.split_segments(content)
+    hashes = [segment_hash(s) for s in segments]
+    previous = get_store().get(document_id) if reuse else {}
+    todo = list({h: s for h, s in zip(hashes, segments) if h not in previous}.items())
+    extracted = chunker.map_chunks(lambda seg: claim_extractor.extract_claims(seg, k=k), [s for _, s in todo])
+    per_segment = {h: {"claims": claims} for (h, _), claims in zip(todo, extracted)}
+
+    rows = []
+    for h in dict.fromkeys(hashes):
+        if h in previous:
+            per_segment[h] = {"claims": previous[h]["claims"], "assessments": dict(previous[h].get("assessments", {}))}
+            cached = previous[h].get("assessments", {})
+            rows.append([dict(c, segment=h, cached=cached.get(normalize_text(c.get("text", ""))))
+                         for c in previous[h]["claims"]])
+        else:
+            rows.append([dict(c, segment=h) for c in per_segment[h]["claims"]])
+    merged = [c for row in zip_longest(*rows) for c in row if c is not None]
+    return {"claims": claim_extractor.dedupe_claims(merged)[:k], "segments": per_segment}
+
+def save(document_id: str, segments: dict, claims: list, assessments: list):
+    # Store each segment's claims with the assessments made in this run (skipping
+    # claims whose assessment failed, given as None)
+    for claim, item in zip(claims, assessments):
+        entry = segments.get(claim.get("segment"))
+        if entry is not None and item is not None:
+            entry.setdefault("assessments", {})[normalize_text(claim.get("text", ""))] = dict(item, duplicate_of=None)
+    get_store().replace(document_id, segments)
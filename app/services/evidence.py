@@ -0,0 +1,71 @@
+import math
+from collections import Counter
+from urllib.parse import urlsplit, urlencode, parse_qsl
+from ..config import settings
+from ..utils.minhash import NearDuplicateIndex
+from ..utils.text import content_tokens
+from ..utils.tokens import estimate_tokens, CHARS_PER_TOKEN
+from . import scoring
+
+def canonical_url(url: str) -> str:
+    # Same page under http/https, www., a trailing slash or tracking params counts once
+    parts = urlsplit(url or "")
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+def bm25(query: list, docs: list, k1: float = 1.5, b: float = 0.75) -> list:
+    # Okapi BM25 of each tokenized doc against the query tokens, with the docs themselves as the corpus
+    n = len(docs)
+    if not n:
+        return []
+    avgdl = sum(len(d) for d in docs) / n or 1.0
+    df = Counter(t for d in docs for t in set(d))
+    idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in set(query)}
+    scores = []
+    for d in docs:
+        tf, norm = Counter(d), k1 * (1 - b + b * len(d) / avgdl)
+        scores.append(sum(idf[t] * tf[t] * (k1 + 1) / (tf[t] + norm) for t in idf if tf[t]))
+    return scores
+
+def evidence_text(result: dict) -> str:
+    return f"{result.get('title','')} — {result.get('snippet','')}"
+
+def select_evidence(claim: str, results: list, max_sources: int, token_budget: int = None) -> list:
+    # Drop duplicate pages and near-identical snippets, rank what is left by BM25
+    # relevance to the claim times source trust (search order breaks ties), then
+    # keep the best results that fit the prompt token budget.
+    token_budget = settings.EVIDENCE_TOKEN_BUDGET if token_budget is None else token_budget
+    seen_urls, snippets, candidates = set(), NearDuplicateIndex(settings.EVIDENCE_DUP_THRESHOLD, strict=False), []
+    for r in results:
+        key = canonical_url(r.get("url"))
+        if not r.get("url") or key in seen_urls:
+            continue
+        seen_urls.add(key)
+        if snippets.add(len(candidates), r.get("snippet") or r.get("title") or r.get("url")) != len(candidates):
+            continue
+        candidates.append(r)
+    if not candidates:
+        return []
+
+    relevance = bm25(content_tokens(claim), [content_tokens(evidence_text(r)) for r in candidates])
+    top = max(relevance) or 1.0
+    trust = scoring.trust_weights([r["url"] for r in candidates])
+    # relevance is scaled to [0, 1] and floored so trusted results with no term overlap still rank
+    ranked = sorted(range(len(candidates)), key=lambda i: (-(0.1 + relevance[i] / top) * trust[i], i))
+
+    selected, used = [], 0
+    for i in ranked:
+        if len(selected) >= max_sources:
+            break
+        r, cost = dict(candidates[i], trust_weight=trust[i]), estimate_tokens(evidence_text(candidates[i])) + 5
+        if used + cost > token_budget:
+            room = (token_budget - used - 5) * CHARS_PER_TOKEN - len(r.get("title") or "") - 3
+            if selected or room < 40:
+                continue
+            # the best result alone is over budget: keep a trimmed snippet rather than nothing
+            r["snippet"] = (r.get("snippet") or "")[:room].rstrip() + "…"
+            cost = estimate_tokens(evidence_text(r)) + 5
+        selected.append(r)
+        used += cost
+    return selected
@@ -1,6 +1,90 @@
+import json
+from pydantic import ValidationError
+from ..config import settings
+from ..models.schemas import ClaimVerdictBatch
+from ..utils.tokens import estimate_tokens
 from .llm import llm_complete
 
+BATCH_PROMPT = """You are a fact checker.
+For each CLAIM below, judge how well the numbered SNIPPETS support or contradict it.
+Only use the snippets listed for that claim. Scores are between 0 and 1.
+
+Respond with JSON only, matching this schema:
+{schema}
+
+SNIPPETS:
+{snippets}
+
+CLAIMS:
+{claims}"""
+
 def assess_claim(claim: str, snippets: list) -> dict:
-    prompt = f"Assess the following claim based on these snippets:\nClaim: {claim}\nSnippets:\n" + "\n".join(snippets)
-    response = llm_complete(prompt)
-    return {"support_score": 0.5, "contradiction_score": 0.2, "rationale": "Sample assessment"}
+    # One claim through the same prompt and parser as a batch
+    items = [(claim, list(snippets or []))]
+    raw = llm_complete(_batch_prompt(items, [0]), response_format={"type": "json_object"}, task="assess")
+    return _parse_batch(raw, 1).get(0) or {"rationale": "The assessment could not be parsed."}
+
+def _pack_batches(items: list, token_budget: int, max_claims: int) -> list:
+    # Greedy packing in input order; a snippet shared by several claims is only
+    # counted (and later sent) once per batch.
+    overhead = estimate_tokens(BATCH_PROMPT) + 200
+    batches, current, seen, used = [], [], set(), overhead
+    for idx, (claim, snippets) in enumerate(items):
+        cost = estimate_tokens(claim) + 10 + sum(estimate_tokens(s) + 5 for s in set(snippets) if s not in seen)
+        if current and (used + cost > token_budget or len(current) >= max_claims):
+            batches.append(current)
+            current, seen, used = [], set(), overhead
+            cost = estimate_tokens(claim) + 10 + sum(estimate_tokens(s) + 5 for s in set(snippets))
+        current.append(idx)
+        seen.update(snippets)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _batch_prompt(items: list, batch: list) -> str:
+    snippet_ids, snippet_lines, claim_lines = {}, [], []
+    for n, idx in enumerate(batch, 1):
+        claim, snippets = items[idx]
+        refs = []
+        for s in snippets:
+            if s not in snippet_ids:
+                snippet_ids[s] = f"S{len(snippet_ids) + 1}"
+                snippet_lines.append(f"[{snippet_ids[s]}] {s}")
+            refs.append(snippet_ids[s])
+        claim_lines.append(f"[C{n}] {claim}\n  snippets: {', '.join(refs) or '(none)'}")
+    return BATCH_PROMPT.format(
+        schema=json.dumps(ClaimVerdictBatch.model_json_schema()),
+        snippets="\n".join(snippet_lines) or "(none)",
+        claims="\n".join(claim_lines),
+    )
+
+def _parse_batch(raw: str, size: int) -> dict:
+    try:
+        parsed = ClaimVerdictBatch.model_validate_json(raw or "")
+    except (ValidationError, ValueError):
+        return {}
+    verdicts = {}
+    for v in parsed.assessments:
+        n = v.id.strip().lstrip("Cc")
+        if n.isdigit() and 1 <= int(n) <= size:
+            verdicts[int(n) - 1] = {"support_score": v.support_score,
+                                    "contradiction_score": v.contradiction_score,
+                                    "rationale": v.rationale}
+    return verdicts
+
+def assess_claims(claims_with_snippets: list, token_budget: int = None, max_claims: int = None) -> list:
+    items = [(claim, list(snippets or [])) for claim, snippets in claims_with_snippets]
+    out = [None] * len(items)
+    batches = _pack_batches(items, token_budget or settings.ASSESS_BATCH_TOKENS,
+                            max_claims or settings.ASSESS_BATCH_SIZE)
+    for batch in batches:
+        if len(batch) == 1:
+            out[batch[0]] = assess_claim(*items[batch[0]])
+            continue
+        raw = llm_complete(_batch_prompt(items, batch), response_format={"type": "json_object"}, task="assess")
+        verdicts = _parse_batch(raw, len(batch))
+        for n, idx in enumerate(batch):
+            # malformed or missing entries fall back to a single-claim call
+            out[idx] = verdicts.get(n) or assess_claim(*items[idx])
+    return out
@@ -0,0 +1,205 @@
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from ..config import settings
+from . import pipeline, report, transcript
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+class JobCancelled(Exception):
+    pass
+
+class QueueFull(Exception):
+    pass
+
+class JobStore:
+    # Job rows survive restarts; result/payload are stored as JSON text.
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL,
+            priority INTEGER NOT NULL, status TEXT NOT NULL, created REAL NOT NULL,
+            started REAL, finished REAL, result TEXT, error TEXT)""")
+        self._conn.commit()
+
+    def create(self, kind: str, payload: dict, priority: int) -> dict:
+        job = {"id": uuid.uuid4().hex, "kind": kind, "payload": payload, "priority": priority,
+               "status": "queued", "created": time.time()}
+        with self._lock:
+            self._conn.execute("INSERT INTO jobs (id, kind, payload, priority, status, created) VALUES (?, ?, ?, ?, ?, ?)",
+                               (job["id"], kind, json.dumps(payload), priority, "queued", job["created"]))
+            self._conn.commit()
+        return job
+
+    def update(self, job_id: str, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def transition(self, job_id: str, from_status: str, to_status: str, **fields) -> bool:
+        # Compare-and-set so a cancel and a worker pick-up can't both win
+        cols = ", ".join(f"{k} = ?" for k in ("status", *fields))
+        with self._lock:
+            cur = self._conn.execute(f"UPDATE jobs SET {cols} WHERE id = ? AND status = ?",
+                                     (to_status, *fields.values(), job_id, from_status))
+            self._conn.commit()
+            return cur.rowcount == 1
+
+    def get(self, job_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, payload, priority, status, created, started, finished, result, error FROM jobs WHERE id = ?",
+                (job_id,)).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "kind", "payload", "priority", "status", "created", "started", "finished", "result", "error")
+        job = dict(zip(keys, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def recover(self) -> list:
+        # Anything that was running when the process died goes back in the queue
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = 'queued', started = NULL WHERE status = 'running'")
+            self._conn.commit()
+            return self._conn.execute(
+                "SELECT id, priority FROM jobs WHERE status = 'queued' ORDER BY created").fetchall()
+
+def run_job(kind: str, payload: dict, cancelled: threading.Event) -> dict:
+    timed = None
+    if kind == "youtube":
+        content, video = transcript.fetch_transcript_youtube(payload["url"], cache=payload.get("cache"))
+        timed = video["segments"]
+    elif kind == "web":
+        content = payload.get("extracted_text", "")
+    else:
+        content = payload.get("content", "")
+    content = (content or "").strip()
+    if not content:
+        raise ValueError("No content to analyze.")
+
+    events = pipeline.iter_analysis(content, k=8, cache=payload.get("cache"), document_id=payload.get("document_id"),
+                                    timed=timed)
+    try:
+        for event in events:
+            if cancelled.is_set():
+                raise JobCancelled()
+            if event["event"] == "done":
+                return report.build_result(event["run"], timings=bool(payload.get("timings")))
+    finally:
+        events.close()
+
+class JobQueue:
+    # Bounded priority queue drained by a fixed pool of worker threads. Higher
+    # priority runs first; equal priorities run in submission order. A job cancelled
+    # while queued stops counting at once; its entry is left behind as a tombstone
+    # and skipped when a worker reaches it.
+    def __init__(self, store: JobStore, workers: int, max_queued: int, runner=run_job):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.runner = runner
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._queued = set()  # ids of live (not cancelled) queue entries
+        self._running = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for job_id, priority in self.store.recover():
+            with self._lock:
+                self._queued.add(job_id)
+            self._queue.put((-priority, next(self._seq), job_id))
+        for n in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"truthlens-job-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        # Jobs still running are left as "running" and re-queued by recover() on next start
+        self._stop.set()
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._seq), None))
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def depth(self) -> int:
+        return len(self._queued)
+
+    def submit(self, kind: str, payload: dict, priority: int = 0) -> dict:
+        # check and enqueue as one step, so concurrent submits can't overshoot max_queued
+        with self._lock:
+            if self.depth() >= self.max_queued:
+                raise QueueFull(f"Job queue is full ({self.max_queued} waiting).")
+            job = self.store.create(kind, payload, priority)
+            self._queued.add(job["id"])
+            self._queue.put((-priority, next(self._seq), job["id"]))
+        return job
+
+    def cancel(self, job_id: str) -> dict:
+        if self.store.transition(job_id, "queued", "cancelled", finished=time.time()):
+            with self._lock:
+                self._queued.discard(job_id)
+        else:
+            with self._lock:
+                event = self._running.get(job_id)
+            if event is not None:
+                event.set()
+        return self.store.get(job_id)
+
+    def _work(self):
+        while not self._stop.is_set():
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                if job_id not in self._queued:
+                    continue  # tombstone of a job cancelled while queued
+                self._queued.discard(job_id)
+            if not self.store.transition(job_id, "queued", "running", started=time.time()):
+                continue  # cancelled (or already picked up) while waiting
+            job = self.store.get(job_id)
+            cancelled = threading.Event()
+            with self._lock:
+                self._running[job_id] = cancelled
+            try:
+                result = self.runner(job["kind"], job["payload"], cancelled)
+                self.store.update(job_id, status="done", finished=time.time(), result=result)
+            except JobCancelled:
+                self.store.update(job_id, status="cancelled", finished=time.time())
+            except Exception as e:
+                self.store.update(job_id, status="failed", finished=time.time(), error=str(e))
+            finally:
+                with self._lock:
+                    self._running.pop(job_id, None)
+
+_queue_instance = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> JobQueue:
+    global _queue_instance
+    if _queue_instance is None:
+        with _queue_lock:
+            if _queue_instance is None:
+                _queue_instance = JobQueue(JobStore(os.path.join(settings.DATA_DIR, "jobs.sqlite3")),
+                                           workers=settings.JOB_WORKERS, max_queued=settings.JOB_QUEUE_MAX)
+    return _queue_instance
@@ -0,0 +1,58 @@
+import threading
+from ..config import settings
+from ..utils.rate_limit import TokenBucket, AdaptiveConcurrency, RateLimiter
+
+# YouTube Data API quota cost per call (units, out of a daily budget)
+YOUTUBE_COSTS = {"videos.list": 1, "captions.list": 50}
+
+_limiters = {}
+_custom = {}
+_lock = threading.Lock()
+
+def _bucket(rate: float, per: float):
+    return TokenBucket(rate, per) if rate > 0 else None
+
+def _concurrency(n: int):
+    return AdaptiveConcurrency(n, minimum=1, maximum=n) if n > 0 else None
+
+def _max_wait():
+    return settings.PROVIDER_MAX_WAIT if settings.PROVIDER_MAX_WAIT > 0 else None
+
+def _build(provider: str) -> RateLimiter:
+    if provider == "openai":
+        return RateLimiter(provider, requests=_bucket(settings.OPENAI_RPM, 60.0),
+                           tokens=_bucket(settings.OPENAI_TPM, 60.0),
+                           concurrency=_concurrency(settings.OPENAI_CONCURRENCY), max_wait=_max_wait())
+    if provider == "tavily":
+        return RateLimiter(provider, requests=_bucket(settings.TAVILY_RPM, 60.0),
+                           concurrency=_concurrency(settings.TAVILY_CONCURRENCY), max_wait=_max_wait())
+    if provider == "youtube":
+        return RateLimiter(provider, requests=_bucket(settings.YOUTUBE_QUOTA_PER_DAY, 86400.0),
+                           concurrency=_concurrency(settings.YOUTUBE_CONCURRENCY), max_wait=_max_wait())
+    if provider in _custom:
+        spec = _custom[provider]
+        return RateLimiter(provider, requests=_bucket(spec["rpm"], 60.0), tokens=_bucket(spec["tpm"], 60.0),
+                           concurrency=_concurrency(spec["concurrency"]), max_wait=_max_wait())
+    raise ValueError(f"Unknown provider {provider!r}.")
+
+def register(provider: str, rpm: int = 0, tpm: int = 0, concurrency: int = 0):
+    # Limits for providers configured at runtime (extra LLM backends); 0 disables a limit
+    with _lock:
+        _custom[provider] = {"rpm": rpm, "tpm": tpm, "concurrency": concurrency}
+        _limiters.pop(provider, None)
+
+def get_limiter(provider: str) -> RateLimiter:
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                limiter = _limiters[provider] = _build(provider)
+    return limiter
+
+def reset():
+    with _lock:
+        _limiters.clear()
+
+def stats() -> dict:
+    return {name: limiter.stats() for name, limiter in list(_limiters.items())}
@@ -1,17 +1,422 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from contextvars import ContextVar
 from ..config import settings
-from openai import OpenAI
+from ..utils.lazy import lazy_import
+from ..utils.rate_limit import Throttled
+from ..utils.tokens import estimate_tokens
+from . import llm_cache, llm_router, limits, tracing
 
-def llm_complete(prompt: str, model: str = None) -> str:
+# The SDKs are only imported when the first client is built
+httpx = lazy_import("httpx")
+openai = lazy_import("openai")
+
+class TokenUsage:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+
+    def add(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def add_cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "cache_hits": self.cache_hits,
+            }
+
+# Process-wide totals plus an optional per-request tally (see track_usage).
+usage_totals = TokenUsage()
+_request_usage: ContextVar = ContextVar("truthlens_llm_usage", default=None)
+
+def set_request_usage(usage: TokenUsage):
+    _request_usage.set(usage)
+
+@contextmanager
+def track_usage():
+    usage = TokenUsage()
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+def _record_usage(response):
+    usage = getattr(response, "usage", None)
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    completion = getattr(usage, "completion_tokens", 0) or 0
+    usage_totals.add(prompt, completion)
+    scoped = _request_usage.get()
+    if scoped is not None:
+        scoped.add(prompt, completion)
+
+class LLMClientManager:
+    # One pooled sync client per backend for the whole process and one async client
+    # per backend and event loop (httpx async pools are bound to the loop that created
+    # them). The default OpenAI backend's sync client is kept in _sync.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync = None  # (api_key, client)
+        self._extra = {}  # backend name -> ((base_url, api_key), client)
+        self._async = weakref.WeakKeyDictionary()
+
+    def _client_kwargs(self, api_key: str, base_url: str = None) -> dict:
+        return {
+            "api_key": api_key,
+            "base_url": base_url,
+            "timeout": httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+            "max_retries": 0,  # retries are handled by _should_retry/_backoff below
+        }
+
+    def _limits(self):
+        return httpx.Limits(max_connections=settings.LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE)
+
+    def sync_client(self, backend=None) -> "openai.OpenAI":
+        if backend is not None and not backend.is_default:
+            key = (backend.base_url, backend.api_key())
+            with self._lock:
+                entry = self._extra.get(backend.name)
+                if entry is None or entry[0] != key:
+                    if entry is not None:
+                        entry[1].close()
+                    client = openai.OpenAI(http_client=openai.DefaultHttpxClient(limits=self._limits()),
+                                           **self._client_kwargs(key[1], key[0]))
+                    entry = self._extra[backend.name] = (key, client)
+                return entry[1]
+        api_key = _require_key()
+        entry = self._sync
+        if entry is not None and entry[0] == api_key:
+            return entry[1]
+        with self._lock:
+            if self._sync is None or self._sync[0] != api_key:
+                old = self._sync
+                client = openai.OpenAI(http_client=openai.DefaultHttpxClient(limits=self._limits()),
+                                       **self._client_kwargs(api_key))
+                self._sync = (api_key, client)
+                if old is not None:
+                    old[1].close()
+            return self._sync[1]
+
+    def async_client(self, backend=None) -> "openai.AsyncOpenAI":
+        if backend is None or backend.is_default:
+            name, key = "openai", (None, _require_key())
+        else:
+            name, key = backend.name, (backend.base_url, backend.api_key())
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            per_loop = self._async.setdefault(loop, {})
+            entry = per_loop.get(name)
+            if entry is None or entry[0] != key:
+                client = openai.AsyncOpenAI(http_client=openai.DefaultAsyncHttpxClient(limits=self._limits()),
+                                            **self._client_kwargs(key[1], key[0]))
+                entry = per_loop[name] = (key, client)
+            return entry[1]
+
+    def close(self):
+        with self._lock:
+            if self._sync is not None:
+                self._sync[1].close()
+            for _, client in self._extra.values():
+                client.close()
+            self._sync = None
+            self._extra = {}
+            self._async = weakref.WeakKeyDictionary()
+
+clients = LLMClientManager()
+
+def _require_key() -> str:
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("No OPENAI_API_KEY set. Add it to secrets.toml or environment variables.")
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    model = model or "gpt-3.5-turbo"
+    return settings.OPENAI_API_KEY
+
+def _request(prompt: str, model: str, params: dict) -> dict:
+    req = {
+        "model": model or settings.LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": settings.LLM_MAX_TOKENS,
+    }
+    req.update(params)
+    return req
+
+def _should_retry(e: Exception) -> bool:
+    if isinstance(e, (openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(e, openai.APIStatusError) and e.status_code >= 500
+
+def _is_throttle(e: Exception) -> bool:
+    return isinstance(e, openai.RateLimitError) or (isinstance(e, openai.APIStatusError) and e.status_code == 429)
+
+def _retry_after(e: Exception) -> float:
+    response = getattr(e, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        raise RuntimeError(f"OpenAI API error: {e}")
+        return float(retry_after) if retry_after is not None else None
+    except ValueError:
+        return None
+
+def _backoff(attempt: int, e: Exception) -> float:
+    retry_after = _retry_after(e)
+    if retry_after is not None:
+        return min(retry_after, settings.LLM_BACKOFF_MAX)
+    # full jitter: uniform over [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2 ** attempt))
+
+def _token_cost(req: dict) -> int:
+    # what the request counts against the tokens-per-minute budget: prompt + completion cap
+    return sum(estimate_tokens(m["content"]) for m in req["messages"]) + req.get("max_tokens", 0)
+
+def _cache_lookup(req: dict, cache: str) -> tuple:
+    mode = cache or llm_cache.current_mode()
+    if not settings.LLM_CACHE_ENABLED or mode == "bypass":
+        return None, None
+    key = llm_cache.cache_key(req)
+    return key, (llm_cache.get_cache().get(key) if mode == "use" else None)
+
+def _record_cache_hit():
+    usage_totals.add_cache_hit()
+    scoped = _request_usage.get()
+    if scoped is not None:
+        scoped.add_cache_hit()
+
+def _cache_store(key: str, content: str):
+    if key is not None and content is not None:
+        llm_cache.get_cache().set(key, content)
+
+def _call(backend, req: dict, task: str = None, started: threading.Event = None,
+          cancel: threading.Event = None) -> str:
+    # One backend, with retries/backoff; successful calls feed its latency stats for the task.
+    # started is set when the request goes out (after any rate-limit wait); cancel, see limiter.slot
+    client = clients.sync_client(backend)
+    limiter, cost = limits.get_limiter(backend.limiter_name), _token_cost(req)
+    req = dict(req, model=backend.model) if backend.model else req
+    attempt = 0
+    while True:
+        try:
+            with limiter.slot(tokens=cost, cancel=cancel), tracing.provider_call(backend.name):
+                if started is not None:
+                    started.set()
+                start = time.perf_counter()
+                response = client.chat.completions.create(**req)
+            backend.observe(time.perf_counter() - start, task)
+            _record_usage(response)
+            return response.choices[0].message.content
+        except Throttled:
+            raise  # our own limits are saturated; the route answers 503 with Retry-After
+        except Exception as e:
+            if _is_throttle(e):
+                limiter.throttled(_retry_after(e))
+            if attempt >= settings.LLM_MAX_RETRIES or not _should_retry(e):
+                # a rejected request (4xx) says nothing about the backend's health
+                if _should_retry(e):
+                    backend.failed()
+                raise RuntimeError(f"{_label(backend)} API error: {e}")
+            time.sleep(_backoff(attempt, e))
+            attempt += 1
+
+async def _call_async(backend, req: dict, task: str = None, started: asyncio.Event = None) -> str:
+    client = clients.async_client(backend)
+    limiter, cost = limits.get_limiter(backend.limiter_name), _token_cost(req)
+    req = dict(req, model=backend.model) if backend.model else req
+    attempt = 0
+    while True:
+        try:
+            async with limiter.slot_async(tokens=cost):
+                with tracing.provider_call(backend.name):
+                    if started is not None:
+                        started.set()
+                    start = time.perf_counter()
+                    response = await client.chat.completions.create(**req)
+            backend.observe(time.perf_counter() - start, task)
+            _record_usage(response)
+            return response.choices[0].message.content
+        except Throttled:
+            raise
+        except Exception as e:
+            if _is_throttle(e):
+                limiter.throttled(_retry_after(e))
+            if attempt >= settings.LLM_MAX_RETRIES or not _should_retry(e):
+                # a rejected request (4xx) says nothing about the backend's health
+                if _should_retry(e):
+                    backend.failed()
+                raise RuntimeError(f"{_label(backend)} API error: {e}")
+            await asyncio.sleep(_backoff(attempt, e))
+            attempt += 1
+
+def _label(backend) -> str:
+    return "OpenAI" if backend.is_default else backend.name
+
+_HEDGE_BURST = 5.0  # most hedges the budget can save up
+
+class HedgePool:
+    # Threads for hedged sync calls plus the hedge budget. A call only runs here when
+    # a thread is idle, so it starts at once rather than queueing behind others, and
+    # every hedge-eligible call earns LLM_HEDGE_BUDGET of a hedge: over time at most
+    # that share of calls is sent twice, however slow the backends get.
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.busy = 0
+        self.credit = _HEDGE_BURST
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="truthlens-hedge")
+
+    def earn(self, amount: float = None):
+        with self._lock:
+            self.credit = min(_HEDGE_BURST, self.credit + (settings.LLM_HEDGE_BUDGET if amount is None else amount))
+
+    def spend(self) -> bool:
+        with self._lock:
+            if self.credit < 1:
+                return False
+            self.credit -= 1
+            return True
+
+    def submit(self, backend, req: dict, task: str = None) -> tuple:
+        # (future, started, cancel) for _call on an idle thread, None if all are busy
+        with self._lock:
+            if self.busy >= self.workers:
+                return None
+            self.busy += 1
+        started, cancel = threading.Event(), threading.Event()
+
+        def run():
+            try:
+                return _call(backend, req, task, started=started, cancel=cancel)
+            finally:
+                started.set()
+                with self._lock:
+                    self.busy -= 1
+        return self._executor.submit(contextvars.copy_context().run, run), started, cancel
+
+_hedge_pool = None
+_hedge_lock = threading.Lock()
+
+def hedge_pool() -> HedgePool:
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _hedge_lock:
+            if _hedge_pool is None:
+                _hedge_pool = HedgePool(settings.LLM_HEDGE_WORKERS)
+    return _hedge_pool
+
+def _hedged(router, primary, remaining: list, req: dict, task: str = None) -> str:
+    # Send to primary; if it has been on the wire longer than its p95 for the task, race
+    # the next backend against it and take whichever answers first. Without an idle
+    # hedge thread the call just runs here, unhedged; without budget it isn't hedged.
+    # A sync call that already went out can't be aborted: the loser is told to give up
+    # (see limiter.slot) and otherwise finishes in the background.
+    delay = router.hedge_delay(primary, task) if remaining else None
+    pool = hedge_pool() if delay is not None else None
+    first = pool.submit(primary, req, task) if pool else None
+    if first is None:
+        return _call(primary, req, task)
+    pool.earn()
+    future, started, _ = first
+    started.wait()
+    done, _ = wait([future], timeout=delay)
+    if done or not pool.spend():
+        return future.result()
+    second = pool.submit(remaining[0], req, task)
+    if second is None:
+        pool.earn(1.0)
+        return future.result()
+    primary.hedged()
+    remaining.pop(0)
+    racing = [first, second]
+    error = None
+    while racing:
+        done, _ = wait([f for f, _, _ in racing], return_when=FIRST_COMPLETED)
+        for entry in [e for e in racing if e[0] in done]:
+            racing.remove(entry)
+            if entry[0].exception() is None:
+                for _, _, cancel in racing:
+                    cancel.set()
+                return entry[0].result()
+            error = entry[0].exception()
+    raise error
+
+async def _hedged_async(router, primary, remaining: list, req: dict, task: str = None) -> str:
+    delay = router.hedge_delay(primary, task) if remaining else None
+    if delay is None:
+        return await _call_async(primary, req, task)
+    pool = hedge_pool()
+    pool.earn()
+    started = asyncio.Event()
+    first = asyncio.ensure_future(_call_async(primary, req, task, started=started))
+    waiting = asyncio.ensure_future(started.wait())
+    await asyncio.wait({first, waiting}, return_when=asyncio.FIRST_COMPLETED)
+    waiting.cancel()
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done or not pool.spend():
+        return await first
+    primary.hedged()
+    secondary = remaining.pop(0)
+    racing = {first, asyncio.ensure_future(_call_async(secondary, req, task))}
+    error = None
+    try:
+        while racing:
+            done, racing = await asyncio.wait(racing, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.exception() is None:
+                    return t.result()
+                error = t.exception()
+        raise error
+    finally:
+        for loser in racing:
+            loser.cancel()
+
+def llm_complete(prompt: str, model: str = None, cache: str = None, task: str = None, **params) -> str:
+    # task ("summary", "extract", "assess", ...) picks the route; backends are tried
+    # in route order, with hedging between neighbours, until one answers
+    req = _request(prompt, model, params)
+    key, hit = _cache_lookup(req, cache)
+    if hit is not None:
+        _record_cache_hit()
+        return hit
+    router = llm_router.get_router()
+    remaining, error = router.candidates(task), None
+    while remaining:
+        try:
+            content = _hedged(router, remaining.pop(0), remaining, req, task)
+            _cache_store(key, content)
+            return content
+        except Exception as e:
+            error = e
+    raise error
+
+async def llm_complete_async(prompt: str, model: str = None, cache: str = None, task: str = None, **params) -> str:
+    req = _request(prompt, model, params)
+    key, hit = _cache_lookup(req, cache)
+    if hit is not None:
+        _record_cache_hit()
+        return hit
+    router = llm_router.get_router()
+    remaining, error = router.candidates(task), None
+    while remaining:
+        try:
+            content = await _hedged_async(router, remaining.pop(0), remaining, req, task)
+            _cache_store(key, content)
+            return content
+        except Exception as e:
+            error = e
+    raise error
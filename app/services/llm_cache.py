@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from ..config import settings
+from ..utils.cache import TTLCache
+
+# "use": read and write, "refresh": skip the read but store the fresh answer,
+# "bypass": don't touch the cache at all.
+CACHE_MODES = ("use", "refresh", "bypass")
+_mode: ContextVar = ContextVar("truthlens_llm_cache_mode", default="use")
+
+def _check_mode(mode: str):
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode {mode!r}; expected one of {CACHE_MODES}.")
+
+def set_mode(mode: str):
+    _check_mode(mode)
+    _mode.set(mode)
+
+@contextmanager
+def cache_mode(mode: str):
+    _check_mode(mode)
+    token = _mode.set(mode)
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+def current_mode() -> str:
+    return _mode.get()
+
+def cache_key(request: dict) -> str:
+    # request is the full chat.completions payload: model, messages and generation params
+    blob = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    # In-memory LRU in front of a SQLite table; both tiers expire entries after
+    # ttl seconds and the table is trimmed to max_bytes, least recently used first.
+    def __init__(self, path: str, ttl: float, memory_items: int, max_bytes: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory = TTLCache(maxsize=memory_items, ttl=ttl)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                db.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            db.commit()
+            self.disk_hits += 1
+        self.memory.set(key, row[0], ttl=max(0.0, self.ttl - (now - row[1])))
+        return row[0]
+
+    def set(self, key: str, value: str):
+        self.memory.set(key, value)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                       (key, value, now, now, len(value.encode("utf-8"))))
+            db.commit()
+            self._writes += 1
+            if self._writes % 64 == 1:
+                self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        removed = db.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,)).rowcount
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total > self.max_bytes:
+            # drop the least recently used rows until we are back under budget
+            for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY accessed").fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.memory.pop(key)
+                total -= size
+                removed += 1
+        db.commit()
+        self.evictions += removed
+
+    def clear(self):
+        self.memory.clear()
+        with self._lock:
+            self._db().execute("DELETE FROM llm_cache")
+            self._db().commit()
+
+    def stats(self) -> dict:
+        mem = self.memory.stats()
+        return {
+            "hits": mem["hits"] + self.disk_hits,
+            "memory_hits": mem["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_items": mem["size"],
+            "evictions": self.evictions + mem["evictions"],
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    path=os.path.join(settings.DATA_DIR, "llm_cache.sqlite3"),
+                    ttl=settings.LLM_CACHE_TTL,
+                    memory_items=settings.LLM_CACHE_MEMORY_ITEMS,
+                    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+                )
+    return _cache
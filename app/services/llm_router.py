@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from ..config import settings
+from . import limits
+
+POLICIES = ("ordered", "latency", "cost")
+
+class Backend:
+    # One OpenAI-compatible endpoint: the OpenAI account itself (name "openai", no
+    # base_url), another hosted provider, or a local stand-in server. Keeps an
+    # EWMA and a window of recent latencies per task for routing and hedging
+    # decisions, since a short assess call and a long summary call have very
+    # different normal latencies.
+    def __init__(self, name: str, base_url: str = None, api_key: str = None, api_key_env: str = None,
+                 model: str = None, cost: float = 0.0, rpm: int = 0, tpm: int = 0, concurrency: int = 0):
+        self.name = name
+        self.base_url = base_url
+        self._api_key = api_key
+        self._api_key_env = api_key_env
+        self.model = model
+        self.cost = cost
+        self._lock = threading.Lock()
+        self._latency = {}  # task -> [ewma, window]
+        self.calls = 0
+        self.failures = 0
+        self.hedges = 0
+        self.down_until = 0.0
+        self.limiter_name = "openai" if self.is_default else f"llm:{name}"
+        if not self.is_default:
+            limits.register(self.limiter_name, rpm=rpm, tpm=tpm, concurrency=concurrency)
+
+    @property
+    def is_default(self) -> bool:
+        return self.name == "openai" and not self.base_url
+
+    def api_key(self) -> str:
+        # the default backend uses OPENAI_API_KEY (see llm._require_key)
+        if self._api_key_env:
+            return os.environ.get(self._api_key_env) or self._api_key or "none"
+        # local OpenAI-compatible servers usually ignore the key, but the SDK wants one
+        return self._api_key or "none"
+
+    def observe(self, seconds: float, task: str = None):
+        alpha = settings.LLM_EWMA_ALPHA
+        with self._lock:
+            self.calls += 1
+            stats = self._latency.get(task)
+            if stats is None:
+                stats = self._latency[task] = [None, deque(maxlen=settings.LLM_LATENCY_WINDOW)]
+            stats[1].append(seconds)
+            stats[0] = seconds if stats[0] is None else alpha * seconds + (1 - alpha) * stats[0]
+
+    def ewma(self, task: str = None) -> float:
+        with self._lock:
+            stats = self._latency.get(task)
+            return stats[0] if stats else None
+
+    def failed(self):
+        with self._lock:
+            self.failures += 1
+            self.down_until = time.monotonic() + settings.LLM_BACKEND_COOLDOWN
+
+    def hedged(self):
+        with self._lock:
+            self.hedges += 1
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def p95(self, task: str = None) -> float:
+        # None until there are enough samples of this task to trust the tail
+        with self._lock:
+            stats = self._latency.get(task)
+            if stats is None or len(stats[1]) < settings.LLM_HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(stats[1])
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "calls": self.calls, "failures": self.failures, "hedges": self.hedges,
+                    "ewma_seconds": {task or "default": s[0] for task, s in self._latency.items()},
+                    "available": self.available()}
+
+class Router:
+    # Picks backends per call type ("summary", "extract", "assess", ...). A route
+    # lists the backends a task may use and the policy that orders them:
+    #   ordered  - as configured (first is primary)
+    #   latency  - lowest EWMA latency for the task first (backends without samples go first, to get some)
+    #   cost     - cheapest first, EWMA latency for the task breaks ties
+    # Backends that just failed sit out LLM_BACKEND_COOLDOWN seconds unless nothing else is left.
+    def __init__(self, backends: list, routes: dict = None, policy: str = "ordered"):
+        if not backends:
+            raise ValueError("At least one LLM backend is required.")
+        self.backends = {b.name: b for b in backends}
+        self.routes = {}
+        for task, route in (routes or {}).items():
+            if isinstance(route, list):
+                route = {"backends": route}
+            names = route.get("backends") or list(self.backends)
+            unknown = [n for n in names if n not in self.backends]
+            if unknown:
+                raise ValueError(f"Route {task!r} uses unknown LLM backends: {', '.join(unknown)}.")
+            self.routes[task] = (route.get("policy", policy), names)
+        self.default = (policy, list(self.backends))
+        for p, _ in [self.default, *self.routes.values()]:
+            if p not in POLICIES:
+                raise ValueError(f"Unknown LLM route policy {p!r}.")
+
+    def candidates(self, task: str = None) -> list:
+        policy, names = self.routes.get(task, self.default)
+        backends = [self.backends[n] for n in names]
+        if policy == "latency":
+            backends.sort(key=lambda b: b.ewma(task) or 0.0)
+        elif policy == "cost":
+            backends.sort(key=lambda b: (b.cost, b.ewma(task) or 0.0))
+        up = [b for b in backends if b.available()]
+        return up + [b for b in backends if b not in up]
+
+    def hedge_delay(self, backend: Backend, task: str = None) -> float:
+        # Hedge once the primary is slower than its own p95 for this task (never sooner than LLM_HEDGE_MIN_DELAY)
+        if not settings.LLM_HEDGE_ENABLED:
+            return None
+        p95 = backend.p95(task)
+        return None if p95 is None else max(p95, settings.LLM_HEDGE_MIN_DELAY)
+
+    def stats(self) -> dict:
+        return {name: b.stats() for name, b in self.backends.items()}
+
+def _load(raw: str, default):
+    try:
+        return json.loads(raw) if raw else default
+    except ValueError:
+        raise ValueError(f"Invalid LLM router config: {raw!r}")
+
+def build_router() -> Router:
+    # LLM_BACKENDS is a JSON list of backend specs; empty means OpenAI only, as before.
+    # e.g. [{"name": "openai"}, {"name": "local", "base_url": "http://localhost:8001/v1", "model": "llama3"}]
+    specs = _load(settings.LLM_BACKENDS, [{"name": "openai"}])
+    return Router([Backend(**spec) for spec in specs], _load(settings.LLM_ROUTES, {}), settings.LLM_ROUTE_POLICY)
+
+_router = None
+_router_config = None
+_lock = threading.Lock()
+
+def get_router() -> Router:
+    global _router, _router_config
+    config = (settings.LLM_BACKENDS, settings.LLM_ROUTES, settings.LLM_ROUTE_POLICY)
+    if _router is None or _router_config != config:
+        with _lock:
+            if _router is None or _router_config != config:
+                _router, _router_config = build_router(), config
+    return _router
+
+def reset():
+    global _router, _router_config
+    with _lock:
+        _router, _router_config = None, None
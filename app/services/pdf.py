@@ -0,0 +1,181 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email.message import Message
+from ..config import settings
+from ..utils.lazy import lazy_import
+
+pypdf = lazy_import("pypdf")
+multipart = lazy_import("python_multipart", "multipart")  # python-multipart before 0.0.13 is "multipart"
+
+_HYPHEN_BREAK = re.compile(r"(\w)-\n\s*(\w)")
+_CHUNK_BYTES = 64 * 1024
+
+class PdfError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ProcessPoolExecutor:
+    # Parsing runs in separate processes: pypdf is CPU-bound and a large or hostile
+    # file then costs a worker's memory, not the server's. Spawned rather than
+    # forked, since the server process has threads.
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=settings.PDF_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def _reader(path: str):
+    reader = pypdf.PdfReader(path)
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise ValueError("The PDF is encrypted.")
+    return reader
+
+def _count_pages(path: str) -> int:
+    return len(_reader(path).pages)
+
+def _extract_pages(path: str, start: int, stop: int) -> list:
+    # Runs in a worker: opens the file itself, so only the path crosses processes
+    reader = _reader(path)
+    out = []
+    for i in range(start, stop):
+        try:
+            out.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            out.append("")  # one broken page shouldn't sink the document
+    return out
+
+def normalize_page(text: str) -> str:
+    # Rejoin words hyphenated across lines and unwrap lines, keeping paragraph breaks
+    text = _HYPHEN_BREAK.sub(r"\1\2", (text or "").replace("\x00", "").replace("\r", "\n"))
+    return "\n\n".join(" ".join(p.split()) for p in re.split(r"\n\s*\n", text) if p.strip())
+
+async def receive_upload(request) -> str:
+    # Streams the request body to a temp file under DATA_DIR/uploads and returns its
+    # path. Takes a multipart form (the first file field) or a raw application/pdf
+    # body; nothing beyond one network chunk is held in memory. Over PDF_MAX_BYTES
+    # is rejected as soon as it's seen.
+    limit = settings.PDF_MAX_BYTES
+    try:
+        if int(request.headers.get("content-length") or 0) > limit:
+            raise PdfError(413, f"PDF is larger than {limit} bytes.")
+    except ValueError:
+        pass
+    folder = os.path.join(settings.DATA_DIR, "uploads")
+    os.makedirs(folder, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            content_type = request.headers.get("content-type", "")
+            parser = _multipart_parser(content_type, out) if content_type.startswith("multipart/") else None
+            received = 0
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > limit:
+                    raise PdfError(413, f"PDF is larger than {limit} bytes.")
+                if parser is not None:
+                    parser.write(chunk)
+                else:
+                    out.write(chunk)
+            if parser is not None:
+                parser.finalize()
+        with open(path, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                raise PdfError(400, "Upload a PDF file.")
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+def _header_params(value) -> dict:
+    # Parameters of a Content-Type or Content-Disposition header (boundary, filename, ...)
+    header = Message()
+    header["value"] = value.decode("latin-1") if isinstance(value, bytes) else value
+    return dict(header.get_params(header="value", failobj=[])[1:])
+
+def _multipart_parser(content_type: str, out):
+    # python-multipart's push parser, with only the first file part's bytes written out
+    boundary = _header_params(content_type).get("boundary")
+    if not boundary:
+        raise PdfError(400, "Missing multipart boundary.")
+    state = {"field": b"", "value": b"", "headers": {}, "file": False, "done": False}
+
+    def on_part_begin():
+        state["headers"] = {}
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"], state["value"] = b"", b""
+
+    def on_headers_finished():
+        options = _header_params(state["headers"].get(b"content-disposition", b""))
+        state["file"] = "filename" in options and not state["done"]
+
+    def on_part_data(data, start, end):
+        if state["file"]:
+            out.write(data[start:end])
+
+    def on_part_end():
+        if state["file"]:
+            state["file"], state["done"] = False, True
+
+    return multipart.MultipartParser(boundary.encode("latin-1"), {
+        "on_part_begin": on_part_begin, "on_header_field": on_header_field, "on_header_value": on_header_value,
+        "on_header_end": on_header_end, "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data, "on_part_end": on_part_end})
+
+async def page_count(path: str) -> int:
+    try:
+        pages = await asyncio.wrap_future(get_pool().submit(_count_pages, path))
+    except ImportError:
+        raise PdfError(501, "PDF support needs the pypdf package.")
+    except Exception as e:
+        raise PdfError(400, f"Could not read the PDF: {e}")
+    if pages > settings.PDF_MAX_PAGES:
+        raise PdfError(413, f"PDF has {pages} pages; the limit is {settings.PDF_MAX_PAGES}.")
+    return pages
+
+def iter_pages(path: str, pages: int):
+    # Normalized page texts in order. PDF_PAGES_PER_TASK pages go to a worker at a
+    # time and at most two tasks per worker are outstanding, so extraction runs
+    # ahead of the consumer only by a bounded amount, however long the PDF is.
+    step = max(1, settings.PDF_PAGES_PER_TASK)
+    starts = iter(range(0, pages, step))
+    inflight = deque()
+
+    def submit_next():
+        start = next(starts, None)
+        if start is not None:
+            inflight.append(get_pool().submit(_extract_pages, path, start, min(start + step, pages)))
+
+    try:
+        for _ in range(2 * max(1, settings.PDF_WORKERS)):
+            submit_next()
+        while inflight:
+            texts = inflight.popleft().result()
+            submit_next()
+            for text in texts:
+                text = normalize_page(text)
+                if text:
+                    yield text
+    finally:
+        for f in inflight:
+            f.cancel()
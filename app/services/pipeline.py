@@ -0,0 +1,463 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ..config import settings
+from ..utils.text import normalize_text
+from ..utils.minhash import NearDuplicateIndex, group_near_duplicates
+from . import llm, llm_cache, summarizer, claim_extractor, searcher, fact_checker, evidence as evidence_selection, tracing
+from . import analysis, claim_store, documents, tldw
+
+# Verified claims are written to the claim store in batches of this many
+_STORE_FLUSH = 200
+
+def _hold(since: float) -> float:
+    # Seconds ready claims may still wait for a fuller assess batch (None if none are waiting)
+    return None if since is None else max(0.0, since + settings.ASSESS_MAX_WAIT - time.monotonic())
+
+def _safe(val, default):
+    return val if val is not None else default
+
+def _sources_from_results(claim: str, results: list, max_sources: int) -> tuple:
+    snippets, se_list = [], []
+    for r in evidence_selection.select_evidence(claim, results, max_sources):
+        se_list.append({"url": r["url"], "title": r.get("title"), "snippet": r.get("snippet"), "trust_weight": r["trust_weight"]})
+        snippets.append(evidence_selection.evidence_text(r))
+    return snippets, se_list
+
+def _claim_item(claim: dict, qlist: list, sources: list, assess: dict, duplicate_of: int = None) -> dict:
+    return {
+        "claim": {
+            "text": claim.get("text", ""),
+            "snippet": claim.get("snippet"),
+            "proposed_queries": qlist
+        },
+        "support_score": _safe(assess.get("support_score"), 0.0),
+        "contradiction_score": _safe(assess.get("contradiction_score"), 0.0),
+        "sources": sources,
+        "rationale": assess.get("rationale", ""),
+        "duplicate_of": duplicate_of,
+        "verified_at": assess.get("verified_at"),
+        "timestamp": claim.get("timestamp")
+    }
+
+def _request_context(cache: str = None, trace: tracing.Trace = None) -> tuple:
+    # Request-scoped state (token usage, cache mode, timing trace) lives in a Context
+    # that every worker task runs in a copy of. Unlike a `with` block this keeps
+    # iter_analysis safe to step from different threads, as Starlette does for
+    # streaming responses. A trace already started by the caller (or passed in) is reused.
+    ctx = contextvars.copy_context()
+    usage = llm.TokenUsage()
+    ctx.run(llm.set_request_usage, usage)
+    if cache is not None:
+        ctx.run(llm_cache.set_mode, cache)
+    if trace is not None:
+        ctx.run(tracing.set_trace, trace)
+    trace = ctx.run(tracing.current) or ctx.run(tracing.start_trace)
+    return ctx, usage, trace
+
+def run_analysis(content: str, **options) -> dict:
+    for event in iter_analysis(content, **options):
+        if event["event"] == "done":
+            return event["run"]
+
+def iter_analysis(content: str, k: int = 8, max_queries: int = 3, max_results: int = 3,
+                  max_sources: int = 5, search: bool = True, concurrency: int = None,
+                  batch_size: int = None, strict: bool = True, cache: str = None, document_id: str = None,
+                  timed=None, pages=None, trace: tracing.Trace = None):
+    # Summary and claims come from one structured call (COMBINED_ANALYSIS), or from
+    # two calls side by side when that is off or segments are reused. Every query of
+    # every claim is fanned out at once and claims are assessed as soon as their own searches are
+    # back (in micro-batches of up to batch_size claims per LLM call). Near-duplicate
+    # claims are grouped first: only the first claim of a group is searched and
+    # assessed, and its verdict is copied onto the others (marked duplicate_of).
+    # Results are slotted by index so the final run never depends on completion order.
+    # strict=False collects extraction/search/assessment failures in "errors".
+    # With a document_id, claims come from content-defined segments and segments
+    # unchanged since the last run of that document keep their claims and verdicts.
+    # Claims already verified within CLAIM_STORE_MAX_AGE (in any document) reuse that
+    # verdict; new verdicts with evidence are added to the claim store.
+    # With timed (a YouTube transcript's TimedSegments, whose text is content) the
+    # video is also summarized per time window (TL;DW) and claims get timestamps.
+    # pages (an iterable of page texts, e.g. a PDF still being extracted) replaces
+    # content and is analyzed chunk by chunk as the pages come in.
+    #
+    # Yields, in completion order:
+    #   {"event": "summary", "raw": str}
+    #   {"event": "tldw", "windows": list}   (only with timed)
+    #   {"event": "claims", "count": int}
+    #   {"event": "claim", "index": int, "claim": dict}
+    #   {"event": "done", "run": dict}   (always last)
+    batch_size = settings.ASSESS_BATCH_SIZE if batch_size is None else batch_size
+    ctx, usage, trace = _request_context(cache, trace)
+    errors = []
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency or settings.PIPELINE_CONCURRENCY),
+                              thread_name_prefix="truthlens")
+
+    def submit(stage, fn, *args, **kwargs):
+        return pool.submit(ctx.copy().run, tracing.timed, stage, fn, *args, **kwargs)
+
+    claims_raw, qlists, results, remaining, evidence, claim_assessments = [], [], [], [], [], []
+    pending, ready, unique, slots, group = {}, [], {}, {}, {}
+    ready_since = [None]
+    sum_raw = tldw_windows = None
+    seg_claims, failed, verified = {}, set(), []
+    store_verdicts = settings.CLAIM_STORE_ENABLED and cache != "bypass"
+    reuse_verdicts = store_verdicts and cache in (None, "use")
+
+    def start_assess(i):
+        flat = [r for chunk in results[i] for r in chunk]
+        evidence[i] = _sources_from_results(claims_raw[i].get("text", ""), flat, max_sources)
+        if not ready:
+            ready_since[0] = time.monotonic()
+        ready.append(i)
+
+    def flush_ready():
+        # Wait for a full batch while searches are still landing (for up to ASSESS_MAX_WAIT),
+        # otherwise send what we have
+        searching = any(kind == "search" for kind, _ in pending.values())
+        overdue = _hold(ready_since[0]) == 0
+        while ready and (len(ready) >= batch_size or not searching or overdue):
+            batch = sorted(ready[:max(1, batch_size)])
+            del ready[:len(batch)]
+            if batch_size <= 1:
+                f = submit("assess", fact_checker.assess_claim, claims_raw[batch[0]].get("text", ""), evidence[batch[0]][0])
+            else:
+                f = submit("assess", fact_checker.assess_claims, [(claims_raw[i].get("text", ""), evidence[i][0]) for i in batch])
+            pending[f] = ("assess", batch)
+        if not ready:
+            ready_since[0] = None
+
+    def start_claims(found: list):
+        if timed is not None:
+            found = [dict(c, timestamp=t) for c, t in zip(found, tldw.claim_timestamps(found, timed))]
+        claims_raw[:] = found
+        qlists[:] = [c.get("proposed_queries") or [c.get("text", "")] for c in claims_raw]
+        # Claims carried over from unchanged segments keep their verdict and are not re-checked
+        fresh = [i for i, c in enumerate(claims_raw) if not c.get("cached")]
+        reps = group_near_duplicates([claims_raw[i].get("text", "") for i in fresh], settings.NEAR_DUP_THRESHOLD)
+        for i, rep in zip(fresh, reps):
+            group.setdefault(fresh[rep], []).append(i)
+        claim_assessments[:] = [dict(c["cached"], duplicate_of=None) if c.get("cached") else None for c in claims_raw]
+        # Claims verified recently (in any document) reuse that verdict instead of being searched and assessed
+        if reuse_verdicts and group:
+            known = claim_store.get_store().lookup([claims_raw[i].get("text", "") for i in group])
+            for i, hit in zip(list(group), known):
+                if hit is not None:
+                    for m in group.pop(i):
+                        claim_assessments[m] = _claim_item(claims_raw[m], qlists[m], hit["sources"], hit,
+                                                           duplicate_of=None if m == i else i)
+        results[:] = [[None] * (len(q[:max_queries]) if search and i in group else 0) for i, q in enumerate(qlists)]
+        remaining[:] = [len(r) for r in results]
+        evidence[:] = [None] * len(claims_raw)
+        # Identical / normalized-equal queries across claims go out only once
+        u, s = searcher.dedupe_queries(
+            [(i, j, qlists[i][j]) for i in range(len(qlists)) for j in range(remaining[i])])
+        unique.update(u)
+        slots.update(s)
+        for key, query in unique.items():
+            pending[submit("search", searcher.search_web, query, max_results=max_results)] = ("search", key)
+        for i in range(len(qlists)):
+            if i in group and not remaining[i]:
+                start_assess(i)
+
+    try:
+        # 1) Summary and claims, in one call or in parallel
+        if pages is not None:
+            pending[submit("analyze", analysis.analyze_pages, pages, k=k)] = ("analyze", None)
+        elif settings.COMBINED_ANALYSIS and not document_id:
+            pending[submit("analyze", analysis.analyze, content, k=k)] = ("analyze", None)
+        elif document_id:
+            pending[submit("summarize", summarizer.summarize_segments, content)] = ("summary", None)
+            pending[submit("extract", documents.extract_incremental, content, k=k, document_id=document_id,
+                           reuse=cache in (None, "use"))] = ("extract", None)
+        else:
+            pending[submit("summarize", summarizer.summarize, content)] = ("summary", None)
+            pending[submit("extract", claim_extractor.extract_claims, content, k=k)] = ("extract", None)
+        if timed is not None and settings.TLDW_ENABLED:
+            pending[submit("tldw", tldw.summarize_windows, timed)] = ("tldw", None)
+
+        # 2) Fan out all queries, assess claims once their evidence is in
+        while pending:
+            done, _ = wait(pending, timeout=_hold(ready_since[0]), return_when=FIRST_COMPLETED)
+            for f in done:
+                kind, ref = pending.pop(f)
+                if kind == "summary":
+                    try:
+                        sum_raw = f.result()["raw"]
+                    except Exception as e:
+                        if strict:
+                            raise
+                        errors.append(f"Summary failed: {e}")
+                        sum_raw = ""
+                    yield {"event": "summary", "raw": sum_raw}
+                elif kind == "tldw":
+                    try:
+                        tldw_windows = f.result()
+                    except Exception as e:
+                        if strict:
+                            raise
+                        errors.append(f"TL;DW failed: {e}")
+                        tldw_windows = []
+                    yield {"event": "tldw", "windows": tldw_windows}
+                elif kind in ("extract", "analyze"):
+                    try:
+                        found = f.result() or []
+                    except Exception as e:
+                        if strict:
+                            raise
+                        errors.append(f"Claim extraction failed: {e}")
+                        found = []
+                    if kind == "analyze" and found:
+                        sum_raw, found = found["raw"], found["claims"]
+                        yield {"event": "summary", "raw": sum_raw}
+                    elif isinstance(found, dict):
+                        found, seg_claims = found["claims"], found["segments"]
+                    start_claims(found)
+                    yield {"event": "claims", "count": len(claims_raw)}
+                    for i, item in enumerate(claim_assessments):
+                        if item is not None:
+                            yield {"event": "claim", "index": i, "claim": item}
+                elif kind == "search":
+                    try:
+                        found = f.result() or []
+                    except Exception as e:
+                        found = []
+                        errors.append(f"Search failed for query '{unique[ref]}': {e}")
+                    for ci, qj in slots[ref]:
+                        results[ci][qj] = found
+                        remaining[ci] -= 1
+                        if not remaining[ci]:
+                            start_assess(ci)
+                else:
+                    try:
+                        assessed = f.result()
+                        assessed = [assessed] if isinstance(assessed, dict) else assessed
+                    except Exception as e:
+                        if strict:
+                            raise
+                        assessed = [{"rationale": f"Assessment failed: {e}"}] * len(ref)
+                        failed.update(m for ci in ref for m in group[ci])
+                    for ci, assess in zip(ref, assessed):
+                        for m in group[ci]:
+                            claim_assessments[m] = _claim_item(claims_raw[m], qlists[m], evidence[ci][1], assess,
+                                                               duplicate_of=None if m == ci else ci)
+                            yield {"event": "claim", "index": m, "claim": claim_assessments[m]}
+                        if ci not in failed and evidence[ci][1]:
+                            verified.append((claims_raw[ci].get("text", ""), claim_assessments[ci]))
+            flush_ready()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if verified and store_verdicts:
+        claim_store.get_store().put(verified)
+    if document_id:
+        documents.save(document_id, seg_claims, claims_raw,
+                       [None if i in failed else a for i, a in enumerate(claim_assessments)])
+    global_sources = [s for a in claim_assessments for s in a["sources"]]
+    yield {"event": "done", "run": {"summary_raw": sum_raw, "claims": claim_assessments, "sources": global_sources,
+                                    "errors": errors, "usage": usage.as_dict(), "trace": trace, "tldw": tldw_windows}}
+
+def claim_key(claim: dict) -> str:
+    return normalize_text(claim.get("text", ""))
+
+def iter_batch(docs, k: int = 8, max_queries: int = 3, max_results: int = 3, max_sources: int = 5,
+               search: bool = True, concurrency: int = None, batch_size: int = None, window: int = None,
+               cache: str = None):
+    # Many documents through one shared pool (one global concurrency budget).
+    # Claims are keyed by their normalized text across the whole batch (near-duplicates
+    # share the key of the first one seen), so a claim that shows up in ten documents
+    # is searched and assessed once and its verdict fanned back out. Only `window`
+    # documents are in flight at a time and each is yielded (and dropped) as soon as
+    # it completes. Settled claims are kept for dedup up to BATCH_MAX_CLAIMS, oldest
+    # dropped first, and verdicts go to the claim store every _STORE_FLUSH claims, so
+    # memory stays flat however long the batch is. Fresh verdicts from the claim
+    # store are reused, as in iter_analysis, which also covers dropped claims.
+    # Failures never abort the batch; they land in the document's "errors".
+    #
+    # Yields, in completion order:
+    #   {"event": "document", "index": int, "run": dict}   (same shape as run_analysis)
+    #   {"event": "done", "documents": int, "claims": int, "unique_claims": int, "usage": dict, "timings": dict}
+    batch_size = settings.ASSESS_BATCH_SIZE if batch_size is None else batch_size
+    window = max(1, window or settings.BATCH_WINDOW)
+    ctx, usage, trace = _request_context(cache)
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency or settings.PIPELINE_CONCURRENCY),
+                              thread_name_prefix="truthlens-batch")
+
+    def submit(stage, fn, *args, **kwargs):
+        return pool.submit(ctx.copy().run, tracing.timed, stage, fn, *args, **kwargs)
+
+    queue = iter(enumerate(docs))
+    active, claims, queries, pending, ready, finished = {}, {}, {}, {}, [], []
+    near_dups = NearDuplicateIndex(settings.NEAR_DUP_THRESHOLD)
+    store_verdicts = settings.CLAIM_STORE_ENABLED and cache != "bypass"
+    reuse_verdicts = store_verdicts and cache in (None, "use")
+    verified, ready_since = [], [None]
+    totals = {"documents": 0, "claims": 0, "unique_claims": 0}
+
+    def admit():
+        while len(active) < window:
+            nxt = next(queue, None)
+            if nxt is None:
+                return
+            d, content = nxt
+            active[d] = {"summary": None, "claims": None, "items": [], "open": 0, "errors": [], "first": {}}
+            if settings.COMBINED_ANALYSIS:
+                pending[submit("analyze", analysis.analyze, content, k=k)] = ("analyze", d)
+            else:
+                pending[submit("summarize", summarizer.summarize, content)] = ("summary", d)
+                pending[submit("extract", claim_extractor.extract_claims, content, k=k)] = ("extract", d)
+
+    def maybe_finish(d):
+        st = active[d]
+        if st["summary"] is None or st["claims"] is None or st["open"]:
+            return
+        del active[d]
+        items = st["items"]
+        finished.append({"event": "document", "index": d, "run": {
+            "summary_raw": st["summary"], "claims": items, "sources": [s for a in items for s in a["sources"]],
+            "errors": st["errors"]}})
+
+    def resolve(key, d, i):
+        entry, st = claims[key], active[d]
+        claim, first = st["claims"][i], st["first"][key]
+        st["items"][i] = _claim_item(claim, claim.get("proposed_queries") or [claim.get("text", "")],
+                                     entry["evidence"][1], entry["assess"], duplicate_of=None if first == i else first)
+        st["errors"].extend(entry["errors"])
+        st["open"] -= 1
+
+    def start_assess(key):
+        entry = claims[key]
+        flat = [r for chunk in entry.pop("results") for r in chunk]
+        entry["evidence"] = _sources_from_results(entry["text"], flat, max_sources)
+        if not ready:
+            ready_since[0] = time.monotonic()
+        ready.append(key)
+
+    def start_claim(key, claim):
+        totals["unique_claims"] += 1
+        qlist = claim.get("proposed_queries") or [claim.get("text", "")]
+        hit = claim_store.get_store().lookup([claim.get("text", "")])[0] if reuse_verdicts else None
+        if hit is not None:
+            claims[key] = {"qlist": qlist, "text": claim.get("text", ""), "evidence": (None, hit["sources"]),
+                           "assess": hit, "waiters": [], "errors": []}
+            return
+        qs = qlist[:max_queries] if search else []
+        claims[key] = {"qlist": qlist, "text": claim.get("text", ""), "results": [None] * len(qs),
+                       "remaining": len(qs), "evidence": None, "assess": None, "waiters": [], "errors": []}
+        for j, q in enumerate(qs):
+            # in-flight dedup only; finished queries are answered by the searcher's own cache
+            nq = searcher.normalize_query(q) or q
+            if nq not in queries:
+                queries[nq] = {"query": q, "slots": []}
+                pending[submit("search", searcher.search_web, q, max_results=max_results)] = ("search", nq)
+            queries[nq]["slots"].append((key, j))
+        if not qs:
+            start_assess(key)
+
+    def settle():
+        # Store verdicts so far, and drop the oldest settled claims past BATCH_MAX_CLAIMS
+        # (later repeats of them are answered by the claim store, or checked again)
+        if store_verdicts and len(verified) >= _STORE_FLUSH:
+            claim_store.get_store().put(verified)
+            verified.clear()
+        limit = max(1, settings.BATCH_MAX_CLAIMS)
+        if len(claims) > limit:
+            settled = [key for key, entry in claims.items() if entry["assess"] is not None and not entry["waiters"]]
+            for key in settled[:len(claims) - int(0.9 * limit)]:
+                del claims[key]
+                near_dups.remove(key)
+
+    def flush_ready():
+        searching = any(kind == "search" for kind, _ in pending.values())
+        overdue = _hold(ready_since[0]) == 0
+        while ready and (len(ready) >= batch_size or not searching or overdue):
+            batch = ready[:max(1, batch_size)]
+            del ready[:len(batch)]
+            if batch_size <= 1:
+                f = submit("assess", fact_checker.assess_claim, claims[batch[0]]["text"], claims[batch[0]]["evidence"][0])
+            else:
+                f = submit("assess", fact_checker.assess_claims, [(claims[key]["text"], claims[key]["evidence"][0]) for key in batch])
+            pending[f] = ("assess", batch)
+        if not ready:
+            ready_since[0] = None
+
+    try:
+        admit()
+        while pending:
+            done, _ = wait(pending, timeout=_hold(ready_since[0]), return_when=FIRST_COMPLETED)
+            for f in done:
+                kind, ref = pending.pop(f)
+                if kind == "summary":
+                    try:
+                        active[ref]["summary"] = f.result()["raw"]
+                    except Exception as e:
+                        active[ref]["summary"] = ""
+                        active[ref]["errors"].append(f"Summary failed: {e}")
+                    maybe_finish(ref)
+                elif kind in ("extract", "analyze"):
+                    st = active[ref]
+                    try:
+                        found = f.result() or []
+                    except Exception as e:
+                        st["errors"].append(f"Claim extraction failed: {e}")
+                        found = []
+                    if kind == "analyze":
+                        st["summary"], found = (found["raw"], found["claims"]) if found else ("", [])
+                    st["claims"], st["items"], st["open"] = found, [None] * len(found), len(found)
+                    totals["claims"] += len(found)
+                    for i, claim in enumerate(found):
+                        key = near_dups.add(claim_key(claim) or f"{ref}:{i}", claim.get("text", ""))
+                        st["first"].setdefault(key, i)
+                        if key not in claims:
+                            start_claim(key, claim)
+                        if claims[key]["assess"] is not None:
+                            resolve(key, ref, i)
+                        else:
+                            claims[key]["waiters"].append((ref, i))
+                    maybe_finish(ref)
+                elif kind == "search":
+                    slot = queries.pop(ref)
+                    try:
+                        found = f.result() or []
+                    except Exception as e:
+                        found = []
+                        for key, _ in slot["slots"]:
+                            claims[key]["errors"].append(f"Search failed for query '{slot['query']}': {e}")
+                    for key, j in slot["slots"]:
+                        entry = claims[key]
+                        entry["results"][j] = found
+                        entry["remaining"] -= 1
+                        if not entry["remaining"]:
+                            start_assess(key)
+                else:
+                    try:
+                        assessed = f.result()
+                        assessed = [assessed] if isinstance(assessed, dict) else assessed
+                        ok = True
+                    except Exception as e:
+                        assessed = [{"rationale": f"Assessment failed: {e}"}] * len(ref)
+                        ok = False
+                    for key, assess in zip(ref, assessed):
+                        entry = claims[key]
+                        entry["assess"] = assess or {}
+                        if ok and entry["evidence"][1]:
+                            verified.append((entry["text"], _claim_item({"text": entry["text"]}, entry["qlist"],
+                                                                        entry["evidence"][1], entry["assess"])))
+                        waiters, entry["waiters"] = entry["waiters"], []
+                        for d, i in waiters:
+                            resolve(key, d, i)
+                        for d in {d for d, _ in waiters}:
+                            maybe_finish(d)
+            while finished:
+                totals["documents"] += 1
+                yield finished.pop(0)
+            settle()
+            admit()
+            flush_ready()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if verified and store_verdicts:
+        claim_store.get_store().put(verified)
+    yield {"event": "done", "documents": totals["documents"], "claims": totals["claims"],
+           "unique_claims": totals["unique_claims"], "usage": usage.as_dict(), "timings": trace.as_dict()}
@@ -0,0 +1,111 @@
+import re
+from pydantic import ValidationError
+from ..models.schemas import Summary
+from . import scoring, tracing, tldw as tldw_stage
+
+def parse_sections(sum_raw: str) -> tuple:
+    # Summaries are structured JSON (schemas.Summary); the section regexes only
+    # remain for plain-text replies such as LLM cache entries from older prompts.
+    try:
+        parsed = Summary.model_validate_json(sum_raw or "")
+        return parsed.tldr, parsed.executive_summary, "\n".join(f"- {x}" for x in parsed.deep_dive)
+    except (ValidationError, ValueError):
+        pass
+
+    def section(name: str):
+        m = re.search(rf"{name}\s*:?\s*\n(.+?)(?:\n\n|$)", sum_raw or "", flags=re.IGNORECASE | re.DOTALL)
+        return m.group(1).strip() if m else ""
+
+    tldr = [x.strip("- ").strip() for x in section("TL;DR").split("\n") if x.strip()]
+    return tldr, section("Executive Summary"), section("Deep Dive")
+
+def running_truth_score(claim_assessments: list) -> float:
+    return scoring.aggregate_truth_score([a for a in claim_assessments if a is not None])
+
+def render_markdown(truth: float, stars: float, tldr: list, summary: str, deep: str, claim_assessments: list,
+                    ci: list = None, tldw: list = None) -> str:
+    ci_note = f" (95% CI {ci[0]}–{ci[1]})" if ci else ""
+    tldw_section = ("## TL;DW\n- " + "\n- ".join(tldw) + "\n\n") if tldw else ""
+    return f"""# TruthLens Report
+**Truth Score:** {truth}/100{ci_note}  
+**Stars (Critical Style):** {stars}/5
+
+## TL;DR
+- """ + "\n- ".join(tldr) + f"""
+
+{tldw_section}## Executive Summary
+{summary}
+
+## Deep Dive
+{deep}
+
+## Claims & Evidence
+""" + "\n".join(
+        [f"- **Claim:** {a['claim']['text']}{_at(a)}\n  - Support: {a['support_score']:.2f}, Contra: {a['contradiction_score']:.2f}\n  - Rationale: {a['rationale']}\n  - Sources: " +
+         ", ".join([f"[{s.get('title') or s.get('url')}]({s.get('url')})" for s in a['sources']]) for a in claim_assessments]
+    )
+
+def _at(assessment: dict) -> str:
+    t = assessment.get("timestamp")
+    return f" (at {tldw_stage.clock(t)})" if t is not None else ""
+
+def build_result(run: dict, timings: bool = False) -> dict:
+    # timings=True adds the request's per-stage breakdown to json_report
+    global_sources = run["sources"]
+    trace = run.get("trace")
+    with tracing.using(trace):
+        with tracing.span("scoring"):
+            scored = scoring.truth_score_with_ci(run["claims"])
+        truth = scored["truth_score"]
+        claim_assessments = [dict(a, score=c["score"], confidence_interval=c["ci"])
+                             for a, c in zip(run["claims"], scored["claims"])]
+        stars = scoring.star_rating_from_quality(clarity=0.8, evidence=min(1.0, truth/100.0), bias=0.3)
+        with tracing.span("report"):
+            tldr, summary, deep = parse_sections(run["summary_raw"])
+            tldw = tldw_stage.tldw_lines(run["tldw"]) if run.get("tldw") else None
+            md = render_markdown(truth, stars, tldr, summary, deep, claim_assessments, ci=scored["ci"], tldw=tldw)
+    json_report = {"truth_score_ci": scored["ci"], "usage": run.get("usage")}
+    if timings and trace is not None:
+        json_report["timings"] = trace.as_dict()
+
+    return {
+        "tldr": tldr,
+        "tldw": tldw,
+        "summary": summary,
+        "deep_dive": deep,
+        "claims": claim_assessments,
+        "truth_score": truth,
+        "star_rating": stars,
+        "sources": global_sources[:20],
+        "markdown_report": md,
+        "json_report": json_report
+    }
+
+def stream_events(events, timings: bool = False):
+    # Turn raw pipeline events into the client-facing stream: summary sections,
+    # each finished claim with the running truth score, then the final report.
+    done = []
+    for event in events:
+        kind = event["event"]
+        if kind == "summary":
+            tldr, summary, deep = parse_sections(event["raw"])
+            yield {"event": "summary", "tldr": tldr, "summary": summary, "deep_dive": deep}
+        elif kind == "tldw":
+            yield {"event": "tldw", "tldw": tldw_stage.tldw_lines(event["windows"])}
+        elif kind == "claims":
+            done = [None] * event["count"]
+            yield {"event": "claims", "count": event["count"]}
+        elif kind == "claim":
+            done[event["index"]] = event["claim"]
+            yield {"event": "claim", "index": event["index"], "assessment": event["claim"],
+                   "completed": sum(a is not None for a in done), "truth_score": running_truth_score(done)}
+        elif kind == "done":
+            yield {"event": "report", "result": build_result(event["run"], timings=timings)}
+
+def batch_events(events):
+    # Per-document AnalysisResults from pipeline.iter_batch, as each document completes
+    for event in events:
+        if event["event"] == "document":
+            yield {"event": "document", "index": event["index"], "result": build_result(event["run"])}
+        else:
+            yield event
@@ -1,8 +1,152 @@
+import numpy as np
+from ..config import settings
+from . import trust
+
+# Claims with no sources still count towards the document score, but lightly
+NO_EVIDENCE_WEIGHT = 0.1
+# Upper bound on elements in one bootstrap block (B x rows x cols) to keep memory flat
+_BLOCK_ELEMENTS = 4_000_000
+
 def trust_weight(url: str) -> float:
-    return 0.5
+    return trust.get_index().weight(url)
+
+def trust_weights(urls: list) -> list:
+    return trust.get_index().weights(urls)
+
+def _claim_scores(net: np.ndarray, mean_trust: np.ndarray) -> np.ndarray:
+    # 50 is "no information"; the net verdict moves the score away from it in
+    # proportion to how trustworthy the evidence behind it is.
+    return 50.0 + 50.0 * net * mean_trust
+
+def _claim_weights(mean_trust: np.ndarray, n_sources: np.ndarray) -> np.ndarray:
+    return np.where(n_sources > 0, np.maximum(mean_trust, NO_EVIDENCE_WEIGHT), NO_EVIDENCE_WEIGHT)
+
+def _padded(rows: list, fill=np.nan) -> np.ndarray:
+    width = max((len(r) for r in rows), default=0)
+    out = np.full((len(rows), max(width, 1)), fill, dtype=float)
+    for i, r in enumerate(rows):
+        out[i, :len(r)] = r
+    return out
+
+def _source_replicates(rng, filled: np.ndarray, n_sources: np.ndarray, net: np.ndarray, n_boot: int) -> tuple:
+    # Sources resampled within each claim -> (B, rows) replicate scores and weights
+    width = filled.shape[1]
+    pick = (rng.random((n_boot, n_sources.size, width)) * np.maximum(n_sources, 1)[None, :, None]).astype(int)
+    drawn = np.take_along_axis(np.broadcast_to(filled, pick.shape), pick, axis=2)
+    in_range = np.arange(width)[None, None, :] < n_sources[None, :, None]
+    boot_mean = (drawn * in_range).sum(axis=2) / np.maximum(n_sources, 1)[None, :]
+    return _claim_scores(net[None, :], boot_mean), _claim_weights(boot_mean, n_sources[None, :])
+
+def _blocks(n_rows: int, per_row: int):
+    step = max(1, _BLOCK_ELEMENTS // max(1, per_row))
+    for start in range(0, n_rows, step):
+        yield slice(start, min(n_rows, start + step))
+
+def score_arrays(support, contradiction, trust_matrix, doc_ids, n_docs: int,
+                 n_boot: int = None, ci: float = 0.95, seed: int = None) -> dict:
+    # support, contradiction: (C,) in [0, 1]. trust_matrix: (C, S) source trust
+    # weights, NaN-padded. doc_ids: (C,) document index of each claim.
+    # Two-level bootstrap: sources are resampled within each claim, then claims
+    # within each document, all as array ops over (B, rows, cols) blocks. Blocks
+    # are whole documents, so claim replicates only exist for one block at a time.
+    n_boot = settings.BOOTSTRAP_SAMPLES if n_boot is None else n_boot
+    rng = np.random.default_rng(settings.BOOTSTRAP_SEED if seed is None else seed)
+    lo_q, hi_q = 50 * (1 - ci), 50 * (1 + ci)
+
+    support = np.asarray(support, dtype=float)
+    contradiction = np.asarray(contradiction, dtype=float)
+    trust_matrix = np.atleast_2d(np.asarray(trust_matrix, dtype=float))
+    doc_ids = np.asarray(doc_ids, dtype=int)
+    n_claims, width = trust_matrix.shape if support.size else (0, 1)
+
+    valid = ~np.isnan(trust_matrix)
+    n_sources = valid.sum(axis=1)
+    mean_trust = np.where(n_sources > 0, np.nansum(trust_matrix, axis=1) / np.maximum(n_sources, 1), 0.0)
+    net = np.clip(support - contradiction, -1.0, 1.0)
+    claim_score = _claim_scores(net, mean_trust)
+    claim_weight = _claim_weights(mean_trust, n_sources)
+
+    claim_ci = np.repeat(claim_score[:, None], 2, axis=1)
+    counts = np.bincount(doc_ids, minlength=n_docs) if n_claims else np.zeros(n_docs, dtype=int)
+    order = np.argsort(doc_ids, kind="stable")
+    members = _padded(np.split(order, np.cumsum(counts)[:-1]) if n_docs else [], fill=0).astype(int)
+    doc_score = np.full(n_docs, 50.0)
+    has = counts > 0
+    if has.any():
+        w = np.zeros_like(members, dtype=float)
+        s = np.zeros_like(members, dtype=float)
+        in_doc = np.arange(members.shape[1])[None, :] < counts[:, None]
+        w[in_doc] = claim_weight[members[in_doc]]
+        s[in_doc] = claim_score[members[in_doc]]
+        doc_score[has] = (w * s).sum(axis=1)[has] / w.sum(axis=1)[has]
+    doc_ci = np.repeat(doc_score[:, None], 2, axis=1)
+
+    if has.any() and n_boot:
+        filled = np.nan_to_num(trust_matrix)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        for docs in _blocks(n_docs, n_boot * members.shape[1] * width):
+            m = counts[docs]
+            if not m.any():
+                continue
+            # Level 1 for this block's claims: (B, rows) replicates, rows in doc order
+            rows = order[offsets[docs.start]:offsets[docs.stop]]
+            boot_scores, boot_weights = _source_replicates(rng, filled[rows], n_sources[rows], net[rows], n_boot)
+            claim_ci[rows] = np.percentile(boot_scores, [lo_q, hi_q], axis=0).T
+            # Level 2: resample claims within each document -> (B,) replicates per document
+            local = _padded(np.split(np.arange(rows.size), np.cumsum(m)[:-1]), fill=0).astype(int)
+            depth = local.shape[1]
+            pick = (rng.random((n_boot, m.size, depth)) * np.maximum(m, 1)[None, :, None]).astype(int)
+            claim_idx = np.take_along_axis(np.broadcast_to(local, pick.shape), pick, axis=2)
+            mask = np.arange(depth)[None, None, :] < m[None, :, None]
+            b = np.arange(n_boot)[:, None, None]
+            bw = boot_weights[b, claim_idx] * mask
+            bs = boot_scores[b, claim_idx]
+            reps = (bw * bs).sum(axis=2) / np.where(bw.sum(axis=2) > 0, bw.sum(axis=2), 1.0)
+            block_ci = np.percentile(reps, [lo_q, hi_q], axis=0).T
+            doc_ci[docs] = np.where((m > 0)[:, None], block_ci, doc_ci[docs])
+
+    return {"claim_score": claim_score, "claim_ci": claim_ci, "claim_weight": claim_weight,
+            "doc_score": doc_score, "doc_ci": doc_ci}
+
+def _flatten(docs: list) -> tuple:
+    support, contradiction, trust_rows, doc_ids = [], [], [], []
+    for d, assessments in enumerate(docs):
+        for a in assessments:
+            support.append(float(a.get("support_score") or 0.0))
+            contradiction.append(float(a.get("contradiction_score") or 0.0))
+            trust_rows.append([float(s.get("trust_weight", settings.TRUST_DEFAULT_WEIGHT)) for s in a.get("sources") or []])
+            doc_ids.append(d)
+    return np.array(support), np.array(contradiction), _padded(trust_rows), np.array(doc_ids, dtype=int)
+
+def score_documents(docs: list, n_boot: int = None, ci: float = 0.95, seed: int = None) -> list:
+    # Batch mode: docs is a list of assessment lists; everything is scored in one pass.
+    support, contradiction, trust_matrix, doc_ids = _flatten(docs)
+    out = score_arrays(support, contradiction, trust_matrix, doc_ids, len(docs), n_boot=n_boot, ci=ci, seed=seed)
+    results, offset = [], 0
+    for d, assessments in enumerate(docs):
+        rows = slice(offset, offset + len(assessments))
+        offset += len(assessments)
+        results.append({
+            "truth_score": round(float(out["doc_score"][d]), 1),
+            "ci": [round(float(x), 1) for x in out["doc_ci"][d]],
+            "claims": [{"score": round(float(s), 1), "ci": [round(float(x), 1) for x in c]}
+                       for s, c in zip(out["claim_score"][rows], out["claim_ci"][rows])],
+        })
+    return results
+
+def truth_score_with_ci(assessments: list, **kwargs) -> dict:
+    return score_documents([assessments], **kwargs)[0]
 
 def aggregate_truth_score(assessments: list) -> float:
-    return 50.0
+    if not assessments:
+        return 50.0
+    support, contradiction, trust_matrix, doc_ids = _flatten([assessments])
+    out = score_arrays(support, contradiction, trust_matrix, doc_ids, 1, n_boot=0)
+    return round(float(out["doc_score"][0]), 1)
 
-def star_rating_from_quality(clarity: float, evidence: float, bias: float) -> float:
-    return 3.0
+def star_rating_from_quality(clarity, evidence, bias):
+    # Weighted quality in [0, 1] mapped onto 1-5 stars in half-star steps; works on scalars or arrays.
+    quality = 0.3 * np.asarray(clarity, dtype=float) + 0.5 * np.asarray(evidence, dtype=float) \
+        + 0.2 * (1.0 - np.asarray(bias, dtype=float))
+    stars = np.round((1.0 + 4.0 * np.clip(quality, 0.0, 1.0)) * 2) / 2
+    return float(stars) if stars.ndim == 0 else stars
@@ -1,14 +1,70 @@
 import os
-from tavily import TavilyClient
+import threading
+from ..config import settings
+from ..utils.cache import TTLCache
+from ..utils.text import normalize_text
+from ..utils.lazy import lazy_import
+from ..utils.rate_limit import Throttled
+from . import limits, tracing
+
+tavily = lazy_import("tavily")
+
+_client = None  # (api_key, TavilyClient)
+_client_lock = threading.Lock()
+_cache = None
+
+def _get_client(api_key: str) -> "tavily.TavilyClient":
+    global _client
+    entry = _client
+    if entry is None or entry[0] != api_key:
+        with _client_lock:
+            if _client is None or _client[0] != api_key:
+                _client = (api_key, tavily.TavilyClient(api_key=api_key))
+            entry = _client
+    return entry[1]
+
+def _result_cache() -> TTLCache:
+    global _cache
+    if _cache is None:
+        with _client_lock:
+            if _cache is None:
+                _cache = TTLCache(maxsize=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+    return _cache
+
+def normalize_query(query: str) -> str:
+    return normalize_text(query)
+
+def dedupe_queries(items: list) -> tuple:
+    # items: (claim_idx, query_idx, query). Returns {key: query to send} and
+    # {key: [(claim_idx, query_idx), ...]} so one result can be fanned back out.
+    unique, slots = {}, {}
+    for i, j, q in items:
+        key = normalize_query(q) or q
+        unique.setdefault(key, q)
+        slots.setdefault(key, []).append((i, j))
+    return unique, slots
 
 def search_web(query: str, max_results: int = 3) -> list:
     api_key = os.environ.get("TAVILY_API_KEY")
     if not api_key:
         return [{"url": "https://example.com", "title": "Example Page", "snippet": "Sample result"}]
-    client = TavilyClient(api_key=api_key)
+    key = normalize_query(query)
+    cached = _result_cache().get(key)
+    # a cached search for more results also answers a smaller request
+    if cached is not None and cached[0] >= max_results:
+        return [dict(r) for r in cached[1][:max_results]]
+    client = _get_client(api_key)
+    limiter = limits.get_limiter("tavily")
     try:
-        results = client.search(query, max_results=max_results)
-        return [{"url": r["url"], "title": r["title"], "snippet": r["content"]} for r in results["results"]]
+        with limiter.slot(), tracing.provider_call("tavily"):
+            results = client.search(query, max_results=max_results)
+        out = [{"url": r["url"], "title": r["title"], "snippet": r["content"]} for r in results["results"]]
+        _result_cache().set(key, (max_results, out))
+        return [dict(r) for r in out]
+    except Throttled:
+        raise  # reported as a failed search rather than as a search with no results
     except Exception as e:
+        if isinstance(e, tavily.UsageLimitExceededError):
+            limiter.throttled()
         print(f"Search error: {e}")
         return []
@@ -1,4 +1,10 @@
+import json
+from functools import lru_cache
+from ..models.schemas import Summary
 from .llm import llm_complete
+from .chunker import split_chunks, split_segments, needs_chunking, map_chunks
+
+JSON_FORMAT = {"type": "json_object"}
 
 SUMMARY_PROMPT = """You are an analyst.
 Given CONTENT below, produce:
@@ -6,11 +12,82 @@ Given CONTENT below, produce:
 2) Executive Summary (300–600 words).
 3) Deep Dive: structure, arguments, rhetorical techniques; 5–10 bullets.
 
-Return sections titled exactly: TL;DR, Executive Summary, Deep Dive.
+Respond with JSON only, matching this schema:
+{schema}
+
+CONTENT:
+{content}"""
+
+CHUNK_PROMPT = """You are an analyst reading part {part} of {total} of a longer document.
+Given CONTENT below, produce:
+1) TL;DR: 3–5 bullets.
+2) Executive Summary (100–200 words).
+3) Deep Dive: structure, arguments, rhetorical techniques; 3–5 bullets.
+
+Respond with JSON only, matching this schema:
+{schema}
+
+CONTENT:
+{content}"""
+
+SEGMENT_PROMPT = """You are an analyst reading one section of a longer document.
+Given CONTENT below, produce:
+1) TL;DR: 3–5 bullets.
+2) Executive Summary (100–200 words).
+3) Deep Dive: structure, arguments, rhetorical techniques; 3–5 bullets.
+
+Respond with JSON only, matching this schema:
+{schema}
 
 CONTENT:
 {content}"""
 
+REDUCE_PROMPT = """You are an analyst.
+Below are summaries of consecutive parts of one document, in order.
+Merge them into a single summary of the whole document:
+1) TL;DR: 5–8 bullets, no repeats.
+2) Executive Summary (300–600 words).
+3) Deep Dive: structure, arguments, rhetorical techniques; 5–10 bullets.
+
+Respond with JSON only, matching this schema:
+{schema}
+
+PART SUMMARIES:
+{content}"""
+
+@lru_cache(maxsize=None)
+def schema(model) -> str:
+    return json.dumps(model.model_json_schema())
+
+def complete(prompt: str, **fields) -> str:
+    return llm_complete(prompt.format(schema=schema(Summary), **fields), response_format=JSON_FORMAT, task="summary")
+
+def reduce_partials(partials: list) -> str:
+    joined = "\n\n".join(f"--- Part {i} ---\n{p}" for i, p in enumerate(partials, 1))
+    if len(partials) > 2 and needs_chunking(joined):
+        # too many partials for one prompt: merge neighbours first, then merge those
+        groups = split_chunks("\n\n\n".join(partials))
+        if len(groups) < len(partials):
+            return reduce_partials(map_chunks(lambda g: complete(REDUCE_PROMPT, content=g), groups))
+    return complete(REDUCE_PROMPT, content=joined)
+
 def summarize(content: str) -> dict:
-    out = llm_complete(SUMMARY_PROMPT.format(content=content))
-    return {"raw": out}
+    if not needs_chunking(content):
+        return {"raw": complete(SUMMARY_PROMPT, content=content)}
+
+    # Map: summarize chunks in parallel. Reduce: merge them into one set of sections.
+    chunks = split_chunks(content)
+    partials = map_chunks(lambda job: complete(CHUNK_PROMPT, part=job[0], total=len(chunks), content=job[1]),
+                          list(enumerate(chunks, 1)))
+    return {"raw": reduce_partials(partials), "chunks": len(chunks)}
+
+def summarize_segments(content: str) -> dict:
+    # summarize() for documents resubmitted under a document_id: the map step runs
+    # over content-defined segments with a prompt that doesn't depend on their
+    # position, so after an edit the unchanged segments' partials come from the LLM
+    # cache and only the edited segments and the reduce call reach the model.
+    if not needs_chunking(content):
+        return summarize(content)
+    segments = split_segments(content)
+    partials = map_chunks(lambda seg: complete(SEGMENT_PROMPT, content=seg), segments)
+    return {"raw": reduce_partials(partials), "chunks": len(segments)}
@@ -0,0 +1,82 @@
+from pydantic import ValidationError
+from ..config import settings
+from ..models.schemas import WindowSummary
+from ..utils.text import content_tokens
+from .llm import llm_complete
+from .chunker import map_chunks
+from . import summarizer
+
+WINDOW_PROMPT = """You are an analyst watching a video through its transcript.
+Below is what is said between {start} and {end}.
+TL;DW: 1–3 bullets on what this stretch of the video covers.
+
+Respond with JSON only, matching this schema:
+{schema}
+
+TRANSCRIPT:
+{content}"""
+
+# Fuzzy claim lookup: transcript stretch compared per step, share of claim words it must hold
+_MATCH_SECONDS = 30.0
+_MATCH_MIN_OVERLAP = 0.5
+
+def clock(seconds: float) -> str:
+    m, s = divmod(int(seconds or 0), 60)
+    h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+def _summarize_window(timed, window: tuple) -> dict:
+    i, j = window
+    start, end = float(timed.starts[i]), timed.end(j)
+    raw = llm_complete(WINDOW_PROMPT.format(start=clock(start), end=clock(end), schema=summarizer.schema(WindowSummary),
+                                            content=timed.span_text(i, j)),
+                       response_format=summarizer.JSON_FORMAT, task="summary")
+    try:
+        bullets = WindowSummary.model_validate_json(raw or "").bullets
+    except (ValidationError, ValueError):
+        bullets = [x.strip("- ").strip() for x in (raw or "").split("\n") if x.strip()]
+    return {"start": start, "end": end, "bullets": bullets}
+
+def summarize_windows(timed, seconds: float = None) -> list:
+    # One small call per time window, on the shared chunk pool: each prompt only holds
+    # its own slice of the transcript. Long videos get wider windows so there are at
+    # most TLDW_MAX_WINDOWS of them.
+    if not len(timed):
+        return []
+    seconds = max(seconds or settings.TLDW_WINDOW_SECONDS,
+                  (timed.end() - float(timed.starts[0])) / max(1, settings.TLDW_MAX_WINDOWS))
+    return map_chunks(lambda w: _summarize_window(timed, w), timed.windows(seconds))
+
+def tldw_lines(windows: list) -> list:
+    return [f"[{clock(w['start'])}–{clock(w['end'])}] {b}" for w in windows for b in w["bullets"]]
+
+def claim_timestamps(claims: list, timed) -> list:
+    # Where in the video each claim is made: its quoted snippet (or text) found in the
+    # transcript, else the stretch sharing most of its content words. None if neither.
+    text, lowered, stretches = timed.text, None, None
+    out = []
+    for claim in claims:
+        pos = -1
+        for probe in (claim.get("snippet"), claim.get("text")):
+            probe = (probe or "").strip()
+            if not probe:
+                continue
+            pos = text.find(probe)
+            if pos < 0:
+                lowered = lowered if lowered is not None else text.lower()
+                pos = lowered.find(probe.lower())
+            if pos >= 0:
+                break
+        if pos >= 0:
+            out.append(timed.time_at(pos))
+            continue
+        words = set(content_tokens(claim.get("text", "")))
+        if not words:
+            out.append(None)
+            continue
+        if stretches is None:
+            stretches = [(float(timed.starts[i]), set(content_tokens(timed.span_text(i, j))))
+                         for i, j in timed.windows(_MATCH_SECONDS)]
+        start, best = max(((s, len(words & w)) for s, w in stretches), key=lambda x: x[1], default=(None, 0))
+        out.append(start if best >= _MATCH_MIN_OVERLAP * len(words) else None)
+    return out
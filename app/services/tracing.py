@@ -0,0 +1,134 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from ..config import settings
+from ..utils.metrics import Histogram, sample_lines
+
+STAGE_SECONDS = Histogram("truthlens_stage_seconds", "Time spent per analysis stage.", ("stage",))
+PROVIDER_SECONDS = Histogram("truthlens_provider_seconds", "Latency of upstream provider calls.", ("provider", "outcome"))
+
+_trace: ContextVar = ContextVar("truthlens_trace", default=None)
+
+class Trace:
+    # Per-request timing breakdown: how often each stage ran and for how long.
+    # Stages overlap (they run concurrently), so their totals can exceed the wall time.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            stages = {name: {"count": n, "total_ms": round(total * 1000, 1), "max_ms": round(peak * 1000, 1)}
+                      for name, (n, total, peak) in self.stages.items()}
+        return {"wall_ms": round((time.perf_counter() - self.started) * 1000, 1), "stages": stages}
+
+def current() -> Trace:
+    return _trace.get()
+
+def set_trace(trace: Trace):
+    _trace.set(trace)
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _trace.set(trace)
+    return trace
+
+@contextmanager
+def using(trace: Trace):
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+def record(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+@contextmanager
+def span(stage: str):
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+def timed(stage: str, fn, *args, **kwargs):
+    if not settings.METRICS_ENABLED:
+        return fn(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        record(stage, time.perf_counter() - start)
+
+@contextmanager
+def provider_call(provider: str):
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start, outcome = time.perf_counter(), "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        PROVIDER_SECONDS.observe(time.perf_counter() - start, provider, outcome)
+
+def render() -> str:
+    # Prometheus text exposition; counters kept by other modules are read at scrape time
+    from . import admission, llm, llm_cache, llm_router, limits, jobs
+    usage = llm.usage_totals.as_dict()
+    lines = STAGE_SECONDS.render() + PROVIDER_SECONDS.render()
+    lines += sample_lines("truthlens_llm_calls_total", "LLM completions requested upstream.", "counter",
+                          [((), usage["calls"])])
+    lines += sample_lines("truthlens_llm_tokens_total", "LLM tokens used.", "counter",
+                          [(("prompt",), usage["prompt_tokens"]), (("completion",), usage["completion_tokens"])],
+                          labels=("kind",))
+    lines += sample_lines("truthlens_llm_cache_hits_total", "LLM calls answered from the cache.", "counter",
+                          [((), usage["cache_hits"])])
+    if llm_cache._cache is not None:
+        cache = llm_cache._cache.stats()
+        lines += sample_lines("truthlens_llm_cache_lookups_total", "LLM cache lookups by result.", "counter",
+                              [(("memory_hit",), cache["memory_hits"]), (("disk_hit",), cache["disk_hits"]),
+                               (("miss",), cache["misses"])], labels=("result",))
+    limiter_stats = [s for s in limits.stats().values() if "limit" in s]
+    lines += sample_lines("truthlens_provider_concurrency_limit", "Current adaptive concurrency limit.", "gauge",
+                          [((s["name"],), s["limit"]) for s in limiter_stats], labels=("provider",))
+    lines += sample_lines("truthlens_provider_in_flight", "Provider calls in flight.", "gauge",
+                          [((s["name"],), s["in_flight"]) for s in limiter_stats], labels=("provider",))
+    if llm_router._router is not None:
+        backends = llm_router._router.stats().values()
+        lines += sample_lines("truthlens_llm_backend_latency_ewma_seconds", "EWMA latency per LLM backend and task.",
+                              "gauge", [((b["name"], task), ewma) for b in backends
+                                        for task, ewma in b["ewma_seconds"].items() if ewma is not None],
+                              labels=("backend", "task"))
+        lines += sample_lines("truthlens_llm_hedged_requests_total", "LLM requests hedged to another backend.", "counter",
+                              [((b["name"],), b["hedges"]) for b in backends], labels=("backend",))
+    if admission._controller is not None:
+        adm = admission._controller.stats()
+        lines += sample_lines("truthlens_admission_queue_depth", "Requests waiting for admission.", "gauge",
+                              [((), adm["queue_depth"])])
+        lines += sample_lines("truthlens_admission_in_flight_cost", "Estimated cost of admitted requests in flight.",
+                              "gauge", [((), adm["in_flight_cost"])])
+        lines += sample_lines("truthlens_admission_admitted_total", "Requests admitted.", "counter",
+                              [((), adm["admitted"])])
+        lines += sample_lines("truthlens_admission_shed_total", "Requests rejected by admission control.", "counter",
+                              [((reason,), n) for reason, n in adm["shed"].items()], labels=("reason",))
+    if jobs._queue_instance is not None:
+        lines += sample_lines("truthlens_job_queue_depth", "Background jobs waiting to run.", "gauge",
+                              [((), jobs._queue_instance.depth())])
+    return "\n".join(lines) + "\n"
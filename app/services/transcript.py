@@ -1,28 +1,141 @@
+import json
 import os
 import re
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import sqlite3
+import threading
+import time
+from ..config import settings
+from ..utils.lazy import lazy_import
+from ..utils.singleflight import SingleFlight
+from ..utils.timed_segments import TimedSegments
+from . import limits, tracing
 
-def fetch_transcript_youtube(url: str) -> tuple:
-    api_key = os.environ.get("YT_API_KEY")
-    if not api_key:
-        raise ValueError("YouTube API key is missing. Add it to secrets.toml or environment variables.")
+discovery = lazy_import("googleapiclient.discovery")
+google_errors = lazy_import("googleapiclient.errors")
+youtube_transcript_api = lazy_import("youtube_transcript_api")
+
+_service = None  # (api_key, youtube service)
+_service_lock = threading.Lock()
+_store = None
+_flights = SingleFlight()
+
+def build(*args, **kwargs):
+    return discovery.build(*args, **kwargs)
+
+def _youtube(api_key: str):
+    # The discovery build is slow, so one service object is shared across requests
+    global _service
+    entry = _service
+    if entry is None or entry[0] != api_key:
+        with _service_lock:
+            if _service is None or _service[0] != api_key:
+                _service = (api_key, build("youtube", "v3", developerKey=api_key, cache_discovery=False))
+            entry = _service
+    return entry[1]
+
+def video_id_from_url(url: str) -> str:
     match = re.search(r"(?:v=|youtu\.be/)([\w-]{11})", url)
     if not match:
         raise ValueError("Invalid YouTube URL.")
-    video_id = match.group(1)
-    youtube = build("youtube", "v3", developerKey=api_key)
+    return match.group(1)
+
+class TranscriptStore:
+    # Title, caption tracks and timed segments (compact TimedSegments form) per
+    # video_id; rows older than ttl are refetched.
+    def __init__(self, path: str, ttl: float):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS transcripts (
+            video_id TEXT PRIMARY KEY, data TEXT NOT NULL, fetched REAL NOT NULL)""")
+        self._conn.commit()
+
+    def get(self, video_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT data, fetched FROM transcripts WHERE video_id = ?", (video_id,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        data = json.loads(row[0])
+        data["segments"] = TimedSegments.from_dict(data["segments"])
+        return data
+
+    def put(self, video_id: str, data: dict):
+        row = json.dumps(dict(data, segments=data["segments"].to_dict()))
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?)",
+                               (video_id, row, time.time()))
+            self._conn.commit()
+
+    def delete(self, video_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+
+def get_store() -> TranscriptStore:
+    global _store
+    if _store is None:
+        with _service_lock:
+            if _store is None:
+                _store = TranscriptStore(os.path.join(settings.DATA_DIR, "transcripts.sqlite3"),
+                                         ttl=settings.TRANSCRIPT_CACHE_TTL)
+    return _store
+
+def _fetch_segments(video_id: str, language: str) -> list:
+    segments = youtube_transcript_api.YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+    return [{"text": s["text"], "start": s["start"], "duration": s.get("duration", 0.0)} for s in segments]
+
+def _fetch_video(video_id: str, api_key: str, store: bool = True) -> dict:
+    youtube = _youtube(api_key)
+    limiter = limits.get_limiter("youtube")
     try:
-        video_response = youtube.videos().list(part="snippet", id=video_id).execute()
-        video_title = video_response["items"][0]["snippet"]["title"] if video_response["items"] else "Unknown Video"
-        captions = youtube.captions().list(part="snippet", videoId=video_id).execute()
-        caption_id = None
-        for item in captions.get("items", []):
-            if item["snippet"]["language"] == "en":
-                caption_id = item["id"]
-                break
-        if not caption_id:
-            raise ValueError("No English captions found.")
-        return "Sample YouTube transcript", {"title": video_title}
-    except HttpError as e:
+        with limiter.slot(cost=limits.YOUTUBE_COSTS["videos.list"]), tracing.provider_call("youtube"):
+            video_response = youtube.videos().list(part="snippet", id=video_id).execute()
+        with limiter.slot(cost=limits.YOUTUBE_COSTS["captions.list"]), tracing.provider_call("youtube"):
+            captions = youtube.captions().list(part="snippet", videoId=video_id).execute()
+    except google_errors.HttpError as e:
+        if e.resp.status in (403, 429):  # quotaExceeded / rateLimitExceeded
+            limiter.throttled()
         raise Exception(f"YouTube API error: {e}")
+    video = {
+        "video_id": video_id,
+        "title": video_response["items"][0]["snippet"]["title"] if video_response["items"] else "Unknown Video",
+        "captions": [{"id": item["id"], "language": item["snippet"]["language"],
+                      "name": item["snippet"].get("name", ""), "kind": item["snippet"].get("trackKind", "")}
+                     for item in captions.get("items", [])],
+        "segments": TimedSegments.from_list([]),
+    }
+    if any(c["language"] == "en" for c in video["captions"]):
+        try:
+            with tracing.provider_call("youtube_transcript"):
+                video["segments"] = TimedSegments.from_list(_fetch_segments(video_id, "en"))
+        except Exception as e:
+            # transient transcript failures are returned but not stored
+            print(f"Transcript error: {e}")
+            return video
+    if store:
+        get_store().put(video_id, video)
+    return video
+
+def get_video(video_id: str, api_key: str, cache: str = None) -> dict:
+    # cache: "use" (default) reads and writes the store, "refresh" only writes, "bypass" neither
+    if cache in (None, "use"):
+        video = get_store().get(video_id)
+        if video is not None:
+            return video
+    # Concurrent requests for the same video share one upstream fetch
+    store = cache != "bypass"
+    return _flights.do((video_id, store), lambda: _fetch_video(video_id, api_key, store=store))
+
+def fetch_transcript_youtube(url: str, cache: str = None) -> tuple:
+    api_key = os.environ.get("YT_API_KEY")
+    if not api_key:
+        raise ValueError("YouTube API key is missing. Add it to secrets.toml or environment variables.")
+    with tracing.span("transcript"):
+        video = get_video(video_id_from_url(url), api_key, cache=cache)
+    if not any(c["language"] == "en" for c in video["captions"]):
+        raise ValueError("No English captions found.")
+    # video["segments"] is a TimedSegments whose text is the transcript
+    return video["segments"].text, video
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from ..config import settings
+
+_MEMO_MAX = 65536
+
+def load_table(path: str) -> dict:
+    table = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            domain, _, weight = line.partition(",")
+            table[domain.strip().lower().strip(".")] = max(0.0, min(1.0, float(weight)))
+    return table
+
+def host_of(url: str) -> str:
+    # Plain string slicing; much cheaper than urllib.parse on the hot path
+    rest = url.partition("://")[2] or url
+    rest = rest.partition("/")[0].partition("?")[0].partition("#")[0]
+    if "@" in rest:
+        rest = rest.rpartition("@")[2]
+    if rest.startswith("["):
+        return rest
+    return rest.partition(":")[0].lower().rstrip(".")
+
+class DomainTrustIndex:
+    # Reversed-label suffix trie: "news.example.co.uk" is stored under
+    # uk -> co -> example -> news, so resolving a host is one dict step per label
+    # and the deepest weight seen on the way down is the most specific match.
+    # Resolved urls are memoized.
+    def __init__(self, table: dict, default: float = 0.5):
+        self.default = default
+        self.size = len(table)
+        self._trie = {}
+        for domain, weight in table.items():
+            node = self._trie
+            for label in reversed(domain.split(".")):
+                node = node.setdefault(label, {})
+            node[None] = weight
+        self._memo = {}
+
+    def lookup_host(self, host: str) -> float:
+        node, best = self._trie, self.default
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            best = node.get(None, best)
+        return best
+
+    def weight(self, url: str) -> float:
+        w = self._memo.get(url)
+        if w is None:
+            if len(self._memo) >= _MEMO_MAX:
+                self._memo.clear()
+            w = self._memo[url] = self.lookup_host(host_of(url or ""))
+        return w
+
+    def weights(self, urls) -> list:
+        memo, lookup = self._memo, self.weight
+        return [memo.get(u) or lookup(u) for u in urls]
+
+_index = None
+_index_mtime = None
+_next_check = 0.0
+_lock = threading.Lock()
+
+def table_path() -> str:
+    return settings.TRUST_TABLE_PATH or os.path.join(settings.DATA_DIR, "domain_trust.csv")
+
+def reload_index() -> DomainTrustIndex:
+    global _index, _index_mtime, _next_check
+    path = table_path()
+    with _lock:
+        try:
+            mtime = os.path.getmtime(path)
+            table = load_table(path)
+        except (OSError, ValueError):
+            # keep serving the last good table (or an empty one) if the file is missing/broken
+            if _index is not None:
+                return _index
+            mtime, table = None, {}
+        _index = DomainTrustIndex(table, default=settings.TRUST_DEFAULT_WEIGHT)
+        _index_mtime = mtime
+        _next_check = time.monotonic() + settings.TRUST_RELOAD_INTERVAL
+        return _index
+
+def get_index() -> DomainTrustIndex:
+    # Hot reload: at most every TRUST_RELOAD_INTERVAL seconds, stat the table and
+    # swap in a freshly compiled index if it changed. Readers never block.
+    global _next_check
+    now = time.monotonic()
+    if _index is None:
+        return reload_index()
+    if now >= _next_check:
+        _next_check = now + settings.TRUST_RELOAD_INTERVAL
+        try:
+            changed = os.path.getmtime(table_path()) != _index_mtime
+        except OSError:
+            changed = False
+        if changed:
+            return reload_index()
+    return _index
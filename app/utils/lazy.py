@@ -0,0 +1,36 @@
+import importlib
+import threading
+
+_lock = threading.Lock()
+
+class LazyModule:
+    # Stand-in for a heavy module that is only imported on first attribute access.
+    # fallbacks are tried in order if name can't be imported (a package's older name).
+    def __init__(self, name: str, fallbacks: tuple = ()):
+        self._name = name
+        self._fallbacks = fallbacks
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    *first, last = (self._name, *self._fallbacks)
+                    for name in first:
+                        try:
+                            self._module = importlib.import_module(name)
+                            return self._module
+                        except ImportError:
+                            pass
+                    self._module = importlib.import_module(last)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name: str, *fallbacks: str) -> LazyModule:
+    return LazyModule(name, fallbacks)
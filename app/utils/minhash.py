@@ -0,0 +1,127 @@
+import zlib
+import numpy as np
+from .text import content_tokens
+
+NEGATIONS = frozenset(("not", "no", "never", "nor", "without", "t"))  # "don't" normalizes to "don t"
+# Words two claims may differ by and still say the same thing (after inflection folding)
+FILLER = frozenset(("also", "reportedly", "about", "around", "approximately", "roughly", "nearly", "say", "said",
+                    "according", "claim"))
+
+BANDS, ROWS = 22, 3  # 66 hash functions; pairs with Jaccard >= 0.6 become candidates ~99% of the time
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, _PRIME, BANDS * ROWS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, BANDS * ROWS, dtype=np.uint64)
+
+def _fold(token: str) -> str:
+    # Light inflection folding: "claims", "claimed", "claiming" -> "claim"
+    if token.isdigit() or token.endswith("ss"):
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    for suffix in ("ing", "ed", "s"):
+        if token.endswith(suffix) and len(token) > len(suffix) + 2:
+            return token[:-len(suffix)]
+    return token
+
+def shingles(text: str) -> frozenset:
+    return frozenset(_fold(t) for t in content_tokens(text))
+
+def _guard(tokens: frozenset) -> tuple:
+    # Claims only merge if they state the same numbers with the same polarity
+    return (frozenset(t for t in tokens if t.isdigit()), len(tokens & NEGATIONS) % 2)
+
+def signatures(token_sets: list) -> np.ndarray:
+    # One MinHash row per (non-empty) token set, computed for all of them at once
+    sizes = np.fromiter((len(t) for t in token_sets), dtype=np.int64, count=len(token_sets))
+    x = np.fromiter((zlib.crc32(t.encode("utf-8")) for ts in token_sets for t in ts), dtype=np.uint64,
+                    count=int(sizes.sum()))
+    hashed = (x[:, None] * _A[None, :] + _B[None, :]) % _PRIME
+    return np.minimum.reduceat(hashed, np.concatenate(([0], np.cumsum(sizes)[:-1])), axis=0)
+
+def band_keys(sigs: np.ndarray) -> list:
+    # Fold each band's ROWS hashes into one integer (wrapping is fine: a collision
+    # only adds a candidate, and candidates are verified exactly)
+    bands = sigs.reshape(len(sigs), BANDS, ROWS)
+    keys = np.zeros(bands.shape[:2], dtype=np.uint64)
+    for r in range(ROWS):
+        keys = keys * np.uint64(_PRIME) + bands[:, :, r]
+    return keys.tolist()
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def _similar(a: frozenset, b: frozenset, threshold: float, strict: bool) -> bool:
+    # strict: every word in one but not the other must be filler, so claims that
+    # differ in an entity ("Biden"/"Trump won Pennsylvania") never merge
+    return (not strict or (a ^ b) <= FILLER) and jaccard(a, b) >= threshold
+
+def near_duplicate(a: frozenset, b: frozenset, threshold: float = 0.8, strict: bool = True) -> bool:
+    return _guard(a) == _guard(b) and _similar(a, b, threshold, strict)
+
+class NearDuplicateIndex:
+    # Incremental MinHash-LSH. add() returns the key of an earlier near-duplicate
+    # (exact Jaccard over content words >= threshold, same numbers and negation and,
+    # when strict, no differing word beyond FILLER), or registers the text under its
+    # own key. LSH only proposes candidates. strict=False suits texts such as
+    # evidence snippets, where merging two that differ in a word only loses a repeat.
+    def __init__(self, threshold: float = 0.8, strict: bool = True):
+        self.threshold = threshold
+        self.strict = strict
+        self._exact = {}  # normalized text -> key it resolved to
+        self._norms = {}  # key -> normalized texts resolved to it
+        self._buckets = [{} for _ in range(BANDS)]
+        self._entries = {}  # key -> (tokens, guard, band keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key, text: str, tokens: frozenset = None, keys: list = None):
+        tokens = shingles(text) if tokens is None else tokens
+        norm = " ".join(sorted(tokens))
+        if norm in self._exact:
+            return self._exact[norm]
+        found = key
+        if tokens and self.threshold < 1.0:
+            guard = _guard(tokens)
+            keys = band_keys(signatures([tokens]))[0] if keys is None else keys
+            found = self._match(tokens, guard, keys)
+            if found is None:
+                found = key
+                self._entries[key] = (tokens, guard, keys)
+                for bucket, k in zip(self._buckets, keys):
+                    bucket.setdefault(k, []).append(key)
+        self._exact[norm] = found
+        self._norms.setdefault(found, []).append(norm)
+        return found
+
+    def _match(self, tokens: frozenset, guard: tuple, keys: list):
+        seen = set()
+        for bucket, k in zip(self._buckets, keys):
+            for other in bucket.get(k, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                other_tokens, other_guard, _ = self._entries[other]
+                if other_guard == guard and _similar(tokens, other_tokens, self.threshold, self.strict):
+                    return other
+        return None
+
+    def remove(self, key):
+        # Forget key and every text that resolved to it
+        for norm in self._norms.pop(key, ()):
+            del self._exact[norm]
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for bucket, k in zip(self._buckets, entry[2]):
+                bucket[k].remove(key)
+                if not bucket[k]:
+                    del bucket[k]
+
+def group_near_duplicates(texts: list, threshold: float = 0.8) -> list:
+    # For each text, the index of the first text it duplicates (itself if none)
+    index = NearDuplicateIndex(threshold)
+    tokens = [shingles(t) for t in texts]
+    nonempty = [i for i, t in enumerate(tokens) if t]
+    keys = dict(zip(nonempty, band_keys(signatures([tokens[i] for i in nonempty])))) if nonempty else {}
+    return [index.add(i, t, tokens=tokens[i], keys=keys.get(i)) for i, t in enumerate(texts)]
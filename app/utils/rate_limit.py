@@ -1,20 +1,254 @@
+import asyncio
+import threading
 import time
 from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+
+class Cancelled(Exception):
+    # The caller gave up on a call before it was sent (see RateLimiter.slot)
+    pass
+
+class Throttled(Exception):
+    # A provider's limits would hold the call longer than max_wait; retry_after is the wait in seconds
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is rate limited, try again in {retry_after:.0f}s.")
+        self.name = name
+        self.retry_after = retry_after
 
 class TokenBucket:
-    def __init__(self, rate: int, per_seconds: int):
-        self.capacity = rate
-        self.tokens = rate
+    # Thread-safe token bucket. acquire() reserves tokens up front (the balance may
+    # go negative) and returns how long the caller has to wait for them, so the lock
+    # is only held for arithmetic and the same bucket paces threads and coroutines.
+    def __init__(self, rate: float, per_seconds: float, capacity: float = None):
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
         self.per = per_seconds
-        self.queue = deque()
-        self.last = time.time()
+        self.fill_rate = rate / per_seconds
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
 
-    def allow(self) -> bool:
-        now = time.time()
-        elapsed = now - self.last
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.fill_rate)
         self.last = now
-        self.tokens = min(self.capacity, self.tokens + elapsed * (self.capacity / self.per))
-        if self.tokens >= 1:
-            self.tokens -= 1
+
+    def allow(self, n: float = 1) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+
+    def reserve(self, n: float = 1) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= n
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.fill_rate
+
+    def refund(self, n: float = 1):
+        # Give back a reservation that won't be used
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + n)
+
+    def wait_time(self, n: float = 1) -> float:
+        # Seconds until n tokens would be available, without taking any
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (n - self.tokens) / self.fill_rate)
+
+    def penalize(self, seconds: float):
+        # Push everyone back, e.g. when the provider answers with Retry-After
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.fill_rate
+
+    def acquire(self, n: float = 1):
+        delay = self.reserve(n)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, n: float = 1):
+        delay = self.reserve(n)
+        if delay:
+            await asyncio.sleep(delay)
+
+class AdaptiveConcurrency:
+    # Concurrency limit that adapts AIMD-style: every success nudges the limit up
+    # by increase/limit (about +increase per limit's worth of calls), a throttle
+    # signal multiplies it by decrease (at most once per cooldown, so one burst of
+    # 429s counts once). Waiters are handed freed slots in FIFO order, whether they
+    # block a thread or await on an event loop.
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = None, increase: float = 1.0,
+                 decrease: float = 0.5, cooldown: float = 1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or initial)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def _grant(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            waiter["granted"] = True
+            waiter["wake"]()
+
+    def _enqueue(self, wake) -> dict:
+        waiter = {"wake": wake, "granted": False}
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            waiter["granted"] = True
+        else:
+            self._waiters.append(waiter)
+        return waiter
+
+    def _abandon(self, waiter: dict) -> bool:
+        # Called with the lock held when a waiter gives up; True if it got a slot anyway
+        if waiter["granted"]:
             return True
+        self._waiters.remove(waiter)
         return False
+
+    def acquire(self, timeout: float = None) -> bool:
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(event.set)
+        if waiter["granted"] or event.wait(timeout):
+            return True
+        with self._lock:
+            return self._abandon(waiter)
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+        with self._lock:
+            waiter = self._enqueue(wake)
+        if waiter["granted"]:
+            return True
+        try:
+            return await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if self._abandon(waiter):
+                    self.in_flight -= 1
+                    self._grant()
+            raise
+
+    def release(self, ok: bool = None):
+        # ok=True counts as a success for AIMD, ok=None is neutral (e.g. a non-throttle error)
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.limit = min(self.maximum, self.limit + self.increase / max(self.limit, 1.0))
+            self._grant()
+
+    def throttled(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                self.limit = max(float(self.minimum), self.limit * self.decrease)
+
+class RateLimiter:
+    # One provider: a request (or quota-unit) bucket, an optional token bucket and
+    # an adaptive concurrency cap. Use `with limiter.slot(cost, tokens):` around a
+    # call (or `async with limiter.slot_async(...)`) and call throttled() on a 429.
+    # A call that would wait longer than max_wait for its turn gives its reservation
+    # back and raises Throttled instead of holding a worker for minutes.
+    def __init__(self, name: str, requests: TokenBucket = None, tokens: TokenBucket = None,
+                 concurrency: AdaptiveConcurrency = None, max_wait: float = None):
+        self.name = name
+        self.requests = requests
+        self.tokens = tokens
+        self.concurrency = concurrency
+        self.max_wait = max_wait
+
+    def _delay(self, cost: float, tokens: float) -> float:
+        delay = self.requests.reserve(cost) if self.requests and cost else 0.0
+        if self.tokens and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def _refund(self, cost: float, tokens: float):
+        if self.requests and cost:
+            self.requests.refund(cost)
+        if self.tokens and tokens:
+            self.tokens.refund(tokens)
+
+    def _reserve(self, cost: float, tokens: float) -> float:
+        delay = self._delay(cost, tokens)
+        if self.max_wait is not None and delay > self.max_wait:
+            self._refund(cost, tokens)
+            raise Throttled(self.name, delay)
+        return delay
+
+    @contextmanager
+    def slot(self, cost: float = 1, tokens: float = 0, cancel: threading.Event = None):
+        # cancel: set once the caller no longer wants the answer (a hedged call that
+        # lost). Before the call is sent that returns the reservation and raises
+        # Cancelled; after, the call still finishes but doesn't count as an AIMD success.
+        delay = self._reserve(cost, tokens)
+        if delay:
+            if cancel is None:
+                time.sleep(delay)
+            elif cancel.wait(delay):
+                self._refund(cost, tokens)
+                raise Cancelled(self.name)
+        if self.concurrency and not self.concurrency.acquire(self.max_wait):
+            self._refund(cost, tokens)
+            raise Throttled(self.name, self.max_wait)
+        if cancel is not None and cancel.is_set():
+            if self.concurrency:
+                self.concurrency.release()
+            self._refund(cost, tokens)
+            raise Cancelled(self.name)
+        ok = None
+        try:
+            yield self
+            ok = None if cancel is not None and cancel.is_set() else True
+        finally:
+            if self.concurrency:
+                self.concurrency.release(ok)
+
+    @asynccontextmanager
+    async def slot_async(self, cost: float = 1, tokens: float = 0):
+        delay = self._reserve(cost, tokens)
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            if self.concurrency:
+                await asyncio.wait_for(self.concurrency.acquire_async(), self.max_wait)
+        except asyncio.TimeoutError:
+            self._refund(cost, tokens)
+            raise Throttled(self.name, self.max_wait)
+        except asyncio.CancelledError:
+            self._refund(cost, tokens)  # e.g. a hedged call that lost before it was sent
+            raise
+        ok = None
+        try:
+            yield self
+            ok = True
+        finally:
+            if self.concurrency:
+                self.concurrency.release(ok)
+
+    def throttled(self, retry_after: float = None):
+        if self.concurrency:
+            self.concurrency.throttled()
+        if retry_after and self.requests:
+            self.requests.penalize(retry_after)
+
+    def stats(self) -> dict:
+        out = {"name": self.name}
+        if self.concurrency:
+            out.update(limit=int(self.concurrency.limit), in_flight=self.concurrency.in_flight,
+                       waiting=len(self.concurrency._waiters))
+        return out
@@ -0,0 +1,11 @@
+import re
+
+def normalize_text(text: str) -> str:
+    # casefolded word tokens only: "GDP grew 3%!" and "gdp grew 3" compare equal
+    return " ".join(re.findall(r"\w+", (text or "").casefold()))
+
+STOPWORDS = frozenset("a an the of in on at to by for and or is was were are be been being that this these those "
+                      "it its as with from than then there their they he she we you i".split())
+
+def content_tokens(text: str) -> list:
+    return [t for t in normalize_text(text).split() if t not in STOPWORDS]
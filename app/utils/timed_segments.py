@@ -0,0 +1,60 @@
+import numpy as np
+
+class TimedSegments:
+    # A timed transcript as one joined string plus parallel arrays, instead of a
+    # dict per caption line: segment i is text[offsets[i]:offsets[i + 1] - 1] and
+    # starts at starts[i] seconds. The joined text is exactly what gets analyzed, so
+    # windows are plain slices of it and character positions map back to times.
+    __slots__ = ("text", "offsets", "starts", "durations")
+
+    def __init__(self, text: str, offsets, starts, durations):
+        self.text = text
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.durations = np.asarray(durations, dtype=np.float64)
+
+    @classmethod
+    def from_list(cls, segments: list) -> "TimedSegments":
+        parts = [(s["text"].strip(), s["start"], s.get("duration") or 0.0) for s in segments if s["text"].strip()]
+        texts = [p[0] for p in parts]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(t) + 1 for t in texts])  # +1 for the joining space
+        return cls(" ".join(texts), offsets, [p[1] for p in parts], [p[2] for p in parts])
+
+    @classmethod
+    def from_dict(cls, data) -> "TimedSegments":
+        # Rows stored before the compact form are lists of segment dicts
+        if isinstance(data, list):
+            return cls.from_list(data)
+        return cls(data["text"], data["offsets"], data["starts"], data["durations"])
+
+    def to_dict(self) -> dict:
+        return {"text": self.text, "offsets": self.offsets.tolist(), "starts": self.starts.tolist(),
+                "durations": self.durations.tolist()}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def span_text(self, i: int, j: int) -> str:
+        # Text of segments i..j-1
+        if j <= i:
+            return ""
+        return self.text[self.offsets[i]:self.offsets[j] - 1]
+
+    def end(self, j: int = None) -> float:
+        # End time of segment j-1 (of the whole transcript by default)
+        j = len(self) if j is None else j
+        return float(self.starts[j - 1] + self.durations[j - 1]) if j else 0.0
+
+    def windows(self, seconds: float) -> list:
+        # (i, j) segment ranges covering consecutive `seconds`-long stretches of the video
+        if not len(self):
+            return []
+        bucket = np.floor((self.starts - self.starts[0]) / seconds).astype(np.int64)
+        cuts = (np.flatnonzero(np.diff(bucket)) + 1).tolist()
+        return list(zip([0] + cuts, cuts + [len(self)]))
+
+    def time_at(self, pos: int) -> float:
+        # Start time of the segment containing character position pos of text
+        i = int(np.searchsorted(self.offsets, pos, side="right")) - 1
+        return float(self.starts[min(max(i, 0), len(self) - 1)]) if len(self) else 0.0
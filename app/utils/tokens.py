@@ -0,0 +1,7 @@
+import math
+
+# ~4 characters per token is close enough for English prompts to budget against
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
@@ -0,0 +1,157 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+class Behaviour:
+    # latency/jitter in seconds; error_rate is the probability a call fails with a
+    # throttle (429) or server error, as the real provider would report it.
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def call(self) -> bool:
+        # Counts the call, sleeps the simulated latency and returns True if it should fail
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+        if delay:
+            time.sleep(delay)
+        return fail
+
+SUMMARY = {"tldr": ["The text makes a few checkable claims.", "Sources broadly agree."],
+           "executive_summary": "A short offline summary.", "deep_dive": ["Point one", "Point two"]}
+CLAIMS = [{"text": "Sample claim", "snippet": "Sample text", "proposed_queries": ["sample search"]}]
+
+class FakeOpenAI:
+    # Stands in for openai.OpenAI: only chat.completions.create is implemented
+    def __init__(self, behaviour: Behaviour):
+        self.behaviour = behaviour
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _reply(self, prompt: str, params: dict) -> str:
+        ids = re.findall(r"^\[(C\d+)\]", prompt, flags=re.MULTILINE)
+        if ids:
+            return json.dumps({"assessments": [{"id": i, "support_score": 0.7, "contradiction_score": 0.1,
+                                                "rationale": "offline verdict"} for i in ids]})
+        if "fact-check triager" in prompt:
+            return json.dumps(dict(SUMMARY, claims=CLAIMS))
+        if "TL;DW" in prompt:
+            return json.dumps({"bullets": SUMMARY["tldr"]})
+        return json.dumps(SUMMARY)
+
+    def create(self, model: str, messages: list, **params):
+        import httpx
+        import openai
+        if self.behaviour.call():
+            response = httpx.Response(429, request=httpx.Request("POST", "https://fake-openai/v1/chat/completions"))
+            raise openai.RateLimitError("fake throttle", response=response, body=None)
+        prompt = "\n".join(m["content"] for m in messages)
+        content = self._reply(prompt, params)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4))
+
+    def close(self):
+        pass
+
+class FakeTavily:
+    def __init__(self, behaviour: Behaviour, domains: tuple = ("reuters.com", "bbc.co.uk", "example.org")):
+        self.behaviour = behaviour
+        self.domains = domains
+
+    def search(self, query: str, max_results: int = 3):
+        import tavily
+        if self.behaviour.call():
+            raise tavily.UsageLimitExceededError("fake throttle")
+        slug = re.sub(r"\W+", "-", query.lower()).strip("-")
+        return {"results": [{"url": f"https://{self.domains[i % len(self.domains)]}/{slug}/{i}",
+                             "title": f"{query} ({i})", "content": f"Evidence {i} about {query}."}
+                            for i in range(max_results)]}
+
+class FakeYouTube:
+    # Stands in for the googleapiclient service: videos().list / captions().list
+    def __init__(self, behaviour: Behaviour):
+        self.behaviour = behaviour
+
+    def videos(self):
+        return _Resource(self.behaviour, lambda kw: {"items": [{"snippet": {"title": f"Video {kw['id']}"}}]})
+
+    def captions(self):
+        return _Resource(self.behaviour, lambda kw: {"items": [
+            {"id": f"cap-{kw['videoId']}", "snippet": {"language": "en", "name": "", "trackKind": "standard"}}]})
+
+class _Resource:
+    def __init__(self, behaviour: Behaviour, respond):
+        self.behaviour = behaviour
+        self.respond = respond
+
+    def list(self, **kwargs):
+        return SimpleNamespace(execute=lambda: self._execute(kwargs))
+
+    def _execute(self, kwargs):
+        import httplib2
+        from googleapiclient.errors import HttpError
+        if self.behaviour.call():
+            raise HttpError(httplib2.Response({"status": "429"}), b'{"error": "rateLimitExceeded"}')
+        return self.respond(kwargs)
+
+def fake_segments(video_id: str, language: str) -> list:
+    text = ("The city opened a new bridge in 2021. It carries forty thousand cars a day. "
+            "Officials say traffic deaths fell by a third.").split(". ")
+    return [{"text": line, "start": 4.0 * i, "duration": 4.0} for i, line in enumerate(text * 20)]
+
+class Providers:
+    def __init__(self, openai: Behaviour = None, tavily: Behaviour = None, youtube: Behaviour = None):
+        self.openai = openai or Behaviour()
+        self.tavily = tavily or Behaviour()
+        self.youtube = youtube or Behaviour()
+
+    def calls(self) -> dict:
+        return {"openai": self.openai.calls, "tavily": self.tavily.calls, "youtube": self.youtube.calls}
+
+@contextmanager
+def offline_providers(providers: Providers = None, data_dir: str = None):
+    # Route llm/searcher/transcript to the fakes. Caches start empty (and live in
+    # data_dir if given) so upstream call counts reflect a cold process.
+    from app.config import settings
+    from app.services import llm, llm_cache, searcher, transcript, limits, claim_store
+    providers = providers or Providers()
+    saved_env = {k: os.environ.get(k) for k in ("TAVILY_API_KEY", "YT_API_KEY")}
+    saved = (settings.OPENAI_API_KEY, settings.DATA_DIR, llm.clients._sync, llm_cache._cache, searcher._client,
+             searcher._cache, transcript._service, transcript._store, transcript._fetch_segments, claim_store._store)
+    os.environ.update(TAVILY_API_KEY="offline", YT_API_KEY="offline")
+    settings.OPENAI_API_KEY = "offline"
+    if data_dir:
+        settings.DATA_DIR = data_dir
+    llm.clients._sync = ("offline", FakeOpenAI(providers.openai))
+    llm_cache._cache = None
+    searcher._client = ("offline", FakeTavily(providers.tavily))
+    searcher._cache = None
+    transcript._service = ("offline", FakeYouTube(providers.youtube))
+    transcript._store = None
+    transcript._fetch_segments = fake_segments
+    claim_store._store = None
+    limits.reset()
+    try:
+        yield providers
+    finally:
+        (settings.OPENAI_API_KEY, settings.DATA_DIR, llm.clients._sync, llm_cache._cache, searcher._client,
+         searcher._cache, transcript._service, transcript._store, transcript._fetch_segments, claim_store._store) = saved
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        limits.reset()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .fakes import Behaviour, Providers, offline_providers
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+PARAGRAPHS = [
+    "The city opened a new bridge in 2021. It carries forty thousand cars a day.",
+    "Officials say traffic deaths fell by a third after the redesign.",
+    "Critics argue the project ran two years late and 40% over budget.",
+    "A 2023 audit found maintenance costs were lower than forecast.",
+    "Public transit ridership on the corridor doubled over the same period.",
+]
+
+def document(i: int) -> str:
+    # Overlapping paragraphs so repeated claims/queries behave like real traffic
+    return "\n\n".join(PARAGRAPHS[(i + j) % len(PARAGRAPHS)] for j in range(3))
+
+def _text(i: int):
+    return "/analyze/text", {"content": document(i)}
+
+def _youtube(i: int):
+    return "/analyze/youtube", {"url": f"https://youtu.be/bench{i % 5:06d}"}
+
+def _batch(i: int):
+    return "/analyze/batch", {"documents": [{"id": str(j), "content": document(i * 10 + j)} for j in range(10)]}
+
+WORKLOADS = {"text": _text, "youtube": _youtube, "batch": _batch}
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def run_workload(name: str, requests: int = 20, concurrency: int = 4, providers: Providers = None) -> dict:
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.main import app
+    client = TestClient(app, raise_server_exceptions=False)
+    make = WORKLOADS[name]
+    # one API key per simulated user, so per-client rate limits don't skew the run
+    saved_keys, settings.ADMISSION_API_KEYS = settings.ADMISSION_API_KEYS, ",".join(f"bench-{i}" for i in range(requests))
+
+    try:
+        with tempfile.TemporaryDirectory() as data_dir, offline_providers(providers, data_dir=data_dir) as fakes:
+            def one(i):
+                path, body = make(i)
+                start = time.perf_counter()
+                response = client.post(path, json=body, headers={"x-api-key": f"bench-{i}"})
+                ok = response.status_code == 200 and '"event": "error"' not in response.text
+                return time.perf_counter() - start, ok
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(one, range(requests)))
+            elapsed = time.perf_counter() - start
+            calls = fakes.calls()
+    finally:
+        settings.ADMISSION_API_KEYS = saved_keys
+
+    latencies = [t * 1000 for t, _ in results]
+    return {
+        "workload": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(not ok for _, ok in results),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p95_ms": round(_percentile(latencies, 95), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "upstream_calls_per_request": {k: round(v / requests, 2) for k, v in calls.items()},
+    }
+
+def compare(report: dict, baseline: dict, calls_tolerance: float = 0.1, latency_tolerance: float = 0.5,
+            latency_slack_ms: float = 10.0) -> list:
+    # Upstream call counts are exact at concurrency 1 and held tightly there; under
+    # concurrency, identical cold requests race the caches, so they get 2x headroom.
+    # Timings get relative plus absolute slack so millisecond-scale noise doesn't trip it.
+    if report["concurrency"] > 1:
+        calls_tolerance = max(calls_tolerance, 1.0)
+    problems = []
+    for provider, base in baseline["upstream_calls_per_request"].items():
+        now = report["upstream_calls_per_request"].get(provider, 0)
+        if now > base * (1 + calls_tolerance) + 2.0 / report["requests"]:
+            problems.append(f"{provider} calls/request {now} > baseline {base}")
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        if report[key] > baseline[key] * (1 + latency_tolerance) + latency_slack_ms:
+            problems.append(f"{key} {report[key]} > baseline {baseline[key]}")
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - latency_tolerance):
+        problems.append(f"throughput {report['throughput_rps']} rps < baseline {baseline['throughput_rps']}")
+    if report["errors"] > baseline.get("errors", 0):
+        problems.append(f"{report['errors']} failed requests (baseline {baseline.get('errors', 0)})")
+    return problems
+
+def load_baselines(path: str = BASELINES) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline TruthLens benchmark against fake providers.")
+    parser.add_argument("--workload", nargs="+", choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.02, help="mean provider latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--baseline", default=BASELINES)
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any result regresses past its baseline")
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baseline)
+    failed = False
+    for name in args.workload:
+        for concurrency in args.concurrency:
+            behaviour = lambda seed: Behaviour(args.latency, args.jitter, args.error_rate, seed=seed)
+            providers = Providers(openai=behaviour(1), tavily=behaviour(2), youtube=behaviour(3))
+            report = run_workload(name, args.requests, concurrency, providers)
+            key = f"{name}@c{concurrency}"
+            print(json.dumps(report))
+            if args.update:
+                baselines[key] = report
+            elif args.check and key in baselines:
+                for problem in compare(report, baselines[key]):
+                    failed = True
+                    print(f"REGRESSION {key}: {problem}", file=sys.stderr)
+    if args.update:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(baselines, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
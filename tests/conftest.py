@@ -0,0 +1,14 @@
+import pytest
+from app.services import admission, claim_store
+
+@pytest.fixture(autouse=True)
+def _claim_store(monkeypatch, tmp_path):
+    # Verdicts persist across runs by design; keep each test's claim store to itself
+    monkeypatch.setattr(claim_store, "_store", claim_store.ClaimStore(str(tmp_path / "claims.sqlite3"), max_age=3600))
+
+@pytest.fixture(autouse=True)
+def _admission():
+    # fresh per-client buckets and queue for every test
+    admission.reset()
+    yield
+    admission.reset()
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import admission, pipeline
+
+def test_queue_sheds_when_full_or_past_deadline():
+    async def scenario():
+        ctrl = admission.AdmissionController(capacity=4, queue_max=1, queue_timeout=0.05)
+        held = await ctrl.acquire(3)
+        with pytest.raises(admission.Shed) as timed_out:
+            await ctrl.acquire(2)
+        assert timed_out.value.status == 503 and ctrl.shed["timeout"] == 1
+
+        waiting = asyncio.ensure_future(ctrl.acquire(2))
+        await asyncio.sleep(0.01)
+        with pytest.raises(admission.Shed):
+            await ctrl.acquire(1)
+        assert ctrl.stats()["queue_depth"] == 1 and ctrl.shed["queue_full"] == 1
+        ctrl.release(held, 0.5)
+        assert await waiting == 2 and ctrl.in_flight == 2
+        assert ctrl.stats()["queue_depth"] == 0
+
+    asyncio.run(scenario())
+
+def test_per_client_rate_limit_returns_retry_after(monkeypatch):
+    monkeypatch.setattr(admission.settings, "ADMISSION_CLIENT_RPM", 60)
+    monkeypatch.setattr(admission.settings, "ADMISSION_CLIENT_BURST", 2)
+    monkeypatch.setattr(pipeline, "run_analysis", lambda content, **kw: {
+        "summary_raw": "", "claims": [], "sources": [], "errors": []})
+    monkeypatch.setattr(admission.settings, "ADMISSION_API_KEYS", "a, b")
+    client = TestClient(app)
+    codes = [client.post("/analyze/text", json={"content": "x"}, headers={"x-api-key": "a"}).status_code
+             for _ in range(3)]
+    assert codes == [200, 200, 429]
+    limited = client.post("/analyze/text", json={"content": "x"}, headers={"x-api-key": "a"})
+    assert int(limited.headers["retry-after"]) >= 1
+    assert client.post("/analyze/text", json={"content": "x"}, headers={"authorization": "Bearer b"}).status_code == 200
+    # made-up keys don't buy a fresh bucket; they share the client's IP one
+    codes = [client.post("/analyze/text", json={"content": "x"}, headers={"x-api-key": f"made-up-{i}"}).status_code
+             for i in range(3)]
+    assert codes == [200, 200, 429]
+    assert client.get("/health").status_code == 200
+    assert 'truthlens_admission_shed_total{reason="rate_limited"} 3' in client.get("/metrics").text
+
+def test_body_without_length_is_costed_as_large(monkeypatch):
+    seen = []
+    monkeypatch.setattr(admission, "estimate_cost", lambda path, length: seen.append(length) or 1.0)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+    middleware = admission.AdmissionMiddleware(app)
+    scope = {"type": "http", "path": "/analyze/pdf", "client": ("1.2.3.4", 1)}
+    asyncio.run(middleware(dict(scope, headers=[(b"transfer-encoding", b"chunked")]), None, send))
+    asyncio.run(middleware(dict(scope, headers=[(b"content-length", b"2048")]), None, send))
+    assert seen == [admission.settings.ADMISSION_UNKNOWN_LENGTH, 2048]
+
+def test_cost_grows_with_input():
+    assert admission.estimate_cost("/analyze/text", 400) < admission.estimate_cost("/analyze/text", 40000)
+    assert admission.estimate_cost("/analyze/youtube", 60) > admission.estimate_cost("/analyze/text", 60)
@@ -0,0 +1,41 @@
+import json
+from app.services import analysis, chunker, pipeline, report
+
+SECTIONS = {"tldr": ["one", "two"], "executive_summary": "short", "deep_dive": ["deep"]}
+CLAIMS = [{"text": "GDP grew 3% in 2023", "snippet": "GDP grew 3%", "proposed_queries": ["gdp 2023"]}]
+
+def test_one_structured_call_gives_summary_and_claims(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(analysis, "llm_complete",
+                        lambda prompt, **params: prompts.append(prompt) or json.dumps(dict(SECTIONS, claims=CLAIMS)))
+    monkeypatch.setattr(pipeline.searcher, "search_web", lambda q, max_results=3: [])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim", lambda claim, snippets: {"support_score": 0.5})
+
+    run = pipeline.run_analysis("Some article text.", batch_size=1)
+    assert len(prompts) == 1 and prompts[0].count("Some article text.") == 1
+    assert [a["claim"]["text"] for a in run["claims"]] == ["GDP grew 3% in 2023"]
+    result = report.build_result(run)
+    assert (result["tldr"], result["summary"], result["deep_dive"]) == (["one", "two"], "short", "- deep")
+
+def test_long_inputs_send_each_chunk_once(monkeypatch):
+    prompts = []
+
+    def llm_complete(prompt, **params):
+        prompts.append(prompt)
+        part = prompt.count("Paragraph")
+        return json.dumps(dict(SECTIONS, claims=[{"text": f"claim {len(prompts)}"}] if part else []))
+
+    monkeypatch.setattr(analysis, "llm_complete", llm_complete)
+    monkeypatch.setattr(analysis.summarizer, "llm_complete", llm_complete)
+    monkeypatch.setattr(chunker.settings, "CHUNK_TOKENS", 200)
+    out = analysis.analyze("\n\n".join(f"Paragraph {i}. " + "word " * 60 for i in range(10)), k=3)
+    assert len(prompts) == out["chunks"] + 1
+    assert len(out["claims"]) == 3
+    assert json.loads(out["raw"])["executive_summary"] == "short"
+
+def test_invalid_reply_falls_back_to_separate_calls(monkeypatch):
+    monkeypatch.setattr(analysis, "llm_complete", lambda prompt, **params: "not json")
+    monkeypatch.setattr(analysis.summarizer, "summarize", lambda content: {"raw": json.dumps(SECTIONS)})
+    monkeypatch.setattr(analysis.claim_extractor, "extract_claims", lambda content, k=8: CLAIMS)
+    out = analysis.analyze("Some article text.")
+    assert out["claims"] == CLAIMS and report.parse_sections(out["raw"])[1] == "short"
@@ -0,0 +1,71 @@
+import json
+import threading
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import batch
+from app.services import claim_store, pipeline, report
+
+def _fakes(monkeypatch, searched, assessed):
+    lock = threading.Lock()
+
+    def extract_claims(content, k=8):
+        return [{"text": t.strip(), "proposed_queries": [t.strip()]} for t in content.split(";")]
+
+    def search_web(q, max_results=3):
+        with lock:
+            searched.append(q)
+        return [{"url": f"https://example.com/{q}", "title": q, "snippet": q}]
+
+    def assess_claims(items):
+        with lock:
+            assessed.extend(c for c, _ in items)
+        return [{"support_score": 0.9, "contradiction_score": 0.0, "rationale": c} for c, _ in items]
+
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": "TL;DR:\n- x"})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", extract_claims)
+    monkeypatch.setattr(pipeline.searcher, "search_web", search_web)
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claims", assess_claims)
+
+def test_batch_dedupes_claims_across_documents(monkeypatch):
+    searched, assessed = [], []
+    _fakes(monkeypatch, searched, assessed)
+    docs = ["Water is wet; the sky is blue", "The sky is blue!", "water is WET; grass is green"] * 10
+
+    events = list(report.batch_events(pipeline.iter_batch(docs, concurrency=4, batch_size=3, window=4)))
+    results = {e["index"]: e["result"] for e in events if e["event"] == "document"}
+    assert sorted(results) == list(range(len(docs)))
+    assert sorted(map(pipeline.claim_key, [{"text": c} for c in assessed])) == ["grass is green", "the sky is blue", "water is wet"]
+    assert len(searched) == 3
+    assert [c["claim"]["text"] for c in results[2]["claims"]] == ["water is WET", "grass is green"]
+    assert results[2]["claims"][0]["rationale"].lower() == "water is wet"
+    assert events[-1] == {"event": "done", "documents": 30, "claims": 50, "unique_claims": 3,
+                          "usage": events[-1]["usage"], "timings": events[-1]["timings"]}
+
+def test_batch_keeps_a_bounded_claim_index(monkeypatch):
+    searched, assessed = [], []
+    _fakes(monkeypatch, searched, assessed)
+    monkeypatch.setattr(pipeline.settings, "BATCH_MAX_CLAIMS", 4)
+    monkeypatch.setattr(pipeline, "_STORE_FLUSH", 2)
+    stored = []
+    monkeypatch.setattr(claim_store.get_store(), "put", lambda entries: stored.append(len(entries)))
+    docs = [f"Claim number {i} holds; claim number {i + 1} holds" for i in range(20)] + ["Claim number 0 holds"]
+
+    events = list(pipeline.iter_batch(docs, concurrency=2, batch_size=2, window=1))
+    # neighbours still dedupe; the first claim was dropped from the index long ago, so it's checked again
+    assert events[-1]["unique_claims"] == len(assessed) == 22 and len(set(assessed)) == 21
+    assert len(stored) > 2 and sum(stored) == 22  # written as the batch goes, not all at the end
+
+def test_batch_endpoint_streams_documents(monkeypatch):
+    _fakes(monkeypatch, [], [])
+    api = FastAPI()
+    api.include_router(batch.router)
+    client = TestClient(api)
+    assert client.post("/analyze/batch", json={"documents": [{"content": " "}]}).status_code == 400
+
+    body = {"documents": [{"id": "a", "content": "one; two"}, {"content": "two"}]}
+    with client.stream("POST", "/analyze/batch", json=body) as r:
+        events = [json.loads(line) for line in r.iter_lines() if line]
+    docs = {e["id"]: e["result"] for e in events if e["event"] == "document"}
+    assert set(docs) == {"a", "1"} and len(docs["a"]["claims"]) == 2
+    assert events[-1]["event"] == "done"
@@ -0,0 +1,21 @@
+from benchmarks import harness
+from benchmarks.fakes import Behaviour, Providers
+
+def test_offline_workloads_count_upstream_calls():
+    providers = Providers(openai=Behaviour(error_rate=0.3, seed=7))
+    report = harness.run_workload("text", requests=5, concurrency=1, providers=providers)
+    assert report["errors"] == 0  # throttled LLM calls are retried
+    assert providers.openai.errors > 0
+    assert report["upstream_calls_per_request"]["openai"] >= 1
+    assert report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"]
+
+    report = harness.run_workload("youtube", requests=4, concurrency=2)
+    assert report["errors"] == 0
+    assert report["upstream_calls_per_request"]["youtube"] == 2.0  # videos + captions list per distinct video
+
+def test_compare_flags_regressions():
+    base = {"concurrency": 1, "requests": 10, "errors": 0, "throughput_rps": 10.0, "p50_ms": 100.0, "p95_ms": 200.0,
+            "p99_ms": 300.0, "upstream_calls_per_request": {"openai": 2.0}}
+    assert harness.compare(dict(base), base) == []
+    worse = dict(base, p95_ms=500.0, upstream_calls_per_request={"openai": 3.0})
+    assert len(harness.compare(worse, base)) == 2
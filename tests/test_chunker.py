@@ -0,0 +1,34 @@
+from app.services import chunker, summarizer, claim_extractor
+from app.utils.tokens import estimate_tokens
+
+def test_split_chunks_respects_budget_and_boundaries():
+    paras = [f"Paragraph {i}. " + "word " * 60 for i in range(20)]
+    chunks = chunker.split_chunks("\n\n".join(paras), max_tokens=200)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 200 for c in chunks)
+    assert all(c.startswith("Paragraph") for c in chunks)
+
+    cues = "\n".join(f"[00:{m:02d}:00] " + "talk " * 40 for m in range(30))
+    chunks = chunker.split_chunks(cues, max_tokens=150)
+    assert all(c.startswith("[00:") for c in chunks)
+    assert "".join(chunks).count("[00:") == 30
+
+def test_long_inputs_are_map_reduced(monkeypatch):
+    prompts = []
+
+    def llm_complete(prompt, **params):
+        prompts.append(prompt)
+        return "TL;DR:\n- part"
+
+    monkeypatch.setattr(summarizer, "llm_complete", llm_complete)
+    monkeypatch.setattr(chunker.settings, "CHUNK_TOKENS", 200)
+    text = "\n\n".join(f"Paragraph {i}. " + "word " * 60 for i in range(10))
+
+    out = summarizer.summarize(text)
+    assert out["chunks"] > 1
+    assert len(prompts) == out["chunks"] + 1
+    assert prompts[-1].startswith("You are an analyst.\nBelow are summaries")
+
+    monkeypatch.setattr(claim_extractor, "llm_complete", llm_complete)
+    claims = claim_extractor.extract_claims(text, k=8)
+    assert [c["text"] for c in claims] == ["Sample claim"]
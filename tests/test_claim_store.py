@@ -0,0 +1,37 @@
+from app.services import claim_store, pipeline
+
+def test_store_matches_reworded_claims_only(tmp_path):
+    store = claim_store.ClaimStore(str(tmp_path / "claims.sqlite3"), max_age=3600)
+    item = {"support_score": 0.9, "contradiction_score": 0.0, "rationale": "checked",
+            "sources": [{"url": "https://example.com/gdp"}]}
+    store.put([("GDP grew 3% in 2023", item)])
+    exact, reworded, other, negated = store.lookup(["GDP grew 3% in 2023", "In 2023, GDP grew by 3%",
+                                                    "GDP grew 4% in 2023", "GDP did not grow 3% in 2023"])
+    assert exact["rationale"] == reworded["rationale"] == "checked" and exact["verified_at"]
+    assert other is None and negated is None
+
+    store.put([("Biden won Pennsylvania in 2020", item)])
+    assert store.lookup(["Trump won Pennsylvania in 2020", "Biden lost Pennsylvania in 2020"]) == [None, None]
+
+    stale = claim_store.ClaimStore(str(tmp_path / "claims.sqlite3"), max_age=0)
+    assert stale.lookup(["GDP grew 3% in 2023"]) == [None]
+
+def test_recurring_claims_skip_search_and_assess(monkeypatch):
+    searched, assessed = [], []
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": ""})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims",
+                        lambda content, k=8: [{"text": content, "proposed_queries": [content]}])
+    monkeypatch.setattr(pipeline.searcher, "search_web",
+                        lambda q, max_results=3: searched.append(q) or [{"url": "https://example.com/a", "title": q, "snippet": q}])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim",
+                        lambda claim, snippets: assessed.append(claim) or {"support_score": 0.8, "rationale": "ok"})
+
+    first = pipeline.run_analysis("Unemployment fell to 4% in 2022", batch_size=1)
+    second = pipeline.run_analysis("In 2022 unemployment fell to 4%", batch_size=1)
+    assert len(searched) == len(assessed) == 1
+    assert second["claims"][0]["verified_at"] and second["claims"][0]["rationale"] == "ok"
+    assert second["claims"][0]["sources"] == first["claims"][0]["sources"]
+
+    pipeline.run_analysis("In 2022 unemployment fell to 4%", batch_size=1, cache="refresh")
+    assert len(assessed) == 2
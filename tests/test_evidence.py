@@ -0,0 +1,27 @@
+from app.services import evidence
+
+def test_select_evidence_ranks_dedupes_and_fits_budget(monkeypatch):
+    monkeypatch.setattr(evidence.scoring, "trust_weights",
+                        lambda urls: [0.9 if "reuters" in u else 0.5 for u in urls])
+    results = [
+        {"url": "https://blog.example/post", "title": "Cooking tips", "snippet": "How to bake bread at home."},
+        {"url": "https://www.reuters.com/gdp/", "title": "GDP report", "snippet": "GDP grew 3% in 2023, data show."},
+        {"url": "http://reuters.com/gdp?utm_source=x", "title": "GDP report", "snippet": "Duplicate page."},
+        {"url": "https://news.example/gdp", "title": "Economy", "snippet": "GDP grew 3% in 2023, data show!"},
+        {"url": "https://other.example/a", "title": "GDP", "snippet": "Economists say GDP growth in 2023 was 3%."},
+    ]
+    picked = evidence.select_evidence("GDP grew 3% in 2023", results, max_sources=5, token_budget=1000)
+    assert [r["url"] for r in picked] == ["https://www.reuters.com/gdp/", "https://other.example/a",
+                                          "https://blog.example/post"]
+    assert picked[0]["trust_weight"] == 0.9
+
+    tight = evidence.select_evidence("GDP grew 3% in 2023", results, max_sources=5, token_budget=30)
+    assert len(tight) == 1 and tight[0]["url"] == "https://www.reuters.com/gdp/"
+
+def test_results_without_snippet_or_title_are_kept():
+    picked = evidence.select_evidence("GDP grew 3%", [{"url": "https://a.com/x", "title": "", "snippet": ""}], 5)
+    assert [r["url"] for r in picked] == ["https://a.com/x"]
+
+def test_bm25_prefers_matching_terms():
+    scores = evidence.bm25(["gdp", "2023"], [["gdp", "2023", "grew"], ["bread", "bake"], ["gdp"]])
+    assert scores[0] > scores[2] > scores[1] == 0
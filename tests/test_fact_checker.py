@@ -0,0 +1,43 @@
+import json
+from app.services import fact_checker
+
+def test_assess_claims_batches_and_falls_back(monkeypatch):
+    prompts = []
+
+    def llm_complete(prompt, **params):
+        prompts.append(prompt)
+        # answer for C1 only; C2 is missing and must fall back to a single-claim call
+        return json.dumps({"assessments": [
+            {"id": "C1", "support_score": 0.9, "contradiction_score": 0.0, "rationale": "backed"}]})
+
+    monkeypatch.setattr(fact_checker, "llm_complete", llm_complete)
+    monkeypatch.setattr(fact_checker, "assess_claim", lambda claim, snippets: {"rationale": f"single {claim}"})
+
+    shared = "Report — GDP grew 3% in 2023"
+    out = fact_checker.assess_claims([("GDP grew 3%", [shared]), ("Growth was 3%", [shared, "other"])],
+                                     token_budget=4000, max_claims=5)
+    assert len(prompts) == 1
+    assert prompts[0].count(shared) == 1
+    assert out[0]["support_score"] == 0.9
+    assert out[1] == {"rationale": "single Growth was 3%"}
+
+def test_assess_claims_malformed_batch_uses_per_claim(monkeypatch):
+    monkeypatch.setattr(fact_checker, "llm_complete", lambda prompt, **params: "not json")
+    monkeypatch.setattr(fact_checker, "assess_claim", lambda claim, snippets: {"rationale": claim})
+    out = fact_checker.assess_claims([("a", []), ("b", []), ("c", [])], token_budget=4000, max_claims=5)
+    assert [o["rationale"] for o in out] == ["a", "b", "c"]
+
+def test_single_claim_uses_the_batch_prompt_and_parser(monkeypatch):
+    prompts = []
+
+    def llm_complete(prompt, **params):
+        prompts.append(prompt)
+        return json.dumps({"assessments": [
+            {"id": "C1", "support_score": 0.2, "contradiction_score": 0.7, "rationale": "refuted"}]})
+
+    monkeypatch.setattr(fact_checker, "llm_complete", llm_complete)
+    out = fact_checker.assess_claim("The bridge opened in 1990", ["The bridge opened in 2021."])
+    assert out == {"support_score": 0.2, "contradiction_score": 0.7, "rationale": "refuted"}
+    assert "[C1] The bridge opened in 1990" in prompts[0] and "[S1] The bridge opened in 2021." in prompts[0]
+    monkeypatch.setattr(fact_checker, "llm_complete", lambda prompt, **params: "not json")
+    assert "support_score" not in fact_checker.assess_claim("x", [])
@@ -0,0 +1,65 @@
+import json
+from app.services import chunker, documents, pipeline
+
+def _doc(edited=None):
+    paras = [f"Fact {i} holds. " + f"detail{i} " * 20 for i in range(6)]
+    if edited is not None:
+        paras[edited] = f"Fact {edited} was revised. " + "changed " * 20
+    return "\n\n".join(paras)
+
+def test_segments_are_stable_under_local_edits():
+    paras = [f"Paragraph {i} says something. " + "word " * 40 for i in range(40)]
+    before = chunker.split_segments("\n\n".join(paras), min_tokens=150)
+    paras[20] = "A rewritten paragraph. " + "other " * 40
+    after = chunker.split_segments("\n\n".join(paras), min_tokens=150)
+    assert len(set(map(documents.segment_hash, before)) - set(map(documents.segment_hash, after))) <= 2
+
+def test_resubmission_only_rechecks_changed_segments(monkeypatch, tmp_path):
+    extracted, assessed = [], []
+    monkeypatch.setattr(documents, "_store", documents.DocumentStore(str(tmp_path / "docs.sqlite3")))
+    monkeypatch.setattr(chunker.settings, "SEGMENT_MIN_TOKENS", 0)
+    monkeypatch.setattr(chunker.settings, "CHUNK_TOKENS", 50)
+    monkeypatch.setattr(pipeline.summarizer, "summarize_segments", lambda content: {"raw": ""})
+    monkeypatch.setattr(documents.claim_extractor, "extract_claims",
+                        lambda seg, k=8: extracted.append(seg) or [{"text": seg.split(". ")[0], "proposed_queries": [seg[:12]]}])
+    monkeypatch.setattr(pipeline.searcher, "search_web",
+                        lambda q, max_results=3: [{"url": "https://example.com/" + q.replace(" ", "-"), "title": q, "snippet": q}])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim",
+                        lambda claim, snippets: assessed.append(claim) or {"support_score": 0.8, "rationale": claim})
+
+    first = pipeline.run_analysis(_doc(), k=8, batch_size=1, document_id="doc-1")
+    assert len(extracted) == 6 and len(assessed) == 6
+    extracted.clear(), assessed.clear()
+
+    second = pipeline.run_analysis(_doc(edited=3), k=8, batch_size=1, document_id="doc-1")
+    assert len(extracted) == 1 and assessed == ["Fact 3 was revised"]
+    texts = [a["claim"]["text"] for a in second["claims"]]
+    assert sorted(texts) == sorted([f"Fact {i} holds" for i in range(6) if i != 3] + ["Fact 3 was revised"])
+    kept = {a["claim"]["text"]: a for a in first["claims"]}
+    assert all(a == kept[a["claim"]["text"]] for a in second["claims"] if a["claim"]["text"] != "Fact 3 was revised")
+
+    extracted.clear(), assessed.clear()
+    pipeline.run_analysis(_doc(edited=3), k=8, batch_size=1, document_id="doc-1", cache="refresh")
+    assert len(extracted) == 6 and len(assessed) == 6
+
+def test_resubmission_only_resummarizes_changed_segments(monkeypatch):
+    cache, misses = {}, []
+
+    def llm_complete(prompt, **params):
+        # stands in for the LLM cache: only prompts not seen before reach the "model"
+        if prompt not in cache:
+            misses.append(prompt)
+            cache[prompt] = json.dumps({"tldr": [], "executive_summary": f"summary {len(misses)}", "deep_dive": []})
+        return cache[prompt]
+
+    monkeypatch.setattr(chunker.settings, "SEGMENT_MIN_TOKENS", 0)
+    monkeypatch.setattr(chunker.settings, "CHUNK_TOKENS", 50)
+    monkeypatch.setattr(pipeline.summarizer, "llm_complete", llm_complete)
+    segments = len(chunker.split_segments(_doc()))
+    pipeline.summarizer.summarize_segments(_doc())
+    assert sum("one section" in p for p in misses) == segments > 1
+    misses.clear()
+
+    pipeline.summarizer.summarize_segments(_doc(edited=3))
+    assert sum("one section" in p for p in misses) == 1
+    assert any("PART SUMMARIES" in p for p in misses)
@@ -0,0 +1,71 @@
+import threading
+import time
+from app.services.jobs import JobQueue, JobStore, QueueFull
+
+def _wait(store, job_id, status, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"{job_id} never reached {status}: {store.get(job_id)['status']}")
+
+def test_job_queue_priority_cancel_and_persistence(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    gate, order = threading.Event(), []
+
+    def runner(kind, payload, cancelled):
+        gate.wait(5)
+        order.append(payload["content"])
+        return {"echo": payload["content"]}
+
+    q = JobQueue(JobStore(path), workers=1, max_queued=10, runner=runner)
+    first = q.submit("text", {"content": "first"})
+    q.start()
+    time.sleep(0.05)  # let the worker pick up "first" and block on the gate
+    low = q.submit("text", {"content": "low"}, priority=0)
+    high = q.submit("text", {"content": "high"}, priority=5)
+    dropped = q.submit("text", {"content": "dropped"})
+    assert q.cancel(dropped["id"])["status"] == "cancelled"
+    gate.set()
+
+    assert _wait(q.store, low["id"], "done")["result"] == {"echo": "low"}
+    assert order == ["first", "high", "low"]
+    q.stop()
+
+    reopened = JobStore(path)
+    assert reopened.get(high["id"])["status"] == "done"
+    assert reopened.get(dropped["id"])["status"] == "cancelled"
+    assert reopened.get(first["id"])["result"] == {"echo": "first"}
+
+def test_concurrent_submits_respect_max_queued(tmp_path):
+    q = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, max_queued=3)
+    accepted, rejected = [], []
+
+    def submit():
+        try:
+            accepted.append(q.submit("text", {"content": "x"}))
+        except QueueFull:
+            rejected.append(1)
+
+    threads = [threading.Thread(target=submit) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(accepted) == 3 and len(rejected) == 13 and q.depth() == 3
+
+def test_cancelled_jobs_free_their_queue_slot(tmp_path):
+    ran = []
+    q = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, max_queued=2,
+                 runner=lambda kind, payload, cancelled: ran.append(payload["content"]) or {})
+    a = q.submit("text", {"content": "a"})
+    q.submit("text", {"content": "b"})
+    q.cancel(a["id"])
+    assert q.depth() == 1
+    c = q.submit("text", {"content": "c"})  # a's slot is free again
+    q.start()
+    _wait(q.store, c["id"], "done")
+    q.stop()
+    assert ran == ["b", "c"] and q.depth() == 0
@@ -0,0 +1,22 @@
+import time
+from app.services.llm_cache import LLMCache, cache_key
+
+def test_llm_cache_memory_and_disk_tiers(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    key = cache_key({"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10})
+    assert key != cache_key({"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 11})
+
+    cache = LLMCache(path, ttl=60, memory_items=4, max_bytes=1024)
+    assert cache.get(key) is None
+    cache.set(key, "answer")
+    assert cache.get(key) == "answer"
+
+    cold = LLMCache(path, ttl=60, memory_items=4, max_bytes=1024)
+    assert cold.get(key) == "answer"
+    assert cold.stats()["disk_hits"] == 1
+
+def test_llm_cache_ttl_expiry(tmp_path):
+    cache = LLMCache(str(tmp_path / "c.sqlite3"), ttl=0.01, memory_items=4, max_bytes=1024)
+    cache.set("k", "v")
+    time.sleep(0.02)
+    assert cache.get("k") is None
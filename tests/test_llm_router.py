@@ -0,0 +1,86 @@
+import json
+import time
+import pytest
+from benchmarks.fakes import Behaviour, FakeOpenAI
+from app.services import llm, llm_router
+
+BACKENDS = [{"name": "primary", "base_url": "http://primary/v1", "cost": 2.0},
+            {"name": "standin", "base_url": "http://localhost:8001/v1", "model": "local", "cost": 0.5}]
+
+def _router(monkeypatch, primary: Behaviour, standin: Behaviour, routes: dict = None):
+    monkeypatch.setattr(llm.settings, "LLM_BACKENDS", json.dumps(BACKENDS))
+    monkeypatch.setattr(llm.settings, "LLM_ROUTES", json.dumps(routes or {}))
+    monkeypatch.setattr(llm.settings, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(llm.settings, "LLM_HEDGE_MIN_DELAY", 0.02)
+    monkeypatch.setattr(llm.clients, "_extra", {
+        "primary": (("http://primary/v1", "none"), FakeOpenAI(primary)),
+        "standin": (("http://localhost:8001/v1", "none"), FakeOpenAI(standin))})
+    llm_router.reset()
+    return llm_router.get_router()
+
+def test_routes_by_policy_and_fails_over(monkeypatch):
+    primary, standin = Behaviour(error_rate=1.0), Behaviour()
+    router = _router(monkeypatch, primary, standin, routes={"assess": {"policy": "cost"}})
+    assert [b.name for b in router.candidates("assess")] == ["standin", "primary"]
+    assert [b.name for b in router.candidates("summary")] == ["primary", "standin"]
+
+    assert llm.llm_complete("hello", cache="bypass", task="summary")
+    assert (primary.calls, standin.calls) == (1, 1)
+    # the failed backend sits out its cooldown
+    assert [b.name for b in router.candidates("summary")] == ["standin", "primary"]
+    llm_router.reset()
+
+def test_slow_primary_is_hedged(monkeypatch):
+    primary, standin = Behaviour(latency=0.5), Behaviour(latency=0.01)
+    router = _router(monkeypatch, primary, standin)
+    for _ in range(llm.settings.LLM_HEDGE_MIN_SAMPLES):
+        router.backends["primary"].observe(0.01, "summary")
+        router.backends["primary"].observe(5.0, "analysis")
+
+    start = time.perf_counter()
+    assert llm.llm_complete("hello", cache="bypass", task="summary")
+    assert time.perf_counter() - start < 0.3
+    assert router.backends["primary"].hedges == 1 and standin.calls == 1
+    assert router.backends["standin"].ewma("summary") is not None
+    # a long task is hedged against its own tail, not the short one's
+    assert router.hedge_delay(router.backends["primary"], "analysis") == 5.0
+    assert llm.llm_complete("hello again", cache="bypass", task="analysis")
+    assert router.backends["primary"].hedges == 1
+    llm_router.reset()
+
+def test_hedges_need_budget_and_an_idle_thread(monkeypatch):
+    primary, standin = Behaviour(latency=0.1), Behaviour(latency=0.01)
+    router = _router(monkeypatch, primary, standin)
+    for _ in range(llm.settings.LLM_HEDGE_MIN_SAMPLES):
+        router.backends["primary"].observe(0.01, "summary")
+    pool = llm.HedgePool(1)
+    monkeypatch.setattr(llm, "_hedge_pool", pool)
+    # the only thread runs the primary, so there's nothing to hedge on; the budget is kept
+    assert llm.llm_complete("one", cache="bypass", task="summary")
+    assert standin.calls == 0 and pool.credit == llm._HEDGE_BURST and pool.busy == 0
+
+    pool = llm.HedgePool(2)
+    pool.credit = 0.0
+    monkeypatch.setattr(llm, "_hedge_pool", pool)
+    assert llm.llm_complete("two", cache="bypass", task="summary")
+    assert standin.calls == 0 and router.backends["primary"].hedges == 0
+    assert pool.credit == llm.settings.LLM_HEDGE_BUDGET
+    llm_router.reset()
+
+class RejectingOpenAI(FakeOpenAI):
+    def create(self, model: str, messages: list, **params):
+        import httpx
+        import openai
+        self.behaviour.call()
+        response = httpx.Response(400, request=httpx.Request("POST", "https://fake-openai/v1/chat/completions"))
+        raise openai.BadRequestError("context length exceeded", response=response, body=None)
+
+def test_rejected_requests_do_not_cool_down_the_backend(monkeypatch):
+    primary, standin = Behaviour(), Behaviour(error_rate=1.0)
+    router = _router(monkeypatch, primary, standin)
+    monkeypatch.setitem(llm.clients._extra, "primary", (("http://primary/v1", "none"), RejectingOpenAI(primary)))
+    with pytest.raises(RuntimeError):
+        llm.llm_complete("too long", cache="bypass", task="summary")
+    assert router.backends["primary"].available() and router.backends["primary"].failures == 0
+    assert not router.backends["standin"].available()  # the throttled one does sit out
+    llm_router.reset()
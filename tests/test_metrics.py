@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import text
+import json
+from app.services import pipeline, report, tracing, transcript
+from app.utils.timed_segments import TimedSegments
+
+def test_metrics_endpoint_and_timings(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": "TL;DR:\n- x"})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims",
+                        lambda content, k=8: [{"text": "c", "proposed_queries": ["q"]}])
+    monkeypatch.setattr(pipeline.searcher, "search_web",
+                        lambda q, max_results=3: [{"url": "https://example.com", "title": q, "snippet": q}])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim", lambda claim, snippets: {"rationale": "ok"})
+
+    result = text.analyze_text(text.TextIn(content="hello", timings=True))
+    stages = result["json_report"]["timings"]["stages"]
+    assert {"summarize", "extract", "search", "assess", "scoring", "report"} <= set(stages)
+    assert result["json_report"]["usage"]["cache_hits"] == 0
+
+    body = TestClient(app).get("/metrics").text
+    assert 'truthlens_stage_seconds_count{stage="search"}' in body
+    assert 'truthlens_stage_seconds_bucket{stage="search",le="+Inf"}' in body
+    assert "truthlens_llm_tokens_total" in body
+
+def test_disabled_tracing_records_nothing(monkeypatch):
+    monkeypatch.setattr(tracing.settings, "METRICS_ENABLED", False)
+    trace = tracing.Trace()
+    with tracing.using(trace):
+        assert tracing.timed("search", lambda: 1) == 1
+        with tracing.span("report"):
+            pass
+    assert trace.stages == {}
+    assert "timings" not in report.build_result({"summary_raw": "", "claims": [], "sources": []})["json_report"]
+
+def test_streamed_youtube_timings_include_the_transcript(monkeypatch):
+    def fetch(url, cache=None):
+        with tracing.span("transcript"):
+            timed = TimedSegments.from_list([{"text": "hello", "start": 0.0, "duration": 1.0}])
+            return timed.text, {"segments": timed}
+
+    monkeypatch.setattr(transcript, "fetch_transcript_youtube", fetch)
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.settings, "TLDW_ENABLED", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": "TL;DR:\n- x"})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", lambda content, k=8: [])
+
+    r = TestClient(app).post("/analyze/youtube/stream", json={"url": "https://youtu.be/abcdefghijk", "timings": True})
+    report_event = json.loads(r.text.strip().split("\n")[-1])
+    assert "transcript" in report_event["result"]["json_report"]["timings"]["stages"]
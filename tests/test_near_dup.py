@@ -0,0 +1,32 @@
+from app.services import pipeline
+from app.utils.minhash import group_near_duplicates
+
+def test_groups_paraphrases_but_not_different_facts():
+    texts = ["GDP grew 3% in 2023", "In 2023, GDP grew by 3%", "GDP grew 4% in 2023",
+             "Vaccines cause autism", "Vaccines do not cause autism", "Inflation rose 3% in 2023"]
+    assert group_near_duplicates(texts) == [0, 0, 2, 3, 4, 5]
+
+def test_entity_swaps_stay_separate():
+    texts = ["Biden won Pennsylvania in 2020", "Trump won Pennsylvania in 2020", "Paris is the capital of France",
+             "Lyon is the capital of France", "Biden reportedly won Pennsylvania in 2020", "Biden wins Pennsylvania in 2020"]
+    assert group_near_duplicates(texts) == [0, 1, 2, 3, 0, 5]
+
+def test_pipeline_assesses_each_group_once(monkeypatch):
+    claims = [{"text": "GDP grew 3% in 2023", "proposed_queries": ["gdp 2023"]},
+              {"text": "Unemployment fell", "proposed_queries": ["unemployment"]},
+              {"text": "In 2023, GDP grew by 3%", "proposed_queries": ["gdp growth 2023"]}]
+    searched, assessed = [], []
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": ""})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", lambda content, k=8: claims)
+    monkeypatch.setattr(pipeline.searcher, "search_web",
+                        lambda q, max_results=3: searched.append(q) or [{"url": f"https://example.com/{q}", "title": q, "snippet": q}])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim",
+                        lambda claim, snippets: assessed.append(claim) or {"support_score": 0.9, "rationale": claim})
+
+    run = pipeline.run_analysis("text", batch_size=1)
+    assert sorted(searched) == ["gdp 2023", "unemployment"]
+    assert sorted(assessed) == ["GDP grew 3% in 2023", "Unemployment fell"]
+    assert [a["claim"]["text"] for a in run["claims"]] == [c["text"] for c in claims]
+    assert run["claims"][2]["duplicate_of"] == 0 and run["claims"][2]["rationale"] == "GDP grew 3% in 2023"
+    assert run["claims"][2]["sources"] == run["claims"][0]["sources"]
@@ -0,0 +1,82 @@
+import json
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import pdf as pdf_router
+from app.services import analysis, chunker, pdf
+
+def _pdf_bytes(pages: list) -> bytes:
+    # Smallest valid PDF with one line of Helvetica text per page
+    objs = ["<</Type/Catalog/Pages 2 0 R>>",
+            "<</Type/Pages/Kids[%s]/Count %d>>" % (" ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages))]
+    font = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objs.append(f"<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]/Contents {4 + 2 * i} 0 R"
+                    f"/Resources<</Font<</F1 {font} 0 R>>>>>>")
+        objs.append(f"<</Length {len(stream)}>>\nstream\n{stream}\nendstream")
+    objs.append("<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>")
+    out, offsets = "%PDF-1.4\n", []
+    for n, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<</Size {len(objs) + 1}/Root 1 0 R>>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+def test_normalize_page_unwraps_lines_and_hyphens():
+    raw = "The bridge was opened in 20-\n21 by the city's trans-\nport depart-\nment.\n\n\nIt carries\ncars.\x00"
+    assert pdf.normalize_page(raw) == "The bridge was opened in 2021 by the city's transport department.\n\nIt carries cars."
+
+def test_pages_reach_the_llm_before_extraction_finishes(monkeypatch):
+    first_call, prompts = threading.Event(), []
+
+    def pages():
+        for i in range(12):
+            if i == 6:
+                assert first_call.wait(5), "no chunk was sent while pages were still coming in"
+            yield f"Page {i}. " + "word " * 150
+
+    def llm_complete(prompt, **params):
+        prompts.append(prompt)
+        first_call.set()
+        return json.dumps({"tldr": ["t"], "executive_summary": "s", "deep_dive": [],
+                           "claims": [{"text": f"claim {prompt.count('Page')}"}]})
+
+    monkeypatch.setattr(chunker.settings, "CHUNK_TOKENS", 200)
+    monkeypatch.setattr(analysis, "llm_complete", llm_complete)
+    monkeypatch.setattr(analysis.summarizer, "llm_complete", llm_complete)
+    out = analysis.analyze_pages(pages(), k=4)
+    assert out["chunks"] == 12 and len(out["claims"]) >= 1
+    assert "reading part 3 of a longer document" in "".join(prompts) and " of many" not in "".join(prompts)
+
+def test_upload_limits(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf.settings, "DATA_DIR", str(tmp_path))
+    client = TestClient(app)
+    r = client.post("/analyze/pdf", content=b"not a pdf", headers={"content-type": "application/pdf"})
+    assert r.status_code == 400
+    monkeypatch.setattr(pdf.settings, "PDF_MAX_BYTES", 100)
+    r = client.post("/analyze/pdf", content=b"%PDF-" + b"x" * 200, headers={"content-type": "application/pdf"})
+    assert r.status_code == 413
+    assert list((tmp_path / "uploads").iterdir()) == []  # rejected uploads leave nothing behind
+
+def test_page_extraction(tmp_path):
+    pytest.importorskip("pypdf")
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(_pdf_bytes([f"Page number {i}" for i in range(20)]))
+    assert pdf._count_pages(str(path)) == 20
+    assert [pdf.normalize_page(t) for t in pdf._extract_pages(str(path), 18, 20)] == ["Page number 18", "Page number 19"]
+
+def test_multipart_upload(monkeypatch, tmp_path):
+    pytest.importorskip("pypdf")
+    pytest.importorskip("python_multipart")
+    monkeypatch.setattr(pdf.settings, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(pdf_router.pipeline, "run_analysis", lambda content, pages=None, **options: {"pages": list(pages)})
+    monkeypatch.setattr(pdf_router.report, "build_result", lambda run, timings=False: run)
+    files = {"file": ("report.pdf", _pdf_bytes(["First page", "Second page"]), "application/pdf"),
+             "notes": ("notes.txt", b"%PDF- not the first file", "text/plain")}
+    r = TestClient(app).post("/analyze/pdf", data={"title": "Q3"}, files=files)
+    assert r.status_code == 200 and r.json() == {"pages": ["First page", "Second page"]}
+    assert list((tmp_path / "uploads").iterdir()) == []
@@ -0,0 +1,84 @@
+import random
+import threading
+import time
+from app.services import pipeline
+
+def test_run_analysis_keeps_claim_order(monkeypatch):
+    claims = [{"text": f"claim {i}", "proposed_queries": [f"q{i}a", f"q{i}b"]} for i in range(6)]
+
+    def search_web(q, max_results=3):
+        time.sleep(random.random() / 100)
+        return [{"url": f"https://example.com/{q}", "title": q, "snippet": q}]
+
+    def assess_claim(claim, snippets):
+        time.sleep(random.random() / 100)
+        return {"support_score": 0.5, "contradiction_score": 0.1, "rationale": f"{claim}: {len(snippets)}"}
+
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": "TL;DR:\n- x"})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", lambda content, k=8: claims)
+    monkeypatch.setattr(pipeline.searcher, "search_web", search_web)
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim", assess_claim)
+
+    run = pipeline.run_analysis("some text", concurrency=4, batch_size=1)
+    assert [a["claim"]["text"] for a in run["claims"]] == [c["text"] for c in claims]
+    assert [a["rationale"] for a in run["claims"]] == [f"claim {i}: 2" for i in range(6)]
+    assert [s["url"] for s in run["claims"][0]["sources"]] == ["https://example.com/q0a", "https://example.com/q0b"]
+    assert run["summary_raw"] == "TL;DR:\n- x"
+
+def test_run_analysis_dedupes_queries_across_claims(monkeypatch):
+    claims = [{"text": "a", "proposed_queries": ["GDP grew 3%", "unemployment"]},
+              {"text": "b", "proposed_queries": ["gdp grew 3 %", "Unemployment?"]}]
+    searched = []
+
+    def search_web(q, max_results=3):
+        searched.append(q)
+        return [{"url": f"https://example.com/{len(searched)}", "title": q, "snippet": q}]
+
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": ""})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", lambda content, k=8: claims)
+    monkeypatch.setattr(pipeline.searcher, "search_web", search_web)
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim", lambda claim, snippets: {"rationale": "ok"})
+
+    run = pipeline.run_analysis("some text", batch_size=1)
+    assert sorted(searched) == ["GDP grew 3%", "unemployment"]
+    assert run["claims"][0]["sources"] == run["claims"][1]["sources"]
+
+def test_ready_claims_are_not_held_for_a_slow_search(monkeypatch):
+    claims = [{"text": "fast claim", "proposed_queries": ["fast"]}, {"text": "slow claim", "proposed_queries": ["slow"]}]
+    first_assessed = threading.Event()
+
+    def search_web(q, max_results=3):
+        if q == "slow":
+            assert first_assessed.wait(5), "the fast claim waited for the slow search"
+        return [{"url": f"https://example.com/{q}", "title": q, "snippet": q}]
+
+    def assess_claims(items):
+        first_assessed.set()
+        return [{"rationale": claim} for claim, _ in items]
+
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.settings, "ASSESS_MAX_WAIT", 0.05)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", lambda content: {"raw": ""})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", lambda content, k=8: claims)
+    monkeypatch.setattr(pipeline.searcher, "search_web", search_web)
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claims", assess_claims)
+
+    run = pipeline.run_analysis("some text", batch_size=2)
+    assert [a["rationale"] for a in run["claims"]] == ["fast claim", "slow claim"]
+
+def test_summary_failure_is_collected_when_not_strict(monkeypatch):
+    def summarize(content):
+        raise RuntimeError("summary backend down")
+
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", summarize)
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", lambda content, k=8: [{"text": "a claim"}])
+    monkeypatch.setattr(pipeline.searcher, "search_web", lambda q, max_results=3: [])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim", lambda claim, snippets: {"rationale": "ok"})
+
+    events = list(pipeline.iter_analysis("some text", batch_size=1, strict=False))
+    assert {"event": "summary", "raw": ""} in events
+    run = events[-1]["run"]
+    assert run["errors"] == ["Summary failed: summary backend down"] and len(run["claims"]) == 1
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import text
+from app.utils.rate_limit import TokenBucket, AdaptiveConcurrency, RateLimiter, Throttled
+
+def test_token_bucket_paces_threads():
+    bucket = TokenBucket(rate=20, per_seconds=1.0, capacity=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # one token up front, five more at 20/s
+    assert time.monotonic() - start >= 0.2
+    assert not bucket.allow()
+
+def test_aimd_shrinks_on_throttle_and_grows_back():
+    limit = AdaptiveConcurrency(8, minimum=1, maximum=8, cooldown=0.0)
+    limit.throttled()
+    limit.throttled()
+    assert int(limit.limit) == 2
+    for _ in range(40):
+        assert limit.acquire(timeout=1)
+        limit.release(ok=True)
+    assert int(limit.limit) == 8
+
+def test_concurrency_is_shared_by_threads_and_coroutines():
+    limiter = RateLimiter("test", concurrency=AdaptiveConcurrency(2, maximum=2))
+    peak, active, lock = [0], [0], threading.Lock()
+
+    def enter():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+
+    def leave():
+        with lock:
+            active[0] -= 1
+
+    def in_thread():
+        with limiter.slot():
+            enter()
+            time.sleep(0.02)
+            leave()
+
+    async def in_loop():
+        async with limiter.slot_async():
+            enter()
+            await asyncio.sleep(0.02)
+            leave()
+
+    async def main():
+        await asyncio.gather(*(in_loop() for _ in range(5)))
+
+    threads = [threading.Thread(target=in_thread) for _ in range(5)]
+    for t in threads:
+        t.start()
+    asyncio.run(main())
+    for t in threads:
+        t.join()
+    assert peak[0] == 2 and limiter.concurrency.in_flight == 0
+
+def test_slot_gives_up_past_max_wait(monkeypatch):
+    limiter = RateLimiter("test", requests=TokenBucket(rate=1, per_seconds=10.0), max_wait=1.0)
+    with limiter.slot():
+        pass
+    with pytest.raises(Throttled) as e:
+        with limiter.slot():
+            pass
+    assert 9 < e.value.retry_after <= 10
+    # the reservation was given back, so the next caller isn't pushed further out
+    assert limiter.requests.wait_time() <= 10
+
+    with pytest.raises(Throttled):
+        asyncio.run(limiter.slot_async().__aenter__())
+
+    def run_analysis(content, **options):
+        raise Throttled("openai", 12.3)
+    monkeypatch.setattr(text.pipeline, "run_analysis", run_analysis)
+    r = TestClient(app).post("/analyze/text", json={"content": "Some claim."})
+    assert r.status_code == 503 and r.headers["retry-after"] == "13"
@@ -1,4 +1,36 @@
-from app.services.scoring import aggregate_truth_score
+from app.services import scoring
+from app.services.scoring import aggregate_truth_score, score_documents, star_rating_from_quality
 
 def test_aggregate_truth_score_empty():
     assert aggregate_truth_score([]) == 50.0
+
+def test_aggregate_truth_score_weights_by_evidence():
+    strong = {"support_score": 1.0, "contradiction_score": 0.0, "sources": [{"trust_weight": 0.9}]}
+    weak = {"support_score": 0.0, "contradiction_score": 1.0, "sources": []}
+    assert aggregate_truth_score([strong]) == 95.0
+    assert aggregate_truth_score([weak]) == 50.0
+    assert 50.0 < aggregate_truth_score([strong, weak]) < 95.0
+
+def test_score_documents_batch_with_confidence_intervals():
+    claim = {"support_score": 0.9, "contradiction_score": 0.1,
+             "sources": [{"trust_weight": 0.9}, {"trust_weight": 0.3}, {"trust_weight": 0.6}]}
+    docs = score_documents([[claim, claim], [], [claim]], n_boot=500, seed=1)
+    assert [d["truth_score"] for d in docs] == [aggregate_truth_score([claim]), 50.0, aggregate_truth_score([claim])]
+    lo, hi = docs[0]["ci"]
+    assert lo <= docs[0]["truth_score"] <= hi and lo < hi
+    assert docs[1]["ci"] == [50.0, 50.0]
+    assert docs[0]["claims"][0]["score"] == aggregate_truth_score([claim])
+
+def test_bootstrap_runs_one_document_block_at_a_time(monkeypatch):
+    monkeypatch.setattr(scoring, "_BLOCK_ELEMENTS", 1)
+    claims = [{"support_score": s, "contradiction_score": 0.0,
+               "sources": [{"trust_weight": 0.9}, {"trust_weight": 0.2}]} for s in (0.2, 0.5, 0.9)]
+    docs = score_documents([claims[:2], [], claims[2:]], n_boot=200, seed=3)
+    for doc in (docs[0], docs[2]):
+        assert doc["ci"][0] <= doc["truth_score"] <= doc["ci"][1] and doc["ci"][0] < doc["ci"][1]
+        assert all(c["ci"][0] < c["score"] < c["ci"][1] for c in doc["claims"])
+    assert docs[1]["ci"] == [50.0, 50.0]
+
+def test_star_rating_is_vectorized():
+    assert star_rating_from_quality(1.0, 1.0, 0.0) == 5.0
+    assert list(star_rating_from_quality([1.0, 0.0], [1.0, 0.0], [0.0, 1.0])) == [5.0, 1.0]
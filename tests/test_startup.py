@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_SDKS = ("openai", "tavily", "googleapiclient", "youtube_transcript_api")
+# Budgets for the app's own import cost (framework preloaded) and for a cold
+# process to import app.main and answer its first request. Override for slow CI.
+APP_IMPORT_BUDGET_MS = float(os.environ.get("APP_IMPORT_BUDGET_MS", 400))
+FIRST_RESPONSE_BUDGET_MS = float(os.environ.get("FIRST_RESPONSE_BUDGET_MS", 3000))
+
+def _python(code: str, *flags) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+def import_times(code: str) -> dict:
+    # `-X importtime` lines: "import time: self [us] | cumulative | <indent>package"
+    times = {}
+    for line in _python(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1000.0
+    return times
+
+def test_importing_services_does_not_load_provider_sdks():
+    times = import_times("import app.services, app.services.pipeline, app.services.report")
+    loaded = [name for name in times if name.split(".")[0] in HEAVY_SDKS]
+    assert loaded == []
+
+def test_app_import_within_budget():
+    times = import_times("import fastapi, fastapi.testclient, pydantic_settings, starlette.responses; import app.main")
+    assert times["app.main"] < APP_IMPORT_BUDGET_MS, f"app.main took {times['app.main']:.0f} ms"
+
+def test_time_to_first_response_within_budget():
+    out = _python("import time; t = time.perf_counter()\n"
+                  "from fastapi.testclient import TestClient\n"
+                  "from app.main import app\n"
+                  "assert TestClient(app).get('/health').status_code == 200\n"
+                  "print((time.perf_counter() - t) * 1000)")
+    elapsed = float(out.stdout.strip().splitlines()[-1])
+    assert elapsed < FIRST_RESPONSE_BUDGET_MS, f"first response after {elapsed:.0f} ms"
@@ -0,0 +1,29 @@
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import text
+from app.services import pipeline
+
+def test_text_stream_emits_partial_events(monkeypatch):
+    claims = [{"text": f"claim {i}", "proposed_queries": [f"q{i}"]} for i in range(3)]
+    monkeypatch.setattr(pipeline.settings, "COMBINED_ANALYSIS", False)
+    monkeypatch.setattr(pipeline.summarizer, "summarize",
+                        lambda content: {"raw": "TL;DR:\n- one\n- two\n\nExecutive Summary:\nshort\n\nDeep Dive:\n- deep"})
+    monkeypatch.setattr(pipeline.claim_extractor, "extract_claims", lambda content, k=8: claims)
+    monkeypatch.setattr(pipeline.searcher, "search_web",
+                        lambda q, max_results=3: [{"url": f"https://example.com/{q}", "title": q, "snippet": q}])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim",
+                        lambda claim, snippets: {"support_score": 0.8, "contradiction_score": 0.1, "rationale": claim})
+    monkeypatch.setattr(pipeline.settings, "ASSESS_BATCH_SIZE", 1)
+
+    api = FastAPI()
+    api.include_router(text.router)
+    with TestClient(api).stream("POST", "/analyze/text/stream", json={"content": "hello"}) as r:
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in r.iter_lines() if line]
+
+    kinds = [e["event"] for e in events]
+    assert kinds.count("claim") == 3 and kinds[-1] == "report"
+    summary = next(e for e in events if e["event"] == "summary")
+    assert summary["tldr"] == ["one", "two"]
+    assert events[-1]["result"]["claims"][2]["rationale"] == "claim 2"
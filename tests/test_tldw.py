@@ -0,0 +1,50 @@
+import json
+from app.services import analysis, pipeline, report, tldw
+from app.utils.timed_segments import TimedSegments
+
+LINES = ["Welcome back to the show.", "Today we look at the new bridge.", "It opened in 2021 downtown.",
+         "Traffic deaths fell by a third.", "Thanks for watching."]
+
+def _timed():
+    return TimedSegments.from_list([{"text": t, "start": 200.0 * i, "duration": 5.0} for i, t in enumerate(LINES)])
+
+def test_timed_segments_round_trip_and_windows():
+    timed = _timed()
+    assert timed.text == " ".join(LINES)
+    assert timed.span_text(1, 3) == "Today we look at the new bridge. It opened in 2021 downtown."
+    assert timed.windows(300) == [(0, 2), (2, 3), (3, 5)]
+    assert timed.time_at(timed.text.index("Traffic")) == 600.0
+    again = TimedSegments.from_dict(json.loads(json.dumps(timed.to_dict())))
+    assert again.text == timed.text and again.end() == 805.0
+    assert TimedSegments.from_dict([{"text": "old row", "start": 1.0, "duration": 2.0}]).text == "old row"
+
+def test_claim_timestamps_use_snippets_then_word_overlap():
+    claims = [{"text": "The bridge opened in 2021", "snippet": "It opened in 2021"},
+              {"text": "deaths from traffic fell a third"},
+              {"text": "Unrelated statement about weather"}]
+    assert tldw.claim_timestamps(claims, _timed()) == [400.0, 600.0, None]
+
+def test_youtube_run_gets_tldw_and_claim_timestamps(monkeypatch):
+    prompts = []
+
+    def llm_complete(prompt, **params):
+        prompts.append(prompt)
+        return json.dumps({"bullets": ["window " + prompt.split(" between ")[1].split(" and ")[0]]})
+
+    sections = {"tldr": ["one"], "executive_summary": "short", "deep_dive": []}
+    claims = [{"text": "Traffic deaths fell by a third", "snippet": "Traffic deaths fell by a third"}]
+    monkeypatch.setattr(tldw, "llm_complete", llm_complete)
+    monkeypatch.setattr(analysis, "llm_complete", lambda prompt, **params: json.dumps(dict(sections, claims=claims)))
+    monkeypatch.setattr(pipeline.searcher, "search_web", lambda q, max_results=3: [])
+    monkeypatch.setattr(pipeline.fact_checker, "assess_claim", lambda claim, snippets: {"support_score": 0.5})
+    monkeypatch.setattr(tldw.settings, "TLDW_WINDOW_SECONDS", 300.0)
+
+    timed = _timed()
+    events = list(pipeline.iter_analysis(timed.text, batch_size=1, timed=timed))
+    assert [e["windows"] for e in events if e["event"] == "tldw"][0][1]["start"] == 400.0
+    assert len(prompts) == 3 and sum("Welcome back" in p for p in prompts) == 1
+    run = events[-1]["run"]
+    assert run["claims"][0]["timestamp"] == 600.0
+    result = report.build_result(run)
+    assert result["tldw"] == ["[00:00–03:25] window 00:00", "[06:40–06:45] window 06:40", "[10:00–13:25] window 10:00"]
+    assert "(at 10:00)" in result["markdown_report"] and "## TL;DW" in result["markdown_report"]
@@ -0,0 +1,72 @@
+import threading
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import youtube
+from app.services import transcript
+
+class FakeYouTube:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def videos(self):
+        return self
+
+    def captions(self):
+        return self
+
+    def list(self, part, id=None, videoId=None):
+        self.calls.append(id or videoId)
+        time.sleep(0.05)
+        return self
+
+    def execute(self):
+        return {"items": [{"id": "cap1", "snippet": {"title": "Viral", "language": "en"}}]}
+
+def test_concurrent_fetches_share_one_upstream_call(monkeypatch, tmp_path):
+    calls, builds = [], []
+    monkeypatch.setenv("YT_API_KEY", "k")
+    monkeypatch.setattr(transcript, "_service", None)
+    monkeypatch.setattr(transcript, "_store", transcript.TranscriptStore(str(tmp_path / "t.sqlite3"), ttl=60))
+    monkeypatch.setattr(transcript, "build", lambda *a, **kw: builds.append(1) or FakeYouTube(calls))
+    monkeypatch.setattr(transcript, "_fetch_segments",
+                        lambda video_id, language: [{"text": "hello", "start": 0.0, "duration": 1.0},
+                                                    {"text": "world", "start": 1.0, "duration": 1.0}])
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(transcript.fetch_transcript_youtube(
+        "https://youtu.be/abcdefghijk"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(out) == 8 and all(text == "hello world" for text, _ in out)
+    assert out[0][1]["title"] == "Viral" and out[0][1]["captions"][0]["id"] == "cap1"
+    assert calls == ["abcdefghijk", "abcdefghijk"]  # videos().list + captions().list, once
+
+    transcript.fetch_transcript_youtube("https://www.youtube.com/watch?v=abcdefghijk")
+    assert len(calls) == 2 and len(builds) == 1
+    transcript.get_store().ttl = 0
+    transcript.fetch_transcript_youtube("https://www.youtube.com/watch?v=abcdefghijk")
+    assert len(calls) == 4 and len(builds) == 1
+
+    # bypass fetches without reading or writing the store
+    transcript.get_store().ttl = 60
+    transcript.fetch_transcript_youtube("https://youtu.be/bcdefghijkl", cache="bypass")
+    assert len(calls) == 6 and transcript.get_store().get("bcdefghijkl") is None
+    transcript.fetch_transcript_youtube("https://youtu.be/bcdefghijkl", cache="refresh")
+    assert len(calls) == 8 and transcript.get_store().get("bcdefghijkl") is not None
+
+def test_cache_refresh_refetches_the_transcript(monkeypatch):
+    seen = []
+
+    def fetch(url, cache=None):
+        seen.append(cache)
+        return "", {}
+
+    monkeypatch.setattr(youtube.transcript, "fetch_transcript_youtube", fetch)
+    client = TestClient(app)
+    for cache in ("use", "refresh", "bypass"):
+        assert client.post("/analyze/youtube", json={"url": "https://youtu.be/abcdefghijk", "cache": cache}).status_code == 404
+    assert seen == ["use", "refresh", "bypass"]
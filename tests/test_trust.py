@@ -0,0 +1,22 @@
+import os
+from app.services import trust
+
+def test_most_specific_suffix_wins():
+    index = trust.DomainTrustIndex({"co.uk": 0.4, "example.co.uk": 0.6, "news.example.co.uk": 0.9}, default=0.5)
+    assert index.weight("https://sub.news.example.co.uk/a?b=1") == 0.9
+    assert index.weight("http://user@www.example.co.uk:8080/") == 0.6
+    assert index.weight("https://other.co.uk") == 0.4
+    assert index.weight("https://unknown.org/x") == 0.5
+    assert index.weights(["https://example.co.uk", "https://a.b.c.d.e.org"]) == [0.6, 0.5]
+
+def test_index_hot_reloads(tmp_path, monkeypatch):
+    path = tmp_path / "trust.csv"
+    path.write_text("example.com,0.9\n")
+    monkeypatch.setattr(trust.settings, "TRUST_TABLE_PATH", str(path))
+    monkeypatch.setattr(trust.settings, "TRUST_RELOAD_INTERVAL", 0.0)
+    trust.reload_index()
+    assert trust.get_index().weight("https://example.com") == 0.9
+
+    path.write_text("example.com,0.2\n")
+    os.utime(path, (1, 1))
+    assert trust.get_index().weight("https://example.com") == 0.2
@@ -69,7 +69,71 @@ def api_post(path: str, payload: dict, timeout: int = 180):
         st.code((r.text or "<empty>")[:2000])
         st.stop()
 
-tab1, tab2 = st.tabs(["YouTube", "Text/Web"])
+def api_stream(path: str, payload: dict, timeout: tuple = (5, 300), files: dict = None):
+    # Yields NDJSON events from a /analyze/*/stream endpoint as they arrive
+    url = f"{BACKEND}{path}"
+    try:
+        if files:
+            r = requests.post(url, params=payload, files=files, stream=True, timeout=timeout)
+        else:
+            r = requests.post(url, json=payload, stream=True, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Network error calling {url}: {e}")
+        st.stop()
+
+    if r.status_code != 200:
+        st.error(f"API error {r.status_code} for {path}")
+        st.code((r.text or "<empty response>")[:2000])
+        st.stop()
+
+    with r:
+        for line in r.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                st.warning(f"Skipping malformed event: {line[:200]}")
+
+def render_stream(path: str, payload: dict, files: dict = None):
+    status = st.status("Analyzing via backend...", expanded=True)
+    summary_box = st.container()
+    progress = st.progress(0.0, text="Waiting for claims...")
+    claims_box = st.container()
+    total = 0
+    for event in api_stream(path, payload, files=files):
+        kind = event.get("event")
+        if kind == "summary":
+            status.write("Summary ready.")
+            with summary_box:
+                st.markdown("## TL;DR\n- " + "\n- ".join(event.get("tldr") or []))
+                st.markdown("## Executive Summary\n" + (event.get("summary") or ""))
+        elif kind == "claims":
+            total = event.get("count") or 0
+            status.write(f"{total} claims extracted, checking evidence...")
+            if not total:
+                progress.progress(1.0, text="No claims to check.")
+        elif kind == "claim":
+            a = event.get("assessment") or {}
+            done = event.get("completed", 0)
+            progress.progress(min(1.0, done / max(total, 1)),
+                              text=f"{done}/{total} claims checked — running truth score {event.get('truth_score')}/100")
+            with claims_box:
+                st.markdown(f"- **Claim:** {a.get('claim', {}).get('text', '')}  \n"
+                            f"  Support: {a.get('support_score', 0):.2f}, Contra: {a.get('contradiction_score', 0):.2f}")
+        elif kind == "error":
+            status.update(label="Analysis failed", state="error")
+            st.error(event.get("detail") or "Unknown error")
+            st.stop()
+        elif kind == "report":
+            status.update(label="Done.", state="complete", expanded=False)
+            summary_box.empty()
+            claims_box.empty()
+            progress.empty()
+            st.markdown(event["result"].get("markdown_report", "No report generated."))
+            return event["result"]
+
+tab1, tab2, tab3 = st.tabs(["YouTube", "Text/Web", "PDF"])
 
 with tab1:
     url = st.text_input("YouTube URL")
@@ -77,10 +141,7 @@ with tab1:
         if not url.strip():
             st.warning("Please paste a YouTube URL.")
         else:
-            with st.spinner("Analyzing via backend..."):
-                data = api_post("/analyze/youtube", {"url": url})
-            st.success("Done.")
-            st.markdown(data.get("markdown_report", "No report generated."))
+            render_stream("/analyze/youtube/stream", {"url": url})
 
 with tab2:
     content = st.text_area("Paste text you have rights to use", height=220)
@@ -88,8 +149,13 @@ with tab2:
         if not content.strip():
             st.warning("Please paste some text.")
         else:
-            with st.spinner("Analyzing via backend..."):
-                data = api_post("/analyze/text", {"content": content})
-            st.success("Done.")
-            st.markdown(data.get("markdown_report", "No report generated."))
+            render_stream("/analyze/text/stream", {"content": content})
+
+with tab3:
+    upload = st.file_uploader("PDF you have rights to use", type=["pdf"])
+    if st.button("Analyze PDF"):
+        if upload is None:
+            st.warning("Please choose a PDF.")
+        else:
+            render_stream("/analyze/pdf/stream", {}, files={"file": (upload.name, upload, "application/pdf")})
 
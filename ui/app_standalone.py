@@ -29,12 +29,14 @@ try:
         star_rating_from_quality,
         fetch_transcript_youtube,
     )
+    from app.services.pipeline import run_analysis
+    from app.services import report
 except ImportError as e:
     st.error(
         f"Error loading services: {e}. "
         "Check that the 'app' folder is in your truthlens folder, "
         "and the 'services' folder has these files: llm.py, summarizer.py, claim_extractor.py, "
-        "searcher.py, fact_checker.py, scoring.py, transcript.py, plus __init__.py. "
+        "searcher.py, fact_checker.py, scoring.py, transcript.py, pipeline.py, plus __init__.py. "
         "Also ensure 'app/config.py' exists."
     )
     st.stop()
@@ -84,82 +86,25 @@ with st.sidebar:
 
 # Helpers
 def parse_sections(raw: str) -> tuple[list[str], str, str]:
-    def extract(name: str) -> str:
-        m = re.search(rf"{name}\s*:?\s*\n(.+?)(?:\n\n|$)", raw, flags=re.IGNORECASE | re.DOTALL)
-        return m.group(1).strip() if m else ""
-    tldr = [x.strip("- ").strip() for x in extract("TL;DR").split("\n") if x.strip()]
-    summary = extract("Executive Summary") or "(no executive summary extracted)"
-    deep = extract("Deep Dive") or "(no deep dive extracted)"
-    return (tldr or ["(no TL;DR extracted)"], summary, deep)
+    tldr, summary, deep = report.parse_sections(raw)
+    return (tldr or ["(no TL;DR extracted)"], summary or "(no executive summary extracted)",
+            deep or "(no deep dive extracted)")
 
 def run_pipeline(text: str, source_type: str = "Text", source_url: str = "") -> str:
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     title = f"TruthLens Report ({source_type})" + (f" — {source_url}" if source_url else "")
 
-    # 1) Summarize
+    # 1-3) Summarize, extract claims, search and assess (concurrent engine)
+    has_search = bool(os.environ.get("TAVILY_API_KEY"))
     try:
-        sum_raw = summarize(text)["raw"]
+        run = run_analysis(text, k=8, search=has_search, strict=False)
     except Exception as e:
         st.error(f"Summarizer failed: {e}. Ensure OPENAI_API_KEY is valid.")
         st.stop()
-
-    # 2) Extract claims
-    claims_raw = []
-    try:
-        claims_raw = extract_claims(text, k=8) or []
-    except Exception as e:
-        st.warning(f"Claim extraction failed: {e}. Continuing without claims.")
-
-    # 3) Search and assess claims
-    claim_assessments = []
-    global_sources = []
-    has_search = bool(os.environ.get("TAVILY_API_KEY"))
-
-    for claim in claims_raw:
-        claim_text = claim.get("text", "")
-        queries = claim.get("proposed_queries", [claim_text])[:3]
-        search_results = []
-
-        if has_search:
-            for query in queries:
-                try:
-                    search_results += search_web(query, max_results=3)
-                except Exception as e:
-                    st.warning(f"Search failed for query '{query}': {e}. Skipping.")
-
-        source_entries = []
-        snippets = []
-        for result in search_results[:5]:
-            url = result.get("url")
-            if not url:
-                continue
-            trust_score = trust_weight(url)
-            source_entry = {
-                "url": url,
-                "title": result.get("title", ""),
-                "snippet": result.get("snippet", ""),
-                "trust_weight": trust_score
-            }
-            source_entries.append(source_entry)
-            snippets.append(f"{source_entry['title']} — {source_entry['snippet']}")
-            global_sources.append(source_entry)
-
-        try:
-            assessment = assess_claim(claim_text, snippets)
-            support_score = float(assessment.get("support_score", 0.0))
-            contradiction_score = float(assessment.get("contradiction_score", 0.0))
-            rationale = assessment.get("rationale", "No rationale provided.")
-        except Exception as e:
-            support_score, contradiction_score = 0.0, 0.0
-            rationale = f"Assessment failed: {e}"
-
-        claim_assessments.append({
-            "claim": {"text": claim_text, "snippet": claim.get("snippet", ""), "proposed_queries": queries},
-            "support_score": support_score,
-            "contradiction_score": contradiction_score,
-            "sources": source_entries,
-            "rationale": rationale
-        })
+    for err in run["errors"]:
+        st.warning(f"{err}. Continuing.")
+    sum_raw = run["summary_raw"]
+    claim_assessments = run["claims"]
 
     truth_score = aggregate_truth_score(claim_assessments)
     stars = star_rating_from_quality(clarity=0.8, evidence=min(1.0, truth_score/100.0), bias=0.3)